@@ -1,4 +1,5 @@
 import typer
+from pathlib import Path
 from typing import List, Optional
 
 from odooflow.commands.init_module_env import init_module_env
@@ -11,10 +12,18 @@ from odooflow.commands.push import push_command
 from odooflow.commands.setup import setup as setup_command
 from odooflow.commands.server import app as server_app
 from odooflow.commands.connect import connect as server_connect
+from odooflow.commands.logs import logs as server_logs
+from odooflow.commands.exec import exec_cmd as server_exec
+from odooflow.commands.tunnel import tunnel as server_tunnel
+from odooflow.commands.agentd import ssh_agentd
 
 app = typer.Typer(help="OdooFlow CLI — streamline your Odoo development workflow.")
 app.add_typer(server_app, name="server")
 server_app.command("connect")(server_connect)
+server_app.command("logs")(server_logs)
+server_app.command("exec")(server_exec)
+server_app.command("tunnel")(server_tunnel)
+app.command("ssh-agentd")(ssh_agentd)
 
 @app.command(name="setup")
 def setup_cmd():
@@ -49,12 +58,13 @@ def config(
     access_token : Optional[str] = typer.Option(None, help="Set Git access token"),
     add_core_module: Optional[str] = typer.Option(None, "--add-core-module", help="Comma-separated list of core modules to add"),
     sync_keys: Optional[str] = typer.Option(None, help="Set default keys to sync from manifest to .env (comma-separated)"),
-    show: Optional[bool] = typer.Option(False, "--show", help="Show current config")
+    show: Optional[bool] = typer.Option(False, "--show", help="Show current config"),
+    ssh_prefer_agent: Optional[bool] = typer.Option(None, "--ssh-prefer-agent/--no-ssh-prefer-agent", help="Sign with the ssh-agent copy of a profile's key when the agent holds it"),
 ):
     """
     Update or show OdooFlow CLI configuration (.odooflowrc)
     """
-    config_command(env_file, manifest_file, access_token, add_core_module, sync_keys,show)
+    config_command(env_file, manifest_file, access_token, add_core_module, sync_keys,show, ssh_prefer_agent=ssh_prefer_agent)
 
 
 @app.command("clone")
@@ -101,14 +111,34 @@ def generate_ssh_key(
 
 @app.command()
 def push(
-    server: Optional[str] = typer.Option(None, "--server", "-s", help="Named server profile from `odooflow server list`."),
+    server: Optional[str] = typer.Option(None, "--server", "-s", help="Named server profile from `odooflow server list`. Comma-separate several to deploy to all of them."),
+    all_servers: bool = typer.Option(False, "--all", help="Deploy to every configured server profile."),
+    workers: int = typer.Option(4, "--workers", "-w", help="Max concurrent uploads when deploying to several servers."),
+    rollback: bool = typer.Option(False, "--rollback", help="Switch back to the previous release (release-mode profiles); nothing is uploaded."),
     remote_only: bool = typer.Option(False, "--remote-only", help="Skip Git push and only upload to server"),
     exec_cmd: Optional[str] = typer.Option(None, "--exec", help="Custom shell command to execute on the server after pushing"),
+    exec_timeout: Optional[float] = typer.Option(None, "--exec-timeout", help="Stop the post-push command after this many seconds (default: profile `post_push_timeout`, else no limit)."),
+    full: bool = typer.Option(False, "--full", help="Upload the whole project instead of only the files changed since the last deploy."),
+    watch: bool = typer.Option(False, "--watch", help="After the push, keep one SSH session open and sync every saved file until Ctrl-C."),
+    debounce_ms: int = typer.Option(200, "--debounce-ms", help="With --watch: wait this long for a burst of saves to settle before syncing."),
+    metrics_json: Optional[Path] = typer.Option(None, "--metrics-json", help="Write per-phase timings and byte counters for each server to this JSON file."),
 ):
     """
     Push the current Git branch and upload the project to the test server.
     """
-    push_command(server_name=server, remote_only=remote_only, exec_cmd=exec_cmd)
+    push_command(
+        server_name=server,
+        remote_only=remote_only,
+        exec_cmd=exec_cmd,
+        full=full,
+        all_servers=all_servers,
+        workers=workers,
+        rollback=rollback,
+        metrics_json=metrics_json,
+        watch=watch,
+        debounce_ms=debounce_ms,
+        exec_timeout=exec_timeout,
+    )
 
 
 
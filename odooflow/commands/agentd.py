@@ -0,0 +1,96 @@
+"""
+`odooflow ssh-agentd` — run, inspect or stop the local SSH multiplexing
+daemon (see `odooflow.utils.agentd`).
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+import typer
+
+from odooflow.utils import agentd
+
+
+def ssh_agentd(
+    socket_path: Optional[Path] = typer.Option(
+        None, "--socket", help=f"Unix socket path (default: ${agentd.SOCKET_ENV} or ~/.cache/odooflow/ssh-agentd.sock)."
+    ),
+    idle_timeout: int = typer.Option(
+        agentd.DEFAULT_IDLE_TIMEOUT, "--idle-timeout", help="Close connections unused for this many seconds."
+    ),
+    detach: bool = typer.Option(False, "--detach", "-d", help="Run in the background."),
+    status: bool = typer.Option(False, "--status", help="Show the running daemon's connections and exit."),
+    stop: bool = typer.Option(False, "--stop", help="Stop the running daemon."),
+):
+    """
+    Keep SSH connections open between odooflow commands, like ControlMaster.
+    """
+    path = socket_path or agentd.default_socket_path()
+
+    if status:
+        info = agentd.ping(path)
+        if info is None:
+            typer.secho(f"  ssh-agentd is not running ({path}).", fg="yellow")
+            raise typer.Exit(code=1)
+        typer.secho(f"  ssh-agentd pid {info['pid']} on {path}", fg="green")
+        for conn in info["connections"]:
+            typer.echo(
+                f"    {conn['target']:<40} idle {conn['idle_seconds']:>6.0f}s  "
+                f"{conn['channels']} open channel(s)"
+            )
+        if not info["connections"]:
+            typer.echo("    (no connections)")
+        return
+
+    if stop:
+        if not agentd.stop(path):
+            typer.secho(f"  ssh-agentd is not running ({path}).", fg="yellow")
+            raise typer.Exit(code=1)
+        typer.secho("  ✓ ssh-agentd stopping.", fg="green")
+        return
+
+    if agentd.ping(path) is not None:
+        typer.secho(f"  ssh-agentd is already running on {path}.", fg="yellow")
+        raise typer.Exit(code=1)
+
+    try:
+        # Checked here as well: a detached daemon could not report it.
+        agentd._prepare_socket_dir(Path(path).parent)
+    except RuntimeError as e:
+        typer.secho(f"  {e}", fg="red")
+        raise typer.Exit(code=1)
+
+    daemon = agentd.AgentDaemon(path, idle_timeout=idle_timeout, log=typer.echo)
+    if detach:
+        if not hasattr(os, "fork"):
+            typer.secho("  --detach needs a POSIX system; run it in a separate terminal instead.", fg="red")
+            raise typer.Exit(code=1)
+        if os.fork() > 0:
+            typer.secho(f"  ✓ ssh-agentd started on {path}", fg="green")
+            return
+        os.setsid()
+        if os.fork() > 0:
+            os._exit(0)
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (sys.stdin.fileno(), sys.stdout.fileno(), sys.stderr.fileno()):
+            os.dup2(devnull, fd)
+        daemon.log = lambda message: None
+        try:
+            daemon.serve_forever()
+        finally:
+            os._exit(0)
+
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        daemon.stop()
+    except RuntimeError as e:
+        typer.secho(f"  {e}", fg="red")
+        raise typer.Exit(code=1)
+
+
+__all__ = ["ssh_agentd"]
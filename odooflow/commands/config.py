@@ -12,6 +12,7 @@ def config(
     add_core_module: Optional[str] = typer.Option(None),
     sync_keys: Optional[str] = typer.Option(None),
     show: bool = typer.Option(False, "--show", help="Show current configuration"),
+    ssh_prefer_agent: Optional[bool] = None,
 ):
     """
     View or patch fields in ~/.odooflowrc. For first-time configuration use
@@ -36,7 +37,7 @@ def config(
 
     has_any = any(
         [env_file, manifest_file, access_token, add_core_module, sync_keys]
-    )
+    ) or ssh_prefer_agent is not None
     if not has_any:
         typer.secho(
             "No changes provided. Use --help to see options, "
@@ -86,6 +87,14 @@ def config(
         updated = True
         typer.secho(f"  ✓ Updated sync keys: {', '.join(new_keys)}", fg="cyan")
 
+    if ssh_prefer_agent is not None:
+        current_config["ssh_prefer_agent"] = ssh_prefer_agent
+        updated = True
+        typer.secho(
+            f"  ✓ ssh-agent keys {'preferred' if ssh_prefer_agent else 'not used'} for profile key files.",
+            fg="cyan",
+        )
+
     if updated:
         config_manager.save_config(current_config)
         typer.secho("💾 Configuration updated.", fg="green", bold=True)
@@ -6,22 +6,35 @@ UX goals:
   * Friendly, color-coded preflight (resolved profile, auth method,
     directory).
   * Live stdout streaming, stderr highlighted in red, exit codes
-    highlighted when non-zero.
-  * In-memory command history (arrow keys on a real TTY).
+    highlighted when non-zero. Output is printed chunk by chunk as it
+    arrives, so `cat` on a multi-GB log neither stalls nor fills memory.
+  * Per-profile command history kept across sessions: Up / Down recall
+    entries starting with what is typed, Ctrl-R searches them.
+  * Tab completes remote paths and commands from cached SFTP listings.
+  * `--persistent`: one remote shell for the whole session, so `cd`,
+    exported variables and activated virtualenvs carry over.
   * Detect session-closed / EOF / reset and offer to reconnect,
-    restoring scrollback.
+    replaying the last few screens of scrollback.
+  * A background heartbeat keeps idle NAT mappings open, shows the
+    round-trip time in the prompt, and reconnects as soon as the
+    transport dies rather than when the next command fails.
   * Plain Ctrl-C / Ctrl-D exit cleanly.
 """
 
 from __future__ import annotations
 
+import codecs
 import collections
 import os
+import select
+import shlex
+import shutil
+import signal
 import socket
 import sys
 import termios
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Optional, Set
 
 import paramiko
 import typer
@@ -31,6 +44,14 @@ from rich.text import Text
 
 from odooflow import errors
 from odooflow.utils import server_profile
+from odooflow.utils.completion import RemoteCompleter
+from odooflow.utils.connection import ConnectionManager
+from odooflow.utils.heartbeat import DEFAULT_INTERVAL as DEFAULT_KEEPALIVE, Heartbeat
+from odooflow.utils.history import CommandHistory, default_path as history_path
+from odooflow.utils.remote_shell import RemoteShell
+from odooflow.utils.scrollback import DEFAULT_MEMORY_LIMIT, Scrollback
+from odooflow.utils.ssh import open_ssh_client, quote_remote_path, stream_command
+from odooflow.utils.tuning import SSHTuning
 from odooflow.utils.env import read_env_file
 from odooflow.config_manager import load_config
 
@@ -123,40 +144,26 @@ def _preflight(profile_name: str, profile: dict) -> dict:
     }
 
 
-def _open_client(pre: dict, *, timeout: int = 10) -> paramiko.SSHClient:
+def _transport_keepalive(seconds: float) -> int:
+    """paramiko keepalives take whole seconds: round, but never turn a positive interval into 0 (off)."""
+    return max(1, round(seconds)) if seconds > 0 else 0
+
+
+def _open_client(
+    pre: dict, *, timeout: int = 10, tuning: Optional[SSHTuning] = None
+) -> paramiko.SSHClient:
     """Open and authenticate a paramiko.SSHClient. Caller closes."""
-    client = paramiko.SSHClient()
-    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    try:
-        if pre["key_path"]:
-            pkey = paramiko.RSAKey.from_private_key_file(
-                os.path.expanduser(pre["key_path"])
-            )
-            client.connect(
-                pre["host"],
-                port=pre["port"],
-                username=pre["user"],
-                pkey=pkey,
-                timeout=timeout,
-                auth_timeout=timeout,
-                allow_agent=False,
-                look_for_keys=False,
-            )
-        else:
-            client.connect(
-                pre["host"],
-                port=pre["port"],
-                username=pre["user"],
-                password=pre["password"],
-                timeout=timeout,
-                auth_timeout=timeout,
-                allow_agent=False,
-                look_for_keys=False,
-            )
-    except (paramiko.SSHException, socket.error, OSError):
-        client.close()
-        raise
-    return client
+    return open_ssh_client(
+        pre["user"],
+        pre["host"],
+        pre["port"],
+        key_path=pre["key_path"],
+        password=pre["password"],
+        timeout=timeout,
+        tuning=tuning,
+        # As before: a session uses the profile's own credentials only.
+        allow_agent=False,
+    )
 
 
 # --------------------------------------------------------------------------- #
@@ -164,13 +171,120 @@ def _open_client(pre: dict, *, timeout: int = 10) -> paramiko.SSHClient:
 # --------------------------------------------------------------------------- #
 
 
+# Per command and stream, only this much output is kept for scrollback
+# replay; everything is still printed live.
+SCROLLBACK_OUTPUT_LIMIT = 64 * 1024  # characters
+
+
+INPUT_CHUNK_SIZE = 4096  # bytes per terminal read; a paste arrives in one go
+COMPLETION_LIST_LIMIT = 100  # candidates shown when Tab is ambiguous
+
+
+class _LinkLost(Exception):
+    """The heartbeat declared the transport dead while waiting for input."""
+
+
+def _rtt_style(rtt_ms: float) -> str:
+    if rtt_ms < 100:
+        return "green"
+    return "yellow" if rtt_ms < 300 else "red"
+
+
+def _cursor_left(n: int) -> str:
+    return "\b" if n == 1 else f"\x1b[{n}D"
+
+
+def _cursor_right(n: int) -> str:
+    return f"\x1b[{n}C"
+
+
+class _LineRenderer:
+    """
+    Keep the input line on the terminal in sync with the editor's buffer
+    using the smallest edit: move to the first changed character, write
+    from there, erase any leftover tail and step back to the cursor.
+    Typing at the end of the line writes one character; no prompt redraw,
+    no markup parsing.
+    """
+
+    def __init__(self, stream) -> None:
+        self._stream = stream
+        self._shown = ""  # what the terminal currently displays after the prompt
+        self._pos = 0  # where the terminal cursor is within it
+
+    def update(self, buf: list[str], cursor: int) -> None:
+        text = "".join(buf)
+        if text == self._shown and cursor == self._pos:
+            return
+        out: list[str] = []
+        if text == self._shown:
+            if cursor < self._pos:
+                out.append(_cursor_left(self._pos - cursor))
+            else:
+                out.append(_cursor_right(cursor - self._pos))
+        else:
+            same = 0
+            limit = min(len(text), len(self._shown))
+            while same < limit and text[same] == self._shown[same]:
+                same += 1
+            if self._pos > same:
+                out.append(_cursor_left(self._pos - same))
+            elif self._pos < same:
+                out.append(text[self._pos:same])
+            out.append(text[same:])
+            if len(self._shown) > len(text):
+                out.append("\x1b[K")  # erase to end of line
+            if cursor < len(text):
+                out.append(_cursor_left(len(text) - cursor))
+        self._shown, self._pos = text, cursor
+        try:
+            self._stream.write("".join(out))
+            self._stream.flush()
+        except Exception:  # noqa: BLE001
+            pass
+
+
+class _TailBuffer:
+    """Keep the last `limit` characters of a stream of chunks."""
+
+    def __init__(self, limit: int = SCROLLBACK_OUTPUT_LIMIT) -> None:
+        self._limit = limit
+        self._chunks: collections.deque[str] = collections.deque()
+        self._size = 0
+        self.dropped = 0
+
+    def add(self, text: str) -> None:
+        self._chunks.append(text)
+        self._size += len(text)
+        while self._size - len(self._chunks[0]) >= self._limit:
+            head = self._chunks.popleft()
+            self._size -= len(head)
+            self.dropped += len(head)
+
+    def text(self) -> str:
+        joined = "".join(self._chunks)
+        dropped = self.dropped + max(0, len(joined) - self._limit)
+        if dropped:
+            return f"… {dropped} earlier characters not kept …\n{joined[-self._limit:]}"
+        return joined
+
+
 class InteractiveShell:
     """
     Read commands from stdin, run them over an open SSHClient.
 
     The session maintains:
-      * scrollback: list of (kind, text) entries, replayed on reconnect.
-      * history:   deque of past commands for arrow-key recall.
+      * scrollback: `Scrollback` of (kind, text) entries; the last
+                   `replay_screens` screens are replayed on reconnect.
+      * history:   `CommandHistory` of past commands (persisted when
+                   `history_file` is given) for arrow-key recall and Ctrl-R.
+
+    With `persistent=True` commands run in one `RemoteShell` (PTY) instead
+    of one `exec_command` channel each; `cd` is then a real remote `cd`.
+
+    With `keepalive` > 0 a `Heartbeat` pings the transport every
+    `keepalive` seconds; its RTT is shown in the prompt, and a dead link
+    triggers a reconnect even while the shell is waiting for input.
     """
 
     def __init__(
@@ -180,20 +294,38 @@ class InteractiveShell:
         console: Console,
         *,
         prompt_color: str = "cyan",
+        persistent: bool = False,
+        scrollback_limit: int = DEFAULT_MEMORY_LIMIT,
+        replay_screens: int = 2,
+        history_file: Optional[Path] = None,
+        keepalive: float = DEFAULT_KEEPALIVE,
     ) -> None:
         self._client_factory = client_factory
         self._pre = pre
         self._console = console
         self._prompt_color = prompt_color
-
-        self.scrollback: list[tuple[str, str]] = []  # ('cmd', text) or ('out', text)
-        self.history: collections.deque[str] = collections.deque(maxlen=200)
+        self._persistent = persistent
+        self._remote_shell: Optional[RemoteShell] = None
+        self._completer: Optional[RemoteCompleter] = None
+        self._missing_dir_checked: Set[str] = set()
+        self._keepalive = keepalive
+        self._heartbeat: Optional[Heartbeat] = None
+        self._link_lost: Optional[str] = None
+        self._wake_r: Optional[int] = None  # written by the heartbeat to interrupt input
+        self._wake_w: Optional[int] = None
+        self._draft = ""  # the unfinished line when the link dropped
+
+        self.scrollback = Scrollback(memory_limit=scrollback_limit)  # ('cmd', text), ('out', text), ...
+        self._replay_screens = replay_screens
+        self.history = CommandHistory(history_file)
 
         self._client: Optional[paramiko.SSHClient] = None
         self._is_tty: bool = bool(getattr(sys.stdin, "isatty", lambda: False)())
         self._old_term_attrs = None
         self._stdin_fd: Optional[int] = None
         self._stdin = sys.stdin
+        self._pending_input = ""
+        self._input_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
 
     # ---------- lifecycle ---------- #
 
@@ -205,6 +337,23 @@ class InteractiveShell:
                 f"[red]✗ Connection failed:[/red] {exc}"
             )
             return False
+        if self._persistent:
+            width, height = shutil.get_terminal_size()
+            shell = RemoteShell(self._client, self._pre["directory"], width=width, height=height)
+            try:
+                shell.open()
+            except (paramiko.SSHException, socket.error, EOFError, OSError) as exc:
+                self._console.print(f"[red]✗ Could not start a remote shell:[/red] {exc}")
+                return False
+            self._remote_shell = shell
+        self._completer = RemoteCompleter(self._client)
+        self._completer.prefetch(self._pre["directory"])
+        self._link_lost = None
+        transport = self._client.get_transport()
+        if self._keepalive > 0 and transport is not None:
+            self._heartbeat = Heartbeat(
+                transport, interval=self._keepalive, on_dead=self._on_link_dead
+            ).start()
         banner = (
             f"[green]✓ Connected to[/green] "
             f"[bold]{self._pre['user']}@{self._pre['host']}:{self._pre['port']}[/bold]"
@@ -213,12 +362,68 @@ class InteractiveShell:
         return True
 
     def _disconnect(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.stop()
+            self._heartbeat = None
+        if self._completer is not None:
+            try:
+                self._completer.close()
+            except Exception:  # noqa: BLE001
+                pass
+            self._completer = None
+        if self._remote_shell is not None:
+            try:
+                self._remote_shell.close()
+            finally:
+                self._remote_shell = None
         if self._client is not None:
             try:
                 self._client.close()
             finally:
                 self._client = None
 
+    def _on_link_dead(self, reason: str) -> None:
+        """Heartbeat thread: remember why, and wake a blocked `_fill_input`."""
+        self._link_lost = reason
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b"!")
+            except OSError:
+                pass
+
+    def _reconnect(self) -> bool:
+        """Open a new session and replay the last screens of scrollback."""
+        self._disconnect()
+        if not self._connect():
+            return False
+        if self._persistent:
+            self._console.print(
+                f"[dim]new remote shell in {self._pre['directory']}; "
+                "exported variables were reset.[/dim]"
+            )
+        lines = self._replay_screens * shutil.get_terminal_size().lines
+        self._console.print(
+            f"[dim]— replayed scrollback (last {self._replay_screens} screen(s)) —[/dim]"
+        )
+        for kind, text in self.scrollback.tail(lines):
+            if kind == "cmd":
+                self._console.print(
+                    f"[bold cyan]> {text}[/bold cyan]"
+                )
+            elif kind == "out":
+                self._console.print(
+                    text, end="", highlight=False, markup=False
+                )
+            elif kind == "err":
+                self._console.print(
+                    text, end="", style="red", highlight=False, markup=False
+                )
+            elif kind == "exit":
+                self._console.print(
+                    f"[yellow]↳ {text}[/yellow]"
+                )
+        return True
+
     # ---------- terminal setup ---------- #
 
     def _setup_tty(self) -> None:
@@ -289,60 +494,62 @@ class InteractiveShell:
         prompt.append(":", style="dim")
         prompt.append(str(self._pre["port"]), style="dim")
         prompt.append(" ", style="dim")
+        rtt = self._heartbeat.rtt_ms if self._heartbeat is not None else None
+        if rtt is not None:
+            prompt.append(f"{rtt:.0f}ms ", style=_rtt_style(rtt))
         prompt.append("$ ", style=self._prompt_color)
         self._console.print(prompt, end="")
 
     # ---------- input ---------- #
 
-    # ---------- line editor ---------- #
-
-    def _render(self, buf: list[str], cursor: int) -> None:
-        """Re-render the current line under the prompt. Always flush."""
-        self._draw_prompt()
-        if buf:
-            self._console.print("".join(buf), end="", highlight=False)
-        back = len(buf) - cursor
-        if back > 0:
-            self._console.print("\b" * back, end="", highlight=False)
-        # Without this flush, the prompt + typed chars may be buffered
-        # by Python's stdout until something else (e.g. the kernel
-        # re-echo or a later print) flushes them — which on slow PTYs
-        # looks like the shell isn't responding. Force the flush.
+    def _fill_input(self) -> bool:
+        """
+        Append everything the terminal has buffered to `_pending_input`.
+
+        With `VMIN=1, VTIME=0` set by `_setup_tty`, `os.read(fd, n)` blocks
+        until at least one byte arrives and then returns all that are
+        available (up to n), so a paste is picked up in one call instead
+        of one syscall per character. An incremental UTF-8 decoder keeps
+        multi-byte characters split across reads intact. Returns False on
+        EOF; raises `_LinkLost` when the heartbeat reports a dead link.
+        """
+        if self._wake_r is not None:
+            ready, _, _ = select.select([self._stdin_fd, self._wake_r], [], [])
+            if self._wake_r in ready:
+                os.read(self._wake_r, 64)
+                if self._link_lost:
+                    raise _LinkLost(self._link_lost)
+            if self._stdin_fd not in ready:
+                return True
         try:
-            self._console.file.flush()
-        except Exception:  # noqa: BLE001
-            pass
+            chunk = os.read(self._stdin_fd, INPUT_CHUNK_SIZE)
+        except (OSError, ValueError):
+            text = self._stdin.read(1) if hasattr(self._stdin, "read") else ""
+            if not text:
+                return False
+            self._pending_input += text
+            return True
+        if not chunk:
+            return False  # EOF on a real fd.
+        self._pending_input += self._input_decoder.decode(chunk)
+        return True
 
     def _read_byte(self) -> Optional[str]:
         """
-        Read one character from stdin. Returns None on EOF.
-
-        On a real terminal we read directly from the file descriptor with
-        `os.read(fd, 1)`. With `VMIN=1, VTIME=0` set by `_setup_tty`,
-        `os.read` blocks until at least one byte arrives, then returns
-        exactly one `bytes` object — no line buffering, no kernel echo.
+        Return the next input character as a 1-character `str`, or None
+        on EOF.
 
-        On a non-TTY (pipe, CliRunner), we use the high-level
-        `sys.stdin.read(1)` which returns a `str`.
-
-        The return value is always a 1-character `str` (decoded with
-        `errors="replace"` so a stray binary byte won't crash the
-        shell).
+        On a real terminal characters come from `_pending_input`, refilled
+        by `_fill_input`. On a non-TTY (pipe, CliRunner), we use the
+        high-level `sys.stdin.read(1)`.
         """
         if self._stdin_fd is not None:
-            try:
-                chunk = os.read(self._stdin_fd, 1)
-            except (OSError, ValueError):
-                chunk = self._stdin.read(1) if hasattr(self._stdin, "read") else ""
-                if not chunk:
+            while not self._pending_input:
+                if not self._fill_input():
                     return None
-                return chunk
-            if not chunk:
-                return None  # EOF on a real fd.
-            try:
-                return chunk.decode("utf-8", errors="replace")
-            except Exception:  # noqa: BLE001
-                return None
+            ch = self._pending_input[0]
+            self._pending_input = self._pending_input[1:]
+            return ch
         # Non-TTY fallback.
         try:
             ch = self._stdin.read(1)
@@ -352,25 +559,42 @@ class InteractiveShell:
             return None
         return ch
 
+    # ---------- line editor ---------- #
+
     def _read_line(self) -> Optional[str]:
         """
         Read a line of input, with arrow-key history, backspace, and
         Ctrl-A/E/C/D. Returns None on EOF / Ctrl-C / Ctrl-D on empty
         buffer.
+
+        The screen is only updated once the pending input has been
+        consumed, so a pasted command is drawn with a single write.
         """
-        buf: list[str] = []
-        cursor = 0
+        buf: list[str] = list(self._draft)
+        cursor = len(buf)
+        self._draft = ""
         history_index: Optional[int] = None  # None means 'on the live line'
+        typed = ""  # the live line when history browsing started (prefix filter)
 
-        self._render(buf, cursor)
+        self._draw_prompt()
+        screen = _LineRenderer(self._console.file)
+        screen.update(buf, cursor)
         while True:
-            ch = self._read_byte()
+            if not self._pending_input:
+                screen.update(buf, cursor)
+            try:
+                ch = self._read_byte()
+            except _LinkLost:
+                self._draft = "".join(buf)  # offered again after the reconnect
+                self._console.print()
+                raise
             if ch is None:
                 return None
             code = ord(ch)
 
             # Enter
             if ch in ("\r", "\n"):
+                screen.update(buf, cursor)
                 self._console.print()
                 return "".join(buf)
 
@@ -379,34 +603,36 @@ class InteractiveShell:
                 if cursor > 0:
                     del buf[cursor - 1]
                     cursor -= 1
-                    self._render(buf, cursor)
                 continue
 
             # Escape sequences (arrow keys, etc.)
             if code == 0x1B:
                 seq1 = self._read_byte() or ""
                 seq2 = self._read_byte() or ""
-                if seq1 == "[" and seq2 == "A":  # Up
-                    if not self.history:
-                        continue
+                if seq1 == "[" and seq2 == "A":  # Up: older entry starting with the typed prefix
                     if history_index is None:
-                        history_index = len(self.history) - 1
-                    elif history_index > 0:
-                        history_index -= 1
+                        typed = "".join(buf)
+                    found = self.history.previous(typed, before=history_index)
+                    if found is None:
+                        continue
+                    history_index = found
                     buf = list(self.history[history_index])
                     cursor = len(buf)
-                    self._render(buf, cursor)
-                elif seq1 == "[" and seq2 == "B":  # Down
+                elif seq1 == "[" and seq2 == "B":  # Down: newer entry, then back to the typed line
                     if history_index is None:
                         continue
-                    if history_index < len(self.history) - 1:
-                        history_index += 1
+                    found = self.history.next(typed, after=history_index)
+                    if found is not None:
+                        history_index = found
                         buf = list(self.history[history_index])
                     else:
                         history_index = None
-                        buf = []
+                        buf = list(typed)
                     cursor = len(buf)
-                    self._render(buf, cursor)
+                elif seq1 == "[" and seq2 == "C":  # Right
+                    cursor = min(len(buf), cursor + 1)
+                elif seq1 == "[" and seq2 == "D":  # Left
+                    cursor = max(0, cursor - 1)
                 # Ignore unknown escape sequences (F1-F12, etc.)
                 continue
 
@@ -415,6 +641,30 @@ class InteractiveShell:
                 self._console.print("^C")
                 return None
 
+            # Tab: complete the word before the cursor
+            if code == 0x09:
+                buf, cursor, listed = self._complete(buf, cursor)
+                if listed:
+                    self._draw_prompt()
+                    screen = _LineRenderer(self._console.file)
+                continue
+
+            # Ctrl-R: reverse incremental search
+            if code == 0x12:
+                action, text = self._reverse_search("".join(buf))
+                if action == "eof":
+                    return None
+                if action == "accept":
+                    self._console.print()
+                    return text
+                history_index = None
+                buf = list(text)
+                cursor = len(buf)
+                self._console.file.write("\r\x1b[K")
+                self._draw_prompt()
+                screen = _LineRenderer(self._console.file)
+                continue
+
             # Ctrl-D on empty line => exit
             if code == 0x04 and not buf:
                 return None
@@ -422,43 +672,199 @@ class InteractiveShell:
             # Ctrl-A / Ctrl-E
             if code == 0x01:
                 cursor = 0
-                self._render(buf, cursor)
                 continue
             if code == 0x05:
                 cursor = len(buf)
-                self._render(buf, cursor)
                 continue
 
             # Anything else: insert
             buf.insert(cursor, ch)
             cursor += 1
-            self._render(buf, cursor)
+
+    def _complete(self, buf: list[str], cursor: int) -> tuple[list[str], int, bool]:
+        """
+        Tab: insert the only candidate, or extend to the candidates' common
+        prefix, or list them under the line. Returns (buf, cursor, listed);
+        `listed` means the prompt has to be redrawn.
+        """
+        if self._completer is None:
+            return buf, cursor, False
+        line = "".join(buf)
+        try:
+            start, words = self._completer.complete(line, cursor, self._pre["directory"])
+        except Exception:  # noqa: BLE001 — completion must never break the editor
+            return buf, cursor, False
+        current = line[start:cursor]
+        if not words:
+            self._console.file.write("\a")
+            return buf, cursor, False
+        if len(words) == 1:
+            insert = words[0] if words[0].endswith("/") else words[0] + " "
+        else:
+            insert = os.path.commonprefix(words)
+            if len(insert) <= len(current):
+                shown = "  ".join(words[:COMPLETION_LIST_LIMIT])
+                if len(words) > COMPLETION_LIST_LIMIT:
+                    shown += f"  … {len(words) - COMPLETION_LIST_LIMIT} more"
+                self._console.file.write("\r\n" + shown + "\r\n")
+                return buf, cursor, True
+        new_line = line[:start] + insert + line[cursor:]
+        return list(new_line), start + len(insert), False
+
+    def _reverse_search(self, original: str) -> tuple[str, str]:
+        """
+        Ctrl-R mode. Returns (action, text): "accept" runs `text`, "edit"
+        puts it on the line for editing, "eof" ends the session. Ctrl-G /
+        Ctrl-C cancel back to `original` (as "edit").
+        """
+        query = ""
+        match: Optional[int] = None
+
+        def draw() -> None:
+            found = self.history[match] if match is not None else ""
+            label = "reverse-i-search" if match is not None or not query else "failing reverse-i-search"
+            self._console.file.write(f"\r\x1b[K({label})`{query}': {found}")
+            try:
+                self._console.file.flush()
+            except Exception:  # noqa: BLE001
+                pass
+
+        draw()
+        while True:
+            if not self._pending_input:
+                draw()
+            ch = self._read_byte()
+            if ch is None:
+                return "eof", ""
+            code = ord(ch)
+            current = self.history[match] if match is not None else original
+            if ch in ("\r", "\n"):
+                return "accept", current
+            if code in (0x03, 0x07):  # Ctrl-C / Ctrl-G
+                return "edit", original
+            if code == 0x12:  # Ctrl-R again: next older match
+                if query and match is not None:
+                    older = self.history.search(query, before=match)
+                    match = older if older is not None else match
+                continue
+            if code in (0x7F, 0x08):
+                query = query[:-1]
+                match = self.history.search(query) if query else None
+                continue
+            if code == 0x1B:
+                # Leave search with the match on the line; drop the rest of the sequence.
+                self._read_byte()
+                self._read_byte()
+                return "edit", current
+            if code < 0x20:
+                return "edit", current
+            query += ch
+            found = self.history.search(query, before=None if match is None else match + 1)
+            if found is not None:
+                match = found
 
     # ---------- execution ---------- #
 
+    def _in_directory(self, command: str) -> str:
+        """
+        `command` prefixed with a cd into the session directory (every exec
+        starts in $HOME). A directory that does not exist yet, e.g. before
+        the first push, falls back to $HOME; that is said once per directory.
+        """
+        directory = self._pre["directory"]
+        fallback = "cd"
+        if directory not in self._missing_dir_checked:
+            self._missing_dir_checked.add(directory)
+            notice = f"odooflow: {directory} does not exist; running in the home directory."
+            fallback = f"{{ echo {shlex.quote(notice)} >&2; cd; }}"
+        return f"cd {quote_remote_path(directory)} 2>/dev/null || {fallback}; {command}"
+
     def _exec(self, command: str) -> Optional[str]:
         """Run a command. Returns 'open' / 'closed' / None (fatal)."""
+        if self._remote_shell is not None:
+            return self._exec_persistent(command)
         assert self._client is not None
+        buffers = {"out": _TailBuffer(), "err": _TailBuffer()}
+        last = {"char": "\n"}
+
+        def sink(kind: str, style: Optional[str]) -> Callable[[str], None]:
+            def write(text: str) -> None:
+                buffers[kind].add(text)
+                last["char"] = text[-1]
+                self._console.print(text, style=style, end="", highlight=False, markup=False, soft_wrap=True)
+                try:
+                    self._console.file.flush()
+                except Exception:  # noqa: BLE001
+                    pass
+            return write
+
+        interrupted = False
+        try:
+            code = stream_command(
+                self._client, self._in_directory(command), sink("out", None), sink("err", "red")
+            )
+        except KeyboardInterrupt:
+            # stream_command already sent SIGINT to the remote process.
+            interrupted, code = True, None
+        except (paramiko.SSHException, socket.error, EOFError, OSError) as exc:
+            self._console.print(f"[red]✗ Session error:[/red] {exc}")
+            return "closed"
+
+        if last["char"] != "\n":
+            self._console.print()
+        for kind in ("out", "err"):
+            text = buffers[kind].text()
+            if text:
+                self.scrollback.append((kind, text))
+        if interrupted:
+            self._console.print("[yellow]↳ interrupted[/yellow]")
+            self.scrollback.append(("exit", "interrupted"))
+        elif code != 0:
+            self._console.print(f"[yellow]↳ exit {code}[/yellow]")
+            self.scrollback.append(("exit", f"exit {code}"))
+        return None
+
+    def _exec_persistent(self, command: str) -> Optional[str]:
+        """Run a command in the long-lived remote shell, printing output as it arrives."""
+        chunks: list[str] = []
+
+        def on_output(text: str) -> None:
+            chunks.append(text)
+            self._console.print(text, end="", highlight=False, markup=False)
+            try:
+                self._console.file.flush()
+            except Exception:  # noqa: BLE001
+                pass
+
+        previous_cwd = self._remote_shell.cwd
         try:
-            stdin, stdout, stderr = self._client.exec_command(command, timeout=30)
-            out = stdout.read().decode(errors="replace")
-            err = stderr.read().decode(errors="replace")
-            code = stdout.channel.recv_exit_status()
+            code = self._remote_shell.run(command, on_output)
         except (paramiko.SSHException, socket.error, EOFError, OSError) as exc:
             self._console.print(f"[red]✗ Session error:[/red] {exc}")
             return "closed"
 
+        out = "".join(chunks)
         if out:
-            self._console.print(out, highlight=False)
+            if not out.endswith("\n"):
+                self._console.print()
             self.scrollback.append(("out", out))
-        if err:
-            self._console.print(err, style="red", highlight=False)
-            self.scrollback.append(("err", err))
         if code != 0:
             self._console.print(f"[yellow]↳ exit {code}[/yellow]")
             self.scrollback.append(("exit", f"exit {code}"))
+        if self._remote_shell.cwd != previous_cwd:
+            # Remembered so a reconnect resumes in the same directory.
+            self._pre["directory"] = self._remote_shell.cwd
+            self._console.print(f"[dim]cwd:[/dim] {self._remote_shell.cwd}")
         return None
 
+    def _on_resize(self, signum, frame) -> None:
+        if self._remote_shell is not None:
+            width, height = shutil.get_terminal_size()
+            try:
+                self._remote_shell.resize(width, height)
+            except Exception:  # noqa: BLE001
+                pass
+
     # ---------- main loop ---------- #
 
     def run(self) -> int:
@@ -466,6 +872,11 @@ class InteractiveShell:
             return 1
 
         self._setup_tty()
+        if self._stdin_fd is not None:
+            self._wake_r, self._wake_w = os.pipe()
+        previous_winch = None
+        if self._persistent and self._is_tty and hasattr(signal, "SIGWINCH"):
+            previous_winch = signal.signal(signal.SIGWINCH, self._on_resize)
         try:
             cd_path = self._pre["directory"]
             self._console.print(
@@ -474,8 +885,13 @@ class InteractiveShell:
 
             while True:
                 # Read a command.
-                self._render([], 0)
-                line = self._read_line()
+                try:
+                    line = self._read_line()
+                except _LinkLost as lost:
+                    self._console.print(f"[yellow]⚠ Connection lost ({lost}); reconnecting…[/yellow]")
+                    if not self._reconnect():
+                        return 1
+                    continue
 
                 if line is None:
                     self._console.print(
@@ -499,46 +915,54 @@ class InteractiveShell:
                         )
                     )
                     continue
-                if stripped.startswith("cd "):
+                if stripped.startswith("cd ") and not self._persistent:
                     new_path = stripped[3:].strip()
                     if new_path:
+                        if self._completer is not None:
+                            try:
+                                new_path = self._completer.resolve(new_path, self._pre["directory"])
+                            except (paramiko.SSHException, socket.error, EOFError, OSError):
+                                pass
                         cd_path = new_path
                         self._pre["directory"] = new_path
+                        if self._completer is not None:
+                            self._completer.prefetch(new_path)
                     self._console.print(f"[dim]cwd:[/dim] {cd_path}")
                     continue
 
+                if self._link_lost:
+                    # Found dead by the heartbeat: reconnect before running anything.
+                    self._console.print(
+                        f"[yellow]⚠ Connection lost ({self._link_lost}); reconnecting…[/yellow]"
+                    )
+                    if not self._reconnect():
+                        return 1
+
                 self.history.append(stripped)
                 self.scrollback.append(("cmd", stripped))
+                directory = self._pre["directory"]
                 result = self._exec(stripped)
+                if self._completer is not None:
+                    # The command may have changed files; re-list before the next Tab.
+                    self._completer.invalidate(directory)
+                    self._completer.prefetch(self._pre["directory"])
                 if result == "closed":
                     if typer.confirm(
                         "The SSH session dropped. Reconnect?", default=True
                     ):
-                        self._disconnect()
-                        # Replay scrollback after reconnect for context.
-                        if not self._connect():
+                        if not self._reconnect():
                             return 1
-                        self._console.print("[dim]— replayed scrollback —[/dim]")
-                        for kind, text in self.scrollback:
-                            if kind == "cmd":
-                                self._console.print(
-                                    f"[bold cyan]> {text}[/bold cyan]"
-                                )
-                            elif kind == "out":
-                                self._console.print(text, highlight=False)
-                            elif kind == "err":
-                                self._console.print(
-                                    text, style="red", highlight=False
-                                )
-                            elif kind == "exit":
-                                self._console.print(
-                                    f"[yellow]↳ {text}[/yellow]"
-                                )
                         continue
                     return 0
         finally:
+            if previous_winch is not None:
+                signal.signal(signal.SIGWINCH, previous_winch)
             self._restore_tty()
             self._disconnect()
+            for fd in (self._wake_r, self._wake_w):
+                if fd is not None:
+                    os.close(fd)
+            self._wake_r = self._wake_w = None
 
 
 # --------------------------------------------------------------------------- #
@@ -563,6 +987,26 @@ def connect(
         "--raw-input",
         help="Skip raw TTY mode; use plain line input (use for tests/CI).",
     ),
+    persistent: bool = typer.Option(
+        False,
+        "--persistent",
+        help="Run every command in one remote shell, so cd, exported variables and virtualenvs persist.",
+    ),
+    scrollback_mb: int = typer.Option(
+        8, "--scrollback-mb", min=1, help="Scrollback kept in memory (MB); older output is compressed to a temp file."
+    ),
+    replay_screens: int = typer.Option(
+        2, "--replay-screens", min=0, help="Screens of scrollback replayed after a reconnect."
+    ),
+    save_history: bool = typer.Option(
+        True, "--history/--no-history", help="Keep this profile's command history in ~/.cache/odooflow/history."
+    ),
+    keepalive: float = typer.Option(
+        DEFAULT_KEEPALIVE,
+        "--keepalive",
+        min=0.0,
+        help="Seconds between keepalive pings (RTT in the prompt, reconnect on a dead link); 0 disables.",
+    ),
 ):
     """Open an interactive SSH session against a server profile."""
     profile_name, profile = _resolve_profile(name)
@@ -571,21 +1015,39 @@ def connect(
         pre["directory"] = cd
 
     console = Console()
+    connections = ConnectionManager(keepalive=_transport_keepalive(keepalive), allow_agent=False)
+    tuning = SSHTuning.from_profile(profile)
 
     def factory() -> paramiko.SSHClient:
-        return _open_client(pre)
+        # Keepalive on; a dropped transport is replaced on reconnect.
+        return connections.client(
+            pre["user"], pre["host"], pre["port"],
+            key_path=pre["key_path"], password=pre["password"], tuning=tuning,
+        )
 
     shell = InteractiveShell(
         client_factory=factory,
         pre=pre,
         console=console,
+        persistent=persistent,
+        scrollback_limit=scrollback_mb * 1024 * 1024,
+        replay_screens=replay_screens,
+        history_file=(
+            history_path(profile_name, pre["user"], pre["host"], pre["port"]) if save_history else None
+        ),
+        keepalive=keepalive,
     )
     if raw_input:
         # Force non-interactive mode even when stdin is a TTY (useful
         # for `odooflow server connect < input.txt` style invocations).
         shell._is_tty = False
         shell._stdin_fd = None
-    raise typer.Exit(code=shell.run())
+    try:
+        code = shell.run()
+    finally:
+        shell.scrollback.close()
+        connections.close_all()
+    raise typer.Exit(code=code)
 
 
 __all__ = ["connect"]
\ No newline at end of file
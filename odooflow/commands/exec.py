@@ -0,0 +1,144 @@
+"""
+`odooflow server exec` — run one command on many server profiles at once.
+
+    odooflow server exec --servers web1,web2 --tag prod -- "systemctl restart odoo"
+
+Hosts are reached through the shared `ConnectionManager` (and ssh-agentd
+when it runs), at most `--workers` at a time. Output is streamed line by
+line with a profile-name prefix; a table of exit codes and durations
+follows once every host is done.
+"""
+
+from __future__ import annotations
+
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import typer
+
+from odooflow.commands.server import _host_prefixes, _load_env, _print_table, _select_targets
+from odooflow.utils.connection import ConnectionManager
+from odooflow.utils.ssh import CommandTimeout, LineBuffer, stream_command
+
+
+# Public entry-point: cli.py registers `exec_cmd` as `server exec`.
+
+
+class HostResult:
+    """Outcome of the command on one profile."""
+
+    def __init__(self, name: str, target: str) -> None:
+        self.name = name
+        self.target = target
+        self.exit_status: Optional[int] = None
+        self.error: Optional[str] = None
+        self.duration = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.exit_status == 0
+
+
+def _run_on_host(
+    connections: ConnectionManager,
+    name: str,
+    profile: dict,
+    command: str,
+    timeout: Optional[float],
+    emit,
+) -> HostResult:
+    result = HostResult(
+        name, f"{profile.get('user', '')}@{profile.get('host', '')}:{int(profile.get('port', 22))}"
+    )
+    out = LineBuffer(lambda line: emit(name, line, False))
+    err = LineBuffer(lambda line: emit(name, line, True))
+    started = time.monotonic()
+    try:
+        client = connections.client_for_profile(profile)
+        result.exit_status = stream_command(client, command, out.feed, err.feed, timeout=timeout)
+    except CommandTimeout:
+        result.error = f"timed out after {timeout:g}s"
+    except Exception as exc:  # noqa: BLE001 — one host failing must not stop the others
+        result.error = str(exc) or type(exc).__name__
+    finally:
+        out.flush()
+        err.flush()
+        result.duration = time.monotonic() - started
+    return result
+
+
+def exec_cmd(
+    command: List[str] = typer.Argument(..., help='Command to run, after `--`, e.g. -- "df -h".'),
+    servers: Optional[str] = typer.Option(
+        None, "--servers", "-s", help="Comma-separated profile names."
+    ),
+    tags: Optional[List[str]] = typer.Option(
+        None, "--tag", help="Also run on the profiles carrying this tag (repeatable; all must match)."
+    ),
+    all_profiles: bool = typer.Option(False, "--all", help="Run on every configured profile."),
+    workers: int = typer.Option(8, "--workers", "-w", min=1, help="Max hosts running the command at once."),
+    timeout: Optional[float] = typer.Option(
+        None, "--timeout", help="Stop the command on a host after this many seconds."
+    ),
+):
+    """Run a command on several server profiles concurrently."""
+    env, _ = _load_env()
+    names = [n.strip() for n in (servers or "").split(",") if n.strip()]
+    profiles = _select_targets(env, names, all_profiles, tags)
+    # One argument is a shell command line as typed; several are words to quote.
+    line = command[0] if len(command) == 1 else shlex.join(command)
+
+    prefixes = _host_prefixes(list(profiles))
+    print_lock = threading.Lock()
+
+    def emit(name: str, text: str, is_stderr: bool) -> None:
+        with print_lock:
+            if is_stderr:
+                typer.echo(prefixes[name] + typer.style(text, fg="red"), err=True)
+            else:
+                typer.echo(prefixes[name] + text)
+
+    pool_size = max(1, min(workers, len(profiles)))
+    typer.secho(f"  Running on {len(profiles)} profile(s), {pool_size} at a time: {line}\n", fg="cyan", err=True)
+
+    connections = ConnectionManager()
+    pool = ThreadPoolExecutor(max_workers=pool_size)
+    results: Dict[str, HostResult] = {}
+    try:
+        futures = {
+            name: pool.submit(_run_on_host, connections, name, profile, line, timeout, emit)
+            for name, profile in profiles.items()
+        }
+        for name, future in futures.items():
+            results[name] = future.result()
+    except KeyboardInterrupt:
+        # Closing the transports ends every remote channel still running.
+        typer.secho("\n  Interrupted; closing connections.", fg="yellow", err=True)
+        pool.shutdown(wait=False, cancel_futures=True)
+        connections.close_all()
+        raise typer.Exit(code=130)
+    pool.shutdown()
+    connections.close_all()
+
+    rows = []
+    for result in results.values():
+        if result.error is not None:
+            exit_cell, status = "-", result.error
+        else:
+            exit_cell, status = str(result.exit_status), "ok" if result.ok else "failed"
+        rows.append([result.name, result.target, exit_cell, f"{result.duration:.2f}s", status])
+    typer.echo("")
+    _print_table(rows, ["NAME", "TARGET", "EXIT", "DURATION", "STATUS"])
+
+    failed = [r for r in results.values() if not r.ok]
+    typer.echo("")
+    if failed:
+        typer.secho(f"  ✗ {len(failed)} of {len(results)} profile(s) failed.\n", fg="red", bold=True)
+        raise typer.Exit(code=1)
+    typer.secho(f"  ✓ Succeeded on all {len(results)} profile(s).\n", fg="green", bold=True)
+
+
+__all__ = ["exec_cmd", "HostResult"]
@@ -0,0 +1,117 @@
+"""
+`odooflow server logs` — follow the Odoo log of one or more server profiles.
+
+Runs `tail -F` on each profile's `log_path` (or `--path`), optionally
+piped through a server-side `grep`, and streams the lines as they are
+written. With several profiles the output is merged in timestamp order
+and every line is prefixed with its profile name.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+import typer
+
+from odooflow.commands.server import _host_prefixes, _load_env, _select_targets
+from odooflow.utils import logtail
+from odooflow.utils.connection import ConnectionManager
+
+
+# Public entry-point: cli.py registers `logs` on the `server` sub-app.
+
+
+def logs(
+    names: Optional[List[str]] = typer.Argument(
+        None, help="Profiles to follow (defaults to the current default)."
+    ),
+    all_profiles: bool = typer.Option(False, "--all", help="Follow every configured profile."),
+    tags: Optional[List[str]] = typer.Option(
+        None, "--tag", help="Follow the profiles carrying this tag (repeatable; all must match)."
+    ),
+    grep: Optional[str] = typer.Option(
+        None, "--grep", "-g", help="Only show lines matching this extended regex (filtered on the server)."
+    ),
+    ignore_case: bool = typer.Option(False, "--ignore-case", "-i", help="Case-insensitive --grep."),
+    lines: int = typer.Option(
+        20, "--lines", "-n", min=0, help="Lines of existing log to show first (before --grep)."
+    ),
+    path: Optional[str] = typer.Option(
+        None, "--path", help=f"Log file to follow (default: the profile's log_path, else {logtail.DEFAULT_LOG_PATH})."
+    ),
+    merge_window: float = typer.Option(
+        logtail.DEFAULT_MERGE_WINDOW,
+        "--merge-window",
+        min=0.0,
+        help="Seconds each line is held so lines from slower hosts can be ordered before it.",
+    ),
+):
+    """Follow the Odoo log of one or more server profiles (Ctrl-C to stop)."""
+    env, _ = _load_env()
+    profiles = _select_targets(env, names, all_profiles, tags)
+
+    prefixed = len(profiles) > 1
+    prefixes = _host_prefixes(list(profiles)) if prefixed else {n: "" for n in profiles}
+
+    def emit(profile_name: str, line: str, is_stderr: bool) -> None:
+        prefix = prefixes[profile_name]
+        if is_stderr:
+            typer.echo(prefix + typer.style(line, fg="red"), err=True)
+        else:
+            typer.echo(prefix + line)
+
+    # A single host needs no reordering.
+    merger = logtail.LogMerger(emit, window=merge_window if prefixed else 0.0)
+    connections = ConnectionManager()
+    stop = threading.Event()
+    failures: Dict[str, str] = {}
+
+    def worker(profile_name: str, profile: dict) -> None:
+        log_path = path or profile.get("log_path") or logtail.DEFAULT_LOG_PATH
+        command = logtail.tail_command(log_path, lines, grep, ignore_case)
+        try:
+            client = connections.client_for_profile(profile)
+            status = logtail.follow(
+                client,
+                command,
+                lambda line: merger.add(profile_name, line),
+                lambda line: merger.add(profile_name, line, is_stderr=True),
+                stop,
+            )
+        except Exception as exc:  # noqa: BLE001 — reported per host, others keep going
+            failures[profile_name] = str(exc) or type(exc).__name__
+            return
+        # grep exits 1 when nothing matched; only a real error counts.
+        if status is not None and status > (1 if grep else 0):
+            failures[profile_name] = f"{log_path}: exit status {status}"
+
+    if len(profiles) > 1:
+        typer.secho(f"  Following {len(profiles)} profile(s): {', '.join(profiles)}", fg="cyan", err=True)
+    threads = [
+        threading.Thread(target=worker, args=(n, p), name=f"odooflow-logs-{n}", daemon=True)
+        for n, p in profiles.items()
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(0.1)
+            merger.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        merger.flush(force=True)
+        connections.close_all()
+
+    for profile_name, message in failures.items():
+        typer.secho(f"  ✗ {profile_name}: {message}", fg="red", err=True)
+    if failures:
+        raise typer.Exit(code=1)
+
+
+__all__ = ["logs"]
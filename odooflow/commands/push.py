@@ -1,12 +1,30 @@
+import json
+import threading
+import time
 import typer
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from git import Repo, GitCommandError
 import getpass
 
 from odooflow import config_manager
+from odooflow.utils import server_profile as _sp
 from odooflow.utils.env import read_env_file
-from odooflow.utils.ssh import upload_directory_via_ssh
+from odooflow.utils.connection import ConnectionManager
+from odooflow.utils.metrics import PushMetrics
+from odooflow.utils import gitpull, impact
+from odooflow.utils import watch as _watch
+from odooflow.utils.transfer import TransferSettings
+from odooflow.utils.tuning import SSHTuning
+from odooflow.utils.ssh import (
+    DEFAULT_KEEP_RELEASES,
+    ArchiveCache,
+    _run_post_exec,
+    rollback_release,
+    upload_directory_via_ssh,
+)
 
 
 EXCLUDED_DIRS = {".git", "__pycache__", ".venv", "node_modules", ".mypy_cache", ".pytest_cache", ".env", ".odooflowrc", ".odooflow.env.json"}
@@ -32,11 +50,116 @@ def get_gitignore_exclusions(base_path: Path):
     return exclusions
 
 
+def _parse_server_names(server_name: Optional[str]) -> List[str]:
+    """Split `--server a,b,c` into ['a', 'b', 'c'] (empty list when unset)."""
+    if not server_name:
+        return []
+    return [n.strip() for n in server_name.split(",") if n.strip()]
+
+
+def _record_deploy(env_path: Path, env: dict, profile_name: Optional[str], marker: Optional[dict]) -> dict:
+    """Write `last_used` / `last_deployed_sha` back into the profile (best-effort)."""
+    metadata = {"last_used": datetime.now().isoformat(timespec="seconds")}
+    if marker:
+        metadata["last_deployed_sha"] = marker["sha"]
+    try:
+        return _sp.record_metadata(env_path, env, profile_name, **metadata)
+    except OSError:
+        return env
+
+
+def _write_metrics_json(path: Path, git_push_seconds: Optional[float], servers: List[dict]) -> None:
+    """Dump per-server phase timings and counters for `--metrics-json`."""
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_push_seconds": round(git_push_seconds, 4) if git_push_seconds is not None else None,
+        "servers": servers,
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n")
+    typer.secho(f"📊 Push metrics written to {path}", fg="cyan")
+
+
+def _metrics_entry(metrics: PushMetrics, ok: bool, error: Optional[str] = None) -> dict:
+    metrics.finish()
+    entry = {"ok": ok, **metrics.to_dict()}
+    if error:
+        entry["error"] = error
+    return entry
+
+
+def _deploy_to_server(
+    cwd: Path,
+    server: dict,
+    key_path: Optional[str],
+    password: Optional[str],
+    excluded_dirs: set,
+    post_exec_cmd: Optional[str],
+    on_post_exec,
+    full: bool = False,
+    rollback: bool = False,
+    archive_cache: Optional[ArchiveCache] = None,
+    log=print,
+    metrics: Optional[PushMetrics] = None,
+    show_progress: bool = True,
+    exec_timeout: Optional[float] = None,
+    connections: Optional[ConnectionManager] = None,
+) -> Optional[dict]:
+    """Upload to (or roll back) one server profile. Returns the deploy marker, if any."""
+    connection = dict(
+        remote_user=server["user"],
+        remote_host=server["host"],
+        remote_path=server["directory"],
+        port=int(server.get("port", 22)),
+        key_path=key_path,
+        password=password,
+        post_exec_cmd=post_exec_cmd,
+        on_post_exec=on_post_exec if post_exec_cmd else None,
+        log=log,
+        post_exec_timeout=exec_timeout or server.get("post_push_timeout"),
+        connections=connections,
+        tuning=SSHTuning.from_profile(server),
+    )
+    if rollback:
+        if post_exec_cmd:
+            # Nothing is known about what differs between releases: every module.
+            connection["post_exec_cmd"] = impact.expand_command(post_exec_cmd, cwd, None, excluded_dirs)
+        rollback_release(module_name=cwd.resolve().name, **connection)
+        return None
+    git_source = None
+    if server.get(gitpull.STRATEGY_KEY) == "git":
+        try:
+            git_source = gitpull.GitSource.for_checkout(cwd, server.get(gitpull.GIT_URL_KEY), excluded_dirs)
+        except gitpull.PullUnavailable as e:
+            log(f"ℹ️  Git deploy not possible ({e}); uploading an archive instead.")
+    return upload_directory_via_ssh(
+        local_path=cwd,
+        exclude_dirs=excluded_dirs,
+        incremental=not full,
+        archive_cache=archive_cache,
+        release_mode=bool(server.get("release_mode")),
+        keep_releases=int(server.get("keep_releases", DEFAULT_KEEP_RELEASES)),
+        transfer_settings=TransferSettings.from_profile(server),
+        metrics=metrics,
+        show_progress=show_progress,
+        git_source=git_source,
+        **connection,
+    )
+
 
 def push_command(
     server_name: Optional[str] = None,
     remote_only: bool = False,
     exec_cmd: Optional[str] = None,
+    full: bool = False,
+    all_servers: bool = False,
+    workers: int = 4,
+    rollback: bool = False,
+    metrics_json: Optional[Path] = None,
+    watch: bool = False,
+    debounce_ms: int = int(_watch.DEFAULT_DEBOUNCE * 1000),
+    exec_timeout: Optional[float] = None,
 ):
     cwd = Path.cwd()
 
@@ -57,8 +180,16 @@ def push_command(
         typer.secho(f"❌ No remote config found for module: {module_name}", fg="red")
         raise typer.Exit(1)
 
+    requested = _parse_server_names(server_name)
+    if watch and (rollback or all_servers or len(requested) > 1):
+        typer.secho("❌ --watch syncs to a single server and cannot be combined with --all, several --server names or --rollback.", fg="red")
+        raise typer.Exit(1)
+
     # Git Push (if not remote only)
-    if not remote_only:
+    git_push_seconds = None
+    if rollback:
+        typer.secho("⏪ Rollback requested: skipping Git push and upload.", fg="yellow")
+    elif not remote_only:
         repo_config = remote_config.get("repo", {})
         if not repo_config:
             typer.secho(f"❌ No repo config provided", fg="red")
@@ -75,9 +206,11 @@ def push_command(
             branch_to_push = branch or active_branch
 
             typer.secho(f"🚀 Pushing branch '{branch_to_push}' to remote...", fg="cyan")
+            started = time.monotonic()
             origin = repo.remote(name="origin")
             origin.push(refspec=f"{branch_to_push}:{branch_to_push}")
-            typer.secho("✅ Git push successful.", fg="green")
+            git_push_seconds = time.monotonic() - started
+            typer.secho(f"✅ Git push successful ({git_push_seconds:.2f}s).", fg="green")
         except GitCommandError as e:
             typer.secho(f"❌ Git error: {e}", fg="red")
             raise typer.Exit(1)
@@ -87,63 +220,320 @@ def push_command(
     else:
         typer.secho("📦 Skipping Git push (remote only mode).", fg="yellow")
 
-    # Resolve the active server profile (named or legacy single).
-    from odooflow.utils import server_profile as _sp
-    active_name, server = _sp.select_profile(env, requested_name=server_name)
-    if active_name:
-        typer.secho(f"📡 Using server profile '{active_name}'.", fg="cyan")
+    # One SSH connection per host for everything below (upload, post-exec, watch).
+    connections = ConnectionManager()
+    try:
+        # Resolve the target server profile(s) (named or legacy single).
+        if all_servers or len(requested) > 1:
+            _fan_out_push(
+                cwd=cwd,
+                env_path=env_path,
+                env=env,
+                excluded_dirs=excluded_dirs,
+                names=requested,
+                all_servers=all_servers,
+                exec_cmd=exec_cmd,
+                full=full,
+                workers=workers,
+                rollback=rollback,
+                exec_timeout=exec_timeout,
+                metrics_json=metrics_json,
+                git_push_seconds=git_push_seconds,
+                connections=connections,
+            )
+            return
 
-    if not server:
-        typer.secho("⚠️  No server config found for this module. Skipping upload.", fg="yellow")
-        raise typer.Exit(0)
+        active_name, server = _sp.select_profile(env, requested_name=requested[0] if requested else None)
+        if active_name:
+            typer.secho(f"📡 Using server profile '{active_name}'.", fg="cyan")
 
-    required_keys = ["host", "user", "directory"]
-    if not all(k in server for k in required_keys):
-        typer.secho(
-            f"❌ Incomplete server config. Required keys: {', '.join(required_keys)}",
-            fg="red",
-        )
-        typer.secho(
-            "  Tip: run `odooflow server show"
-            + (f' {active_name}' if active_name else '')
-            + "` or `odooflow server add <name>` to fix it.",
-            fg="cyan",
-        )
-        raise typer.Exit(1)
+        if not server:
+            typer.secho("⚠️  No server config found for this module. Skipping upload.", fg="yellow")
+            raise typer.Exit(0)
 
-    key_path = server.get("key") or server.get("key_path")
-    password = server.get("password")
-    if not key_path and not password:
-        password = getpass.getpass("🔑 Enter SSH password: ")
+        required_keys = ["host", "user", "directory"]
+        if not all(k in server for k in required_keys):
+            typer.secho(
+                f"❌ Incomplete server config. Required keys: {', '.join(required_keys)}",
+                fg="red",
+            )
+            typer.secho(
+                "  Tip: run `odooflow server show"
+                + (f' {active_name}' if active_name else '')
+                + "` or `odooflow server add <name>` to fix it.",
+                fg="cyan",
+            )
+            raise typer.Exit(1)
+
+        key_path = server.get("key") or server.get("key_path")
+        password = server.get("password")
+        if not key_path and not password:
+            password = getpass.getpass("🔑 Enter SSH password: ")
+
+        final_exec_cmd = exec_cmd or server.get("post_push_cmd")
+
+        def _report_post_exec(stdout_text: str, stderr_text: str, exit_status: int):
+            # The output has already been streamed; only the verdict is left.
+            if exit_status != 0:
+                typer.secho(
+                    f"❌ Post-upload command failed (exit {exit_status}): {stderr_text.strip() or '(no stderr)'}",
+                    fg="red",
+                    bold=True,
+                )
+                raise typer.Exit(1)
 
-    final_exec_cmd = exec_cmd or server.get("post_push_cmd")
+        if rollback:
+            try:
+                _deploy_to_server(
+                    cwd, server, key_path, password, excluded_dirs,
+                    final_exec_cmd, _report_post_exec, rollback=True, exec_timeout=exec_timeout,
+                    connections=connections,
+                )
+                typer.secho("✅ Rolled back to the previous release.", fg="green")
+            except typer.Exit:
+                raise
+            except Exception as e:
+                typer.secho(f"❌ Rollback failed: {e}", fg="red")
+                raise typer.Exit(1)
+            return
+
+        metrics = PushMetrics(server=active_name or server["host"])
+        error = None
+        try:
+            typer.secho("📤 Uploading project to the test server...", fg="cyan")
+            marker = _deploy_to_server(
+                cwd, server, key_path, password, excluded_dirs,
+                final_exec_cmd, _report_post_exec, full=full, metrics=metrics,
+                exec_timeout=exec_timeout, connections=connections,
+            )
+            typer.secho("✅ Project uploaded successfully.", fg="green")
+        except typer.Exit:
+            error = "post-upload command failed"
+            raise
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            typer.secho(f"❌ Upload failed: {e}", fg="red")
+            raise typer.Exit(1)
+        finally:
+            if metrics_json:
+                _write_metrics_json(
+                    metrics_json, git_push_seconds, [_metrics_entry(metrics, error is None, error)]
+                )
+
+        _record_deploy(env_path, env, active_name, marker)
+
+        if watch:
+            _watch_and_sync(
+                cwd, server, password, excluded_dirs,
+                final_exec_cmd, connections, debounce=debounce_ms / 1000,
+                exec_timeout=exec_timeout or server.get("post_push_timeout"),
+            )
+    finally:
+        connections.close_all()
+
+
+def _watch_and_sync(
+    cwd: Path,
+    server: dict,
+    password: Optional[str],
+    excluded_dirs: set,
+    post_exec_cmd: Optional[str],
+    connections: ConnectionManager,
+    debounce: float = _watch.DEFAULT_DEBOUNCE,
+    exec_timeout: Optional[float] = None,
+) -> None:
+    """
+    Keep one SSH connection open and ship every batch of saved files until
+    Ctrl-C. The initial push has already brought the remote up to date, over
+    the same connection.
+    """
+    def connect():
+        return connections.client_for_profile(server, password=password)
 
     def _report_post_exec(stdout_text: str, stderr_text: str, exit_status: int):
-        if stdout_text:
-            typer.secho(stdout_text, fg="cyan")
+        # Never stop watching because a reload command failed.
         if exit_status != 0:
             typer.secho(
-                f"❌ Post-upload command failed (exit {exit_status}): {stderr_text.strip() or '(no stderr)'}",
-                fg="red",
-                bold=True,
+                f"⚠️  Post-upload command failed (exit {exit_status}): {stderr_text.strip() or '(no stderr)'}",
+                fg="yellow",
             )
-            raise typer.Exit(1)
 
+    watcher = _watch.make_watcher(cwd, excluded_dirs, log=typer.echo)
+    session = _watch.WatchSession(
+        cwd, server["directory"], connect, excluded_dirs,
+        transfer_settings=TransferSettings.from_profile(server),
+        log=typer.echo,
+        # The manager owns the client: a dead one must leave its cache, not just be closed.
+        release=lambda client: connections.close(server["user"], server["host"], int(server.get("port", 22))),
+    )
+    typer.secho(
+        f"👀 Watching {cwd} ({watcher.__class__.__name__}); syncing to "
+        f"{server['user']}@{server['host']}. Press Ctrl-C to stop.",
+        fg="cyan",
+    )
     try:
-        typer.secho("📤 Uploading project to the test server...", fg="cyan")
-        upload_directory_via_ssh(
-            local_path=cwd,
-            remote_user=server["user"],
-            remote_host=server["host"],
-            remote_path=server["directory"],
-            port=int(server.get("port", 22)),
-            key_path=key_path,
-            password=password,
-            exclude_dirs=excluded_dirs,
-            post_exec_cmd=final_exec_cmd,
-            on_post_exec=_report_post_exec if final_exec_cmd else None,
+        with session:
+            while True:
+                batch = _watch.debounced(watcher, debounce)
+                started = time.monotonic()
+                try:
+                    changes = session.sync(batch)
+                except Exception as e:  # noqa: BLE001 - keep watching
+                    typer.secho(f"❌ Sync failed: {e}", fg="red")
+                    continue
+                if not changes:
+                    continue
+                touched = sorted(changes.upload | changes.delete)
+                typer.secho(
+                    f"🔁 Synced {len(changes.upload)} changed, {len(changes.delete)} removed "
+                    f"in {time.monotonic() - started:.2f}s"
+                    + (f": {', '.join(touched)}" if len(touched) <= 5 else ""),
+                    fg="green",
+                )
+                command = post_exec_cmd and impact.expand_command(
+                    post_exec_cmd, cwd, changes.upload | changes.delete, excluded_dirs
+                )
+                if command:
+                    try:
+                        _run_post_exec(
+                            session.ssh, command, _report_post_exec, typer.echo, timeout=exec_timeout
+                        )
+                    except Exception as e:  # noqa: BLE001 - keep watching
+                        typer.secho(f"⚠️  Post-upload command error: {e}", fg="yellow")
+    except KeyboardInterrupt:
+        typer.secho("\n👋 Stopped watching.", fg="cyan")
+    finally:
+        watcher.close()
+
+
+def _fan_out_push(
+    cwd: Path,
+    env_path: Path,
+    env: dict,
+    excluded_dirs: set,
+    names: List[str],
+    all_servers: bool,
+    exec_cmd: Optional[str],
+    full: bool,
+    workers: int,
+    rollback: bool = False,
+    exec_timeout: Optional[float] = None,
+    metrics_json: Optional[Path] = None,
+    git_push_seconds: Optional[float] = None,
+    connections: Optional[ConnectionManager] = None,
+) -> None:
+    """
+    Upload to several server profiles concurrently.
+
+    Archives are built once per distinct change set and shared between the
+    uploads. A failing server never aborts the others; every result is
+    reported at the end and the command exits 1 if any server failed.
+    """
+    servers = _sp.load_servers(env)
+    if all_servers:
+        names = list(servers)
+    if not names:
+        typer.secho("❌ No server profiles configured. Run `odooflow server add <name>`.", fg="red")
+        raise typer.Exit(1)
+
+    # name -> (ok, detail, seconds)
+    results = {}
+    jobs = {}
+    for name in names:
+        server = servers.get(name)
+        if server is None:
+            results[name] = (False, "no such server profile", 0.0)
+            continue
+        missing = [k for k in _sp.REQUIRED_KEYS if k not in server]
+        if missing:
+            results[name] = (False, f"incomplete profile (missing {', '.join(missing)})", 0.0)
+            continue
+        key_path = server.get("key") or server.get("key_path")
+        password = server.get("password")
+        if not key_path and not password:
+            password = getpass.getpass(f"🔑 Enter SSH password for '{name}': ")
+        jobs[name] = (server, key_path, password)
+
+    print_lock = threading.Lock()
+    metrics = {name: PushMetrics(server=name) for name in jobs}
+
+    def _deploy(name: str):
+        server, key_path, password = jobs[name]
+
+        def log(message: str) -> None:
+            with print_lock:
+                typer.echo(f"[{name}] {message}")
+
+        def _report_post_exec(stdout_text: str, stderr_text: str, exit_status: int):
+            if exit_status != 0:
+                raise RuntimeError(
+                    f"post-upload command failed (exit {exit_status}): "
+                    f"{stderr_text.strip() or '(no stderr)'}"
+                )
+
+        final_exec_cmd = exec_cmd or server.get("post_push_cmd")
+        started = time.monotonic()
+        try:
+            marker = _deploy_to_server(
+                cwd, server, key_path, password, excluded_dirs,
+                final_exec_cmd, _report_post_exec,
+                full=full, rollback=rollback, archive_cache=cache, log=log,
+                metrics=metrics[name], show_progress=False, exec_timeout=exec_timeout,
+                connections=connections,
+            )
+        except Exception as e:  # noqa: BLE001 - reported per server below
+            return False, str(e) or e.__class__.__name__, time.monotonic() - started, None
+        detail = "rolled back" if rollback else "deployed"
+        return True, detail, time.monotonic() - started, marker
+
+    typer.secho(
+        f"{'⏪ Rolling back' if rollback else '📤 Uploading to'} {len(jobs)} server(s) "
+        f"with up to {max(1, workers)} in parallel...",
+        fg="cyan",
+    )
+    cache = ArchiveCache(cwd, excluded_dirs)
+    markers = {}
+    try:
+        if jobs:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as executor:
+                futures = {name: executor.submit(_deploy, name) for name in jobs}
+                for name, future in futures.items():
+                    ok, detail, seconds, marker = future.result()
+                    results[name] = (ok, detail, seconds)
+                    if ok:
+                        markers[name] = marker
+    finally:
+        cache.cleanup()
+
+    if not rollback:
+        for name, marker in markers.items():
+            env = _record_deploy(env_path, env, name, marker)
+
+    if metrics_json:
+        _write_metrics_json(
+            metrics_json,
+            git_push_seconds,
+            [
+                _metrics_entry(metrics[name], results[name][0], None if results[name][0] else results[name][1])
+                for name in names if name in metrics
+            ],
+        )
+
+    width = max(len(n) for n in names)
+    failed = [n for n in names if not results[n][0]]
+    typer.secho("")
+    typer.secho("└─ odooflow push finished", fg="cyan", bold=True)
+    for name in names:
+        ok, detail, seconds = results[name]
+        typer.secho(
+            f"   {'✓' if ok else '✗'} {name.ljust(width)}  {seconds:6.1f}s  {detail}",
+            fg="green" if ok else "red",
         )
-        typer.secho("✅ Project uploaded successfully.", fg="green")
-    except Exception as e:
-        typer.secho(f"❌ Upload failed: {e}", fg="red")
-        raise typer.Exit(1)
\ No newline at end of file
+    if failed:
+        typer.secho(
+            f"   ✗ {len(failed)} of {len(names)} server(s) failed.",
+            fg="red",
+            bold=True,
+        )
+        raise typer.Exit(1)
+    typer.secho(f"   ✓ All {len(names)} server(s) deployed.", fg="green", bold=True)
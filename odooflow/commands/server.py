@@ -10,16 +10,14 @@ from __future__ import annotations
 
 import getpass
 import json
-import os
-import socket
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Optional
 
-import paramiko
 import typer
 
 from odooflow import errors
-from odooflow.utils import server_profile
+from odooflow.utils import bench as _bench, probe, server_profile
 from odooflow.utils.env import read_env_file, write_env_file
 from odooflow.config_manager import load_config
 
@@ -89,6 +87,58 @@ def _print_table(rows: List[List[str]], headers: List[str]) -> None:
         typer.echo("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)))
 
 
+def _select_targets(
+    env: dict,
+    names: Optional[List[str]],
+    all_profiles: bool = False,
+    tags: Optional[List[str]] = None,
+) -> dict:
+    """
+    Profiles for the multi-host commands (`logs`, `exec`): the named ones
+    plus those carrying every `--tag`, or all with `--all`, in the order
+    given. With no selector at all, the default profile.
+    """
+    servers = server_profile.load_servers(env)
+    if all_profiles:
+        return dict(servers) if servers else _no_targets("configured")
+
+    missing = [n for n in names or [] if n not in servers]
+    if missing:
+        typer.secho(f"  No server profile(s) {', '.join(map(repr, missing))} found.", fg="red")
+        raise typer.Exit(code=1)
+    selected = list(names or [])
+    if tags:
+        tagged = server_profile.select_by_tags(servers, tags)
+        if not tagged and not selected:
+            _no_targets("tagged " + ", ".join(tags))
+        selected += tagged
+    if selected:
+        return {n: servers[n] for n in dict.fromkeys(selected)}
+
+    profile_name, profile = server_profile.select_profile(env)
+    if profile is None:
+        typer.secho("  No server profile found. Run `odooflow server add <name>` first.", fg="red")
+        raise typer.Exit(code=1)
+    return {profile_name: profile}
+
+
+def _no_targets(reason: str):
+    typer.secho(f"  No server profiles {reason}.", fg="yellow")
+    raise typer.Exit(code=1)
+
+
+PREFIX_COLORS = ("cyan", "magenta", "yellow", "blue", "green", "bright_cyan", "bright_magenta")
+
+
+def _host_prefixes(names: List[str]) -> dict:
+    """A padded, colored "name | " prefix per profile, for interleaved output."""
+    width = max((len(n) for n in names), default=0)
+    return {
+        n: typer.style(f"{n:<{width}} | ", fg=PREFIX_COLORS[i % len(PREFIX_COLORS)])
+        for i, n in enumerate(names)
+    }
+
+
 # --------------------------------------------------------------------------- #
 # Commands
 # --------------------------------------------------------------------------- #
@@ -154,6 +204,37 @@ def add(
         None, "--password", help="Use only in scripts; prefer the masked prompt."
     ),
     post_push_cmd: Optional[str] = typer.Option(None, "--post-push-cmd"),
+    post_push_timeout: Optional[int] = typer.Option(
+        None, "--post-push-timeout", help="Stop the post-push command after this many seconds."
+    ),
+    release_mode: Optional[bool] = typer.Option(
+        None,
+        "--release-mode/--in-place",
+        help="Deploy into timestamped release dirs and switch a symlink atomically.",
+    ),
+    keep_releases: Optional[int] = typer.Option(
+        None, "--keep-releases", help="How many release dirs to keep (release mode)."
+    ),
+    deploy_strategy: Optional[str] = typer.Option(
+        None,
+        "--deploy-strategy",
+        help="'tar' uploads an archive; 'git' lets the server fetch the pushed commit (falls back to tar).",
+    ),
+    git_url: Optional[str] = typer.Option(
+        None, "--git-url", help="Repository URL the server fetches from (default: the local `origin`)."
+    ),
+    sftp_channels: Optional[int] = typer.Option(
+        None, "--sftp-channels", help="Concurrent SFTP channels for large uploads."
+    ),
+    sftp_window_size: Optional[int] = typer.Option(
+        None, "--sftp-window-size", help="SFTP channel window size in bytes."
+    ),
+    tags: Optional[List[str]] = typer.Option(
+        None, "--tag", help="Tag for `--tag` selectors, e.g. 'prod' (repeatable)."
+    ),
+    log_path: Optional[str] = typer.Option(
+        None, "--log-path", help="Odoo log file followed by `server logs`."
+    ),
     make_default: bool = typer.Option(
         True, "--default/--no-default", help="Set this profile as the default."
     ),
@@ -241,6 +322,24 @@ def add(
         profile["password"] = password
     if post_push_cmd:
         profile["post_push_cmd"] = post_push_cmd
+    if post_push_timeout is not None:
+        profile["post_push_timeout"] = post_push_timeout
+    if release_mode is not None:
+        profile["release_mode"] = release_mode
+    if keep_releases is not None:
+        profile["keep_releases"] = keep_releases
+    if deploy_strategy:
+        profile["deploy_strategy"] = deploy_strategy
+    if git_url:
+        profile["git_url"] = git_url
+    if sftp_channels is not None:
+        profile["sftp_channels"] = sftp_channels
+    if sftp_window_size is not None:
+        profile["sftp_window_size"] = sftp_window_size
+    if log_path:
+        profile["log_path"] = log_path
+    if tags:
+        profile["tags"] = sorted({t.strip() for t in tags if t.strip()})
 
     # ------------------------------------------------------------------ #
     # Save, with structured error path (no traceback for validation).
@@ -425,13 +524,38 @@ def show(
         "key_path",
         "password",
         "post_push_cmd",
+        "post_push_timeout",
+        "release_mode",
+        "keep_releases",
+        "deploy_strategy",
+        "git_url",
+        "sftp_channels",
+        "sftp_window_size",
+        "sftp_packet_size",
+        "tags",
+        "log_path",
+        "ssh_ciphers",
+        "ssh_kex",
+        "ssh_compression",
+        "last_used",
+        "last_deployed_sha",
+        "last_test_ok",
+        "last_test_latency",
     ):
         if key not in profile:
             continue
         value = profile[key]
         if key == "password" and not reveal_password:
             value = "(set, hidden — pass --reveal-password to display)"
-        typer.echo(f"  {key:<14} {value}")
+        elif key in ("tags", "ssh_ciphers", "ssh_kex"):
+            value = ", ".join(value)
+        elif key == "last_test_latency":
+            value = "  ".join(
+                f"{stage} {value[stage + '_ms']['p50']}/{value[stage + '_ms']['p95']} ms"
+                for stage in probe.STAGES
+                if stage + "_ms" in value
+            )
+        typer.echo(f"  {key:<17} {value}")
 
     typer.echo("")
 
@@ -463,14 +587,93 @@ def remove(name: str = typer.Argument(..., help="Profile name to remove.")):
     raise typer.Exit(code=1)
 
 
+def _format_latency(result: "probe.ProbeResult", stage: str) -> str:
+    pair = result.latency(stage)
+    if pair is None:
+        return "-"
+    return f"{pair[0]:.0f}/{pair[1]:.0f}"
+
+
+def _record_test_result(env_path: Path, env: dict, result: "probe.ProbeResult") -> dict:
+    """Persist `last_test_ok` / `last_test_latency` (best-effort)."""
+    metadata = {"last_test_ok": result.ok}
+    if result.ok:
+        metadata["last_test_latency"] = result.to_metadata()
+    try:
+        return server_profile.record_metadata(env_path, env, result.name, **metadata)
+    except OSError:
+        return env
+
+
+def _report_single(result: "probe.ProbeResult", profile: dict) -> None:
+    """The step-by-step output of `server test <name>`."""
+    labels = {"tcp": "[tcp]  ", "handshake": "[ssh]  ", "auth": "[auth] "}
+    words = {"tcp": "reachable", "handshake": "handshake ok", "auth": "ok"}
+    for stage in probe.STAGES:
+        if result.failed_stage == stage:
+            typer.secho(f"  {labels[stage]} failed: {result.error}", fg="red")
+            return
+        pair = result.latency(stage)
+        typer.secho(
+            f"  {labels[stage]} {words[stage]:<13} p50 {pair[0]:6.1f} ms  p95 {pair[1]:6.1f} ms",
+            fg="green",
+        )
+
+    directory = result.directory
+    if result.directory_error:
+        typer.secho(f"  [dir]   check failed: {result.directory_error}", fg="yellow")
+    elif result.directory_exists:
+        typer.secho(f"  [dir]   {directory} exists", fg="green")
+    elif result.directory_exists is False:
+        typer.secho(
+            f"  [dir]   {directory} does not exist; will be created on upload.",
+            fg="yellow",
+        )
+
+    ppc = profile.get("post_push_cmd")
+    if ppc:
+        typer.secho(f"\n  [dry-run]  would execute on remote: {ppc}", fg="cyan")
+
+
 @app.command()
 def test(
     name: Optional[str] = typer.Argument(
         None, help="Profile name (defaults to current default)."
     ),
+    all_profiles: bool = typer.Option(False, "--all", help="Test every configured profile."),
+    tags: Optional[List[str]] = typer.Option(
+        None, "--tag", help="Test the profiles carrying this tag (repeatable; all must match)."
+    ),
+    probes: Optional[int] = typer.Option(
+        None, "--probes", min=1,
+        help=f"Connections per profile, for p50/p95 latency [default: 1, or {probe.DEFAULT_PROBES} with --all / --tag].",
+    ),
+    workers: int = typer.Option(8, "--workers", "-w", help="Max profiles tested concurrently."),
+    timeout: float = typer.Option(
+        probe.DEFAULT_TIMEOUT, "--timeout", help="Seconds allowed for each of TCP, handshake and auth."
+    ),
 ):
     """Test SSH connectivity and directory writability without uploading."""
-    env, _ = _load_env()
+    env, env_path = _load_env()
+
+    if all_profiles or tags:
+        if name:
+            typer.secho("  Pass either a profile name or --all / --tag, not both.", fg="red")
+            raise typer.Exit(code=1)
+        servers = server_profile.load_servers(env)
+        names = list(servers) if all_profiles else server_profile.select_by_tags(servers, tags)
+        if not names:
+            typer.secho(
+                "  No server profiles "
+                f"{'configured' if all_profiles else 'tagged ' + ', '.join(tags)}.",
+                fg="yellow",
+            )
+            raise typer.Exit(code=1)
+        _test_many(
+            env, env_path, {n: servers[n] for n in names}, probes or probe.DEFAULT_PROBES, workers, timeout
+        )
+        return
+
     profile_name, profile = server_profile.select_profile(
         env,
         requested_name=name,
@@ -483,77 +686,139 @@ def test(
         )
         raise typer.Exit(code=1)
 
-    host = profile.get("host", "")
-    port = int(profile.get("port", 22))
-    user = profile.get("user", "")
-    directory = profile.get("directory", "")
-    key_path = profile.get("key_path")
-    password = profile.get("password")
+    # One connection answers "does it work?"; latency percentiles need --probes.
+    probes = probes or 1
+    typer.echo(
+        f"\n  Testing {profile_name} → {profile.get('user', '')}@{profile.get('host', '')}:"
+        f"{int(profile.get('port', 22))}  ({probes} probe{'s' if probes != 1 else ''})\n"
+    )
+    result = probe.probe_profile(profile_name, profile, probes=probes, timeout=timeout)
+    _record_test_result(env_path, env, result)
+    _report_single(result, profile)
+    if not result.ok:
+        raise typer.Exit(code=1)
 
-    typer.echo(f"\n  Testing {profile_name} → {user}@{host}:{port}\n")
+    typer.echo("")
+    typer.secho("  ✓ Connection succeeded.\n", fg="green", bold=True)
 
-    # 1. TCP-level reachability (fast, no auth).
-    try:
-        with socket.create_connection((host, port), timeout=5) as _:
-            typer.secho("  [tcp]   reachable", fg="green")
-    except OSError as e:
-        typer.secho(f"  [tcp]   failed: {e}", fg="red")
-        raise typer.Exit(code=1)
 
-    # 2. SSH-level authentication.
-    client = paramiko.SSHClient()
-    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    try:
-        if key_path:
-            pkey = paramiko.RSAKey.from_private_key_file(
-                os.path.expanduser(key_path)
-            )
-            client.connect(host, port=port, username=user, pkey=pkey, timeout=10)
+def _test_many(
+    env: dict,
+    env_path: Path,
+    profiles: dict,
+    probes: int,
+    workers: int,
+    timeout: float,
+) -> None:
+    """Probe several profiles concurrently and print one row per profile."""
+    typer.echo(
+        f"\n  Testing {len(profiles)} profile(s), {probes} probe(s) each, "
+        f"{max(1, min(workers, len(profiles)))} at a time...\n"
+    )
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(profiles)))) as pool:
+        futures = {
+            pool.submit(probe.probe_profile, n, p, probes, timeout): n for n, p in profiles.items()
+        }
+        results = {futures[f]: f.result() for f in as_completed(futures)}
+
+    rows = []
+    for profile_name in profiles:
+        result = results[profile_name]
+        env = _record_test_result(env_path, env, result)
+        if result.ok:
+            status = "ok" if result.directory_exists is not False else "ok (no dir)"
         else:
-            client.connect(host, port=port, username=user, password=password, timeout=10)
-        typer.secho("  [auth]  ok", fg="green")
-    except Exception as e:  # noqa: BLE001
-        typer.secho(f"  [auth]  failed: {e}", fg="red")
+            status = f"{result.failed_stage} failed: {result.error}"
+        rows.append(
+            [
+                profile_name,
+                result.target,
+                _format_latency(result, "tcp"),
+                _format_latency(result, "handshake"),
+                _format_latency(result, "auth"),
+                status,
+            ]
+        )
+    _print_table(rows, ["NAME", "TARGET", "TCP MS p50/p95", "HANDSHAKE", "AUTH", "STATUS"])
+
+    failed = [r for r in results.values() if not r.ok]
+    typer.echo("")
+    if failed:
+        typer.secho(f"  ✗ {len(failed)} of {len(results)} profile(s) failed.\n", fg="red", bold=True)
         raise typer.Exit(code=1)
-    finally:
-        client.close()
+    typer.secho(f"  ✓ All {len(results)} profile(s) reachable.\n", fg="green", bold=True)
 
-    # 3. Directory writability (best-effort).
-    sftp_client = None
-    try:
-        sftp_client = paramiko.SSHClient()  # reconnect for sftp
-        if key_path:
-            pkey = paramiko.RSAKey.from_private_key_file(
-                os.path.expanduser(key_path)
-            )
-            sftp_client.connect(host, port=port, username=user, pkey=pkey, timeout=10)
-        else:
-            sftp_client.connect(
-                host, port=port, username=user, password=password, timeout=10
-            )
-        sftp = sftp_client.open_sftp()
-        try:
-            sftp.stat(directory)
-            typer.secho(f"  [dir]   {directory} exists", fg="green")
-        except IOError:
-            typer.secho(
-                f"  [dir]   {directory} does not exist; will be created on upload.",
-                fg="yellow",
-            )
-        sftp.close()
-    except Exception as e:  # noqa: BLE001
-        typer.secho(f"  [dir]   check failed: {e}", fg="yellow")
-    finally:
-        if sftp_client is not None:
-            sftp_client.close()
-
-    # 4. Dry-run of post_push_cmd if present.
-    ppc = profile.get("post_push_cmd")
-    if ppc:
-        typer.secho(f"\n  [dry-run]  would execute on remote: {ppc}", fg="cyan")
 
+@app.command()
+def bench(
+    name: Optional[str] = typer.Argument(
+        None, help="Profile name (defaults to current default)."
+    ),
+    payload_mb: int = typer.Option(
+        _bench.DEFAULT_PAYLOAD_MB, "--payload-mb", min=1, help="MB pushed per cipher to measure throughput."
+    ),
+    rounds: int = typer.Option(
+        _bench.DEFAULT_ROUNDS, "--rounds", min=1, help="Connections per algorithm (best throughput, median handshake)."
+    ),
+    timeout: float = typer.Option(
+        probe.DEFAULT_TIMEOUT, "--timeout", help="Seconds allowed for each connect, handshake and transfer."
+    ),
+    save: bool = typer.Option(
+        True, "--save/--no-save", help="Store the winning preferences in the profile."
+    ),
+):
+    """Benchmark SSH ciphers, key exchange and compression; keep the fastest for this profile."""
+    env, env_path = _load_env()
+    profile_name, profile = server_profile.select_profile(env, requested_name=name)
+    if profile is None:
+        typer.secho(
+            f"  No server profile{' '+repr(name) if name else ''} found. "
+            "Run `odooflow server add <name>` first.",
+            fg="red",
+        )
+        raise typer.Exit(code=1)
+
+    payload = _bench.build_payload(Path.cwd(), payload_mb * 2**20)
+    typer.echo(
+        f"\n  Benchmarking {profile_name} → {profile.get('user', '')}@{profile.get('host', '')}:"
+        f"{int(profile.get('port', 22))}  ({payload_mb} MB payload, {rounds} round(s) each)\n"
+    )
+
+    def show(result: "_bench.BenchResult") -> None:
+        kind = "kex" if result.kex else "cipher"
+        handshake = f"{result.handshake_ms:.0f} ms" if result.handshake_ms is not None else "-"
+        if result.error:
+            typer.secho(f"  {kind:<6} {result.label:<40} {result.error}", fg="yellow")
+            return
+        speed = f"{result.mb_per_second:.1f} MB/s" if result.mb_per_second else ""
+        compression = " +zlib" if result.compression else ""
+        typer.echo(f"  {kind:<6} {result.label + compression:<40} handshake {handshake:>8}  {speed}")
+
+    report = _bench.run_bench(profile, payload, rounds=rounds, timeout=timeout, on_result=show)
+    best = report.fastest_cipher()
+    if best is None:
+        typer.secho("\n  ✗ No cipher could be measured against this server.\n", fg="red", bold=True)
+        raise typer.Exit(code=1)
+
+    tuning = report.tuning()
     typer.echo("")
-    typer.secho("  ✓ Connection succeeded.\n", fg="green", bold=True)
+    typer.secho(f"  Fastest cipher:  {best.cipher} ({best.mb_per_second:.1f} MB/s)", fg="green")
+    if tuning.kex:
+        typer.secho(f"  Fastest kex:     {tuning.kex[0]}", fg="green")
+    typer.secho(f"  Compression:     {'on' if tuning.compression else 'off'}", fg="green")
+
+    if not save:
+        typer.echo("")
+        return
+    env = server_profile.record_metadata(env_path, env, profile_name, **tuning.to_profile())
+    if server_profile.load_servers(env).get(profile_name, {}).get("ssh_ciphers") == tuning.ciphers:
+        typer.secho(f"\n  ✓ Saved to '{profile_name}'; push, connect and test will use them.\n", fg="green", bold=True)
+    else:
+        typer.secho(
+            "\n  ℹ Not saved: legacy profiles cannot store preferences. "
+            f"Run `odooflow server add {profile_name}` to migrate it first.\n",
+            fg="cyan",
+        )
 
 
 __all__ = ["app"]
@@ -0,0 +1,85 @@
+"""
+`odooflow server tunnel` — forward local ports to a server profile.
+
+    odooflow server tunnel prod -L 8069:localhost:8069 -L 5432:localhost:5432
+
+Like `ssh -L`, but with the profile's credentials and SSH preferences.
+Every forwarded connection (browser tabs, psql, pgAdmin) shares one SSH
+transport and a single relay thread. When the connection drops, the
+local ports stay open and the tunnel reconnects.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import List, Optional
+
+import typer
+
+from odooflow.commands.server import _load_env, _select_targets
+from odooflow.utils.connection import ConnectionManager
+from odooflow.utils.tunnel import TunnelServer, parse_forward
+
+
+# Public entry-point: cli.py registers `tunnel` on the `server` sub-app.
+
+RECONNECT_DELAY = 2.0  # seconds between reconnect attempts
+
+
+def tunnel(
+    name: Optional[str] = typer.Argument(
+        None, help="Profile name (defaults to current default)."
+    ),
+    local: List[str] = typer.Option(
+        ..., "--local", "-L", help="[bind_address:]port:host:hostport (repeatable)."
+    ),
+):
+    """Forward local ports through a server profile (Ctrl-C to stop)."""
+    env, _ = _load_env()
+    ((profile_name, profile),) = _select_targets(env, [name] if name else []).items()
+
+    try:
+        forwards = [parse_forward(spec) for spec in local]
+    except ValueError as exc:
+        typer.secho(f"❌ {exc}", fg="red", err=True)
+        raise typer.Exit(code=1)
+
+    server = TunnelServer(forwards, log=lambda msg: typer.secho(f"  {msg}", fg="yellow", err=True))
+    try:
+        server.bind()
+    except OSError as exc:
+        typer.secho(f"❌ Cannot listen locally: {exc}", fg="red", err=True)
+        raise typer.Exit(code=1)
+
+    connections = ConnectionManager(use_agentd=False)
+    try:
+        for forward in forwards:
+            typer.secho(f"🔀 Forwarding {forward} via {profile_name}", fg="cyan")
+        typer.secho("   Press Ctrl-C to stop.", fg="cyan")
+        connected = False
+        while True:
+            try:
+                client = connections.client_for_profile(profile)
+            except Exception as exc:  # noqa: BLE001
+                if not connected:
+                    typer.secho(f"❌ Cannot connect to {profile_name}: {exc}", fg="red", err=True)
+                    raise typer.Exit(code=1)
+                # It worked before: keep retrying while the local ports stay up.
+                typer.secho(f"  Connecting to {profile_name} failed: {exc}; retrying.", fg="yellow", err=True)
+                time.sleep(RECONNECT_DELAY)
+                continue
+            connected = True
+            if server.serve(client.get_transport()):
+                break
+            typer.secho(f"  Connection to {profile_name} lost; reconnecting.", fg="yellow", err=True)
+            connections.close_all()
+            time.sleep(RECONNECT_DELAY)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        connections.close_all()
+    typer.secho(f"\n  Tunnel closed ({server.total} connection(s) forwarded).", fg="cyan")
+
+
+__all__ = ["tunnel"]
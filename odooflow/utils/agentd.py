@@ -0,0 +1,777 @@
+"""
+`odooflow ssh-agentd`: keep authenticated SSH transports alive between
+odooflow invocations, in the spirit of OpenSSH's ControlMaster.
+
+The daemon listens on a Unix socket (mode 0600 in a 0700 directory,
+`~/.cache/odooflow/ssh-agentd.sock` unless `ODOOFLOW_AGENTD_SOCK` is set).
+Only that default directory is created and locked down; a socket placed
+elsewhere must go in an existing directory that the user owns and nobody
+else can write to.
+Every channel a short-lived command opens becomes one connection to that
+socket:
+
+    client -> daemon   {"op": "open", "params": {...}}\\n
+    daemon -> client   {"ok": true}\\n
+    then frames both ways: 1-byte kind + 4-byte big-endian length + payload
+
+The daemon opens a channel on its cached transport for that user@host:port
+and relays exec / subsystem / pty requests, stdin, stdout, stderr, EOF and
+the exit status. On the client side `RemoteChannel`, `ProxyTransport` and
+`ProxyClient` mimic the parts of paramiko's Channel / Transport / SSHClient
+that odooflow uses, so SFTP (`SFTPClient.from_transport`), `exec_command`
+and `stream_command` work unchanged. `ConnectionManager` uses the daemon
+automatically when it is running; transports idle for longer than
+`--idle-timeout` are closed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import queue
+import select
+import socket
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import paramiko
+from paramiko.channel import ChannelFile, ChannelStderrFile, ChannelStdinFile
+
+from odooflow.utils import keys
+
+
+SOCKET_ENV = "ODOOFLOW_AGENTD_SOCK"
+DEFAULT_IDLE_TIMEOUT = 600  # seconds
+DEFAULT_KEEPALIVE = 30  # seconds
+REQUEST_TIMEOUT = 30  # seconds to wait for the daemon to answer a request
+CONNECT_TIMEOUT = 15  # seconds for the daemon's own TCP connect, banner and auth
+_RECV_SIZE = 65536
+_FRAME = struct.Struct("!cI")
+
+# Frame kinds, client -> daemon
+EXEC, SUBSYSTEM, PTY, SHELL, RESIZE, DATA, EOF, SIGNAL = (
+    b"x", b"s", b"p", b"h", b"z", b"d", b"E", b"g",
+)
+# Frame kinds, daemon -> client (EOF shared)
+ACK, FAIL, STDOUT, STDERR, EXIT, CLOSED = b"a", b"f", b"o", b"e", b"X", b"C"
+
+
+def default_socket_dir() -> Path:
+    return Path.home() / ".cache" / "odooflow"
+
+
+def default_socket_path() -> Path:
+    override = os.environ.get(SOCKET_ENV)
+    if override:
+        return Path(override).expanduser()
+    return default_socket_dir() / "ssh-agentd.sock"
+
+
+def _prepare_socket_dir(directory: Path) -> None:
+    """Create odooflow's own directory 0700; only vet any other one, never change it."""
+    if directory.resolve() == default_socket_dir().resolve():
+        directory.mkdir(parents=True, exist_ok=True)
+        os.chmod(directory, 0o700)
+        return
+    try:
+        info = directory.stat()
+    except FileNotFoundError:
+        raise RuntimeError(f"Socket directory {directory} does not exist.")
+    if info.st_uid != os.getuid():
+        raise RuntimeError(f"Socket directory {directory} is not owned by the current user.")
+    if info.st_mode & 0o022:
+        raise RuntimeError(
+            f"Socket directory {directory} is writable by other users; "
+            "use a private directory for the socket."
+        )
+
+
+# --------------------------------------------------------------------------- #
+# Wire format
+# --------------------------------------------------------------------------- #
+
+
+def _send_frame(sock: socket.socket, kind: bytes, payload: bytes = b"") -> None:
+    sock.sendall(_FRAME.pack(kind, len(payload)) + payload)
+
+
+class _FrameReader:
+    """Reassemble frames from arbitrary recv() chunks."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[bytes, bytes]]:
+        self._buffer += data
+        frames = []
+        while len(self._buffer) >= _FRAME.size:
+            kind, length = _FRAME.unpack_from(self._buffer)
+            end = _FRAME.size + length
+            if len(self._buffer) < end:
+                break
+            frames.append((kind, bytes(self._buffer[_FRAME.size:end])))
+            del self._buffer[:end]
+        return frames
+
+
+def _send_json_line(sock: socket.socket, obj: dict) -> None:
+    sock.sendall(json.dumps(obj).encode() + b"\n")
+
+
+def _recv_json_line(sock: socket.socket) -> dict:
+    # Byte at a time: the frames that follow must stay in the socket.
+    line = bytearray()
+    while not line.endswith(b"\n"):
+        byte = sock.recv(1)
+        if not byte:
+            raise EOFError("ssh-agentd closed the connection")
+        line += byte
+    return json.loads(line)
+
+
+def _target_key(params: dict) -> Tuple[str, str, int, str]:
+    """
+    Cache key of a transport: the target plus the credentials it was
+    authenticated with, so another key or password never reuses it.
+    """
+    if params.get("key_path"):
+        identity = "key:" + os.path.abspath(os.path.expanduser(params["key_path"]))
+    elif params.get("password") is not None:
+        identity = "password:" + hashlib.sha256(params["password"].encode()).hexdigest()
+    else:
+        identity = "default"
+    if params.get("allow_agent", True):
+        identity += "+agent"
+    return params["user"], params["host"], int(params["port"]), identity
+
+
+def _params(
+    user, host, port, key_path, password, strict_host_key_checking, tuning=None, allow_agent=True
+) -> dict:
+    return {
+        "user": user,
+        "host": host,
+        "port": int(port),
+        "key_path": key_path,
+        "password": password,
+        "strict_host_key_checking": bool(strict_host_key_checking),
+        "tuning": tuning.to_profile() if tuning is not None else None,
+        "allow_agent": bool(allow_agent),
+    }
+
+
+# --------------------------------------------------------------------------- #
+# Daemon
+# --------------------------------------------------------------------------- #
+
+
+class AgentDaemon:
+    """Serve channels over cached transports until `stop()` is called."""
+
+    def __init__(
+        self,
+        socket_path: Optional[Path] = None,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        log: Callable[[str], None] = print,
+    ):
+        self.socket_path = Path(socket_path or default_socket_path())
+        self.idle_timeout = idle_timeout
+        self.log = log
+        # _target_key -> [client, last_used, open_channels]
+        self._clients: Dict[Tuple[str, str, int, str], list] = {}
+        self._lock = threading.Lock()
+        # One connect at a time per target, as in ConnectionManager.
+        self._connect_locks: Dict[Tuple[str, str, int, str], threading.Lock] = {}
+        self._stopped = threading.Event()
+        self._listener: Optional[socket.socket] = None
+
+    # ---------- transports ---------- #
+
+    def _client(self, params: dict) -> paramiko.SSHClient:
+        from odooflow.utils.ssh import open_ssh_client
+        from odooflow.utils.tuning import SSHTuning
+
+        key = _target_key(params)
+        with self._lock:
+            connect_lock = self._connect_locks.setdefault(key, threading.Lock())
+        with connect_lock:
+            with self._lock:
+                entry = self._clients.get(key)
+            if entry is not None:
+                transport = entry[0].get_transport()
+                if transport is not None and transport.is_active():
+                    with self._lock:
+                        entry[1] = time.monotonic()
+                    return entry[0]
+                with self._lock:
+                    self._clients.pop(key, None)
+                entry[0].close()
+            self.log(f"🔐 Connecting to {key[0]}@{key[1]}:{key[2]} ...")
+            client = open_ssh_client(
+                params["user"], params["host"], int(params["port"]),
+                params.get("key_path"), params.get("password"),
+                params.get("strict_host_key_checking", False),
+                timeout=CONNECT_TIMEOUT,
+                tuning=SSHTuning.from_profile(params.get("tuning")),
+                # The daemon has no terminal: the client asks and sends the passphrase.
+                passphrase=params.get("passphrase"),
+                interactive=False,
+                allow_agent=params.get("allow_agent", True),
+            )
+            client.get_transport().set_keepalive(DEFAULT_KEEPALIVE)
+            with self._lock:
+                self._clients[key] = [client, time.monotonic(), 0]
+            return client
+
+    def _track(self, params: dict, delta: int) -> None:
+        key = _target_key(params)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                entry[1] = time.monotonic()
+                entry[2] += delta
+
+    def _reap_idle(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                key for key, (_, last_used, channels) in self._clients.items()
+                if channels == 0 and now - last_used > self.idle_timeout
+            ]
+            clients = [self._clients.pop(key)[0] for key in idle]
+        for key, client in zip(idle, clients):
+            self.log(f"💤 Closing idle connection {key[0]}@{key[1]}:{key[2]}")
+            client.close()
+
+    def status(self) -> List[dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "target": f"{user}@{host}:{port}",
+                    "idle_seconds": round(now - last_used, 1),
+                    "channels": channels,
+                }
+                for (user, host, port, _identity), (_, last_used, channels) in self._clients.items()
+            ]
+
+    # ---------- serving ---------- #
+
+    def serve_forever(self) -> None:
+        _prepare_socket_dir(self.socket_path.parent)
+        if self.socket_path.exists():
+            if ping(self.socket_path) is not None:
+                raise RuntimeError(f"ssh-agentd is already running on {self.socket_path}")
+            self.socket_path.unlink()
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            listener.bind(str(self.socket_path))
+        finally:
+            os.umask(old_umask)
+        listener.listen(64)
+        listener.settimeout(1.0)
+        self._listener = listener
+        self.log(f"🛰️  ssh-agentd listening on {self.socket_path} (pid {os.getpid()})")
+        try:
+            while not self._stopped.is_set():
+                try:
+                    conn, _ = listener.accept()
+                except socket.timeout:
+                    self._reap_idle()
+                    continue
+                conn.settimeout(None)
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+            with self._lock:
+                clients = [entry[0] for entry in self._clients.values()]
+                self._clients.clear()
+            for client in clients:
+                client.close()
+            self.log("👋 ssh-agentd stopped.")
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _handle(self, conn: socket.socket) -> None:
+        try:
+            header = _recv_json_line(conn)
+            op = header.get("op")
+            if op == "status":
+                _send_json_line(conn, {"ok": True, "pid": os.getpid(), "connections": self.status()})
+            elif op == "stop":
+                _send_json_line(conn, {"ok": True})
+                self.stop()
+            elif op in ("connect", "open"):
+                params = header["params"]
+                try:
+                    client = self._client(params)
+                    channel = None
+                    if op == "open":
+                        channel = client.get_transport().open_session(
+                            window_size=header.get("window_size"),
+                            max_packet_size=header.get("max_packet_size"),
+                        )
+                except Exception as e:  # noqa: BLE001 - reported to the client
+                    _send_json_line(conn, {
+                        "ok": False,
+                        "error": str(e) or e.__class__.__name__,
+                        "passphrase_required": isinstance(e, keys.PassphraseRequired),
+                    })
+                    return
+                _send_json_line(conn, {"ok": True})
+                if channel is not None:
+                    self._track(params, +1)
+                    try:
+                        _relay(conn, channel)
+                    finally:
+                        self._track(params, -1)
+            else:
+                _send_json_line(conn, {"ok": False, "error": f"unknown op {op!r}"})
+        except (OSError, EOFError, ValueError):
+            pass
+        finally:
+            conn.close()
+
+
+def _apply_request(conn: socket.socket, channel, kind: bytes, payload: bytes) -> None:
+    """Perform one client frame on the real channel, acknowledging requests."""
+    from odooflow.utils.ssh import send_signal
+
+    if kind == DATA:
+        channel.sendall(payload)
+        return
+    if kind == EOF:
+        channel.shutdown_write()
+        return
+    if kind == SIGNAL:
+        send_signal(channel, payload.decode())
+        return
+    try:
+        if kind == EXEC:
+            channel.exec_command(payload.decode())
+        elif kind == SUBSYSTEM:
+            channel.invoke_subsystem(payload.decode())
+        elif kind == PTY:
+            channel.get_pty(**json.loads(payload))
+        elif kind == SHELL:
+            channel.invoke_shell()
+        elif kind == RESIZE:
+            channel.resize_pty(**json.loads(payload))
+        else:
+            raise paramiko.SSHException(f"unknown request {kind!r}")
+    except Exception as e:  # noqa: BLE001 - reported to the client
+        _send_frame(conn, FAIL, (str(e) or e.__class__.__name__).encode())
+        return
+    _send_frame(conn, ACK)
+
+
+def _relay(conn: socket.socket, channel) -> None:
+    """Shuttle frames between the Unix connection and the SSH channel until either side closes."""
+    reader = _FrameReader()
+    eof_sent = exit_sent = False
+    try:
+        while True:
+            readable, _, _ = select.select([conn, channel], [], [], 0.2)
+            if conn in readable:
+                data = conn.recv(_RECV_SIZE)
+                if not data:
+                    return  # the client is gone; closing the channel ends the remote side
+                for kind, payload in reader.feed(data):
+                    _apply_request(conn, channel, kind, payload)
+            while channel.recv_ready():
+                _send_frame(conn, STDOUT, channel.recv(_RECV_SIZE))
+            while channel.recv_stderr_ready():
+                _send_frame(conn, STDERR, channel.recv_stderr(_RECV_SIZE))
+            if not eof_sent and channel.eof_received:
+                _send_frame(conn, EOF)
+                eof_sent = True
+            if not exit_sent and channel.exit_status_ready():
+                _send_frame(conn, EXIT, str(channel.recv_exit_status()).encode())
+                exit_sent = True
+            if channel.closed and not channel.recv_ready() and not channel.recv_stderr_ready():
+                _send_frame(conn, CLOSED)
+                return
+    finally:
+        channel.close()
+
+
+# --------------------------------------------------------------------------- #
+# Client side
+# --------------------------------------------------------------------------- #
+
+
+def _connect_unix(socket_path: Path) -> Optional[socket.socket]:
+    if not Path(socket_path).exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(socket_path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _call(socket_path: Path, header: dict) -> Optional[dict]:
+    """One request/response exchange; None when no daemon is listening."""
+    sock = _connect_unix(socket_path)
+    if sock is None:
+        return None
+    try:
+        sock.settimeout(REQUEST_TIMEOUT)
+        _send_json_line(sock, header)
+        return _recv_json_line(sock)
+    except (OSError, EOFError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+
+def ping(socket_path: Optional[Path] = None) -> Optional[dict]:
+    """The daemon's status, or None when it is not running."""
+    return _call(Path(socket_path or default_socket_path()), {"op": "status"})
+
+
+def stop(socket_path: Optional[Path] = None) -> bool:
+    return _call(Path(socket_path or default_socket_path()), {"op": "stop"}) is not None
+
+
+class RemoteChannel:
+    """A paramiko.Channel look-alike whose data flows through ssh-agentd."""
+
+    def __init__(self, sock: socket.socket, transport: "ProxyTransport", chanid: int = 0):
+        self._sock = sock
+        self._transport = transport
+        self.chanid = chanid
+        self._cond = threading.Condition()
+        self._stdout = bytearray()
+        self._stderr = bytearray()
+        self._replies: "queue.Queue[Tuple[bytes, bytes]]" = queue.Queue()
+        self._exit_status: Optional[int] = None
+        self.eof_received = False
+        self.closed = False
+        self._timeout: Optional[float] = None
+        self._pipe_r, self._pipe_w = os.pipe()
+        self._pipe_set = False
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    # ---------- background demultiplexer ---------- #
+
+    def _set_event(self) -> None:
+        if not self._pipe_set:
+            os.write(self._pipe_w, b"*")
+            self._pipe_set = True
+
+    def _clear_event(self) -> None:
+        if self._pipe_set and not (self._stdout or self._stderr or self.eof_received or self.closed):
+            os.read(self._pipe_r, 1)
+            self._pipe_set = False
+
+    def _read_loop(self) -> None:
+        reader = _FrameReader()
+        sock = self._sock  # close() clears the attribute
+        try:
+            while True:
+                data = sock.recv(_RECV_SIZE)
+                if not data:
+                    break
+                for kind, payload in reader.feed(data):
+                    if kind in (ACK, FAIL):
+                        self._replies.put((kind, payload))
+                        continue
+                    with self._cond:
+                        if kind == STDOUT:
+                            self._stdout += payload
+                        elif kind == STDERR:
+                            self._stderr += payload
+                        elif kind == EOF:
+                            self.eof_received = True
+                        elif kind == EXIT:
+                            self._exit_status = int(payload)
+                        elif kind == CLOSED:
+                            self.closed = True
+                        self._set_event()
+                        self._cond.notify_all()
+        except OSError:
+            pass
+        with self._cond:
+            self.eof_received = self.closed = True
+            self._set_event()
+            self._cond.notify_all()
+        self._replies.put((FAIL, b"ssh-agentd connection lost"))
+
+    # ---------- requests ---------- #
+
+    def _request(self, kind: bytes, payload: bytes = b"") -> None:
+        _send_frame(self._sock, kind, payload)
+        try:
+            reply, message = self._replies.get(timeout=REQUEST_TIMEOUT)
+        except queue.Empty:
+            raise paramiko.SSHException("ssh-agentd did not answer")
+        if reply == FAIL:
+            raise paramiko.SSHException(message.decode() or "request failed")
+
+    def exec_command(self, command: str) -> None:
+        self._request(EXEC, command.encode())
+
+    def invoke_subsystem(self, subsystem: str) -> None:
+        self._request(SUBSYSTEM, subsystem.encode())
+
+    def invoke_shell(self) -> None:
+        self._request(SHELL)
+
+    def get_pty(self, term="vt100", width=80, height=24, width_pixels=0, height_pixels=0) -> None:
+        self._request(PTY, json.dumps({
+            "term": term, "width": width, "height": height,
+            "width_pixels": width_pixels, "height_pixels": height_pixels,
+        }).encode())
+
+    def resize_pty(self, width=80, height=24, width_pixels=0, height_pixels=0) -> None:
+        self._request(RESIZE, json.dumps({
+            "width": width, "height": height,
+            "width_pixels": width_pixels, "height_pixels": height_pixels,
+        }).encode())
+
+    def send_signal(self, name: str) -> None:
+        _send_frame(self._sock, SIGNAL, name.encode())
+
+    def update_environment(self, environment: dict) -> None:
+        raise paramiko.SSHException("environment variables are not relayed by ssh-agentd")
+
+    # ---------- data ---------- #
+
+    def _take(self, buffer: bytearray, nbytes: int) -> bytes:
+        deadline = None if self._timeout is None else time.monotonic() + self._timeout
+        with self._cond:
+            while not buffer and not self.eof_received and not self.closed:
+                wait = None if deadline is None else deadline - time.monotonic()
+                if wait is not None and wait <= 0:
+                    raise socket.timeout()
+                self._cond.wait(wait)
+            data = bytes(buffer[:nbytes])
+            del buffer[:nbytes]
+            self._clear_event()
+            return data
+
+    def recv(self, nbytes: int) -> bytes:
+        return self._take(self._stdout, nbytes)
+
+    def recv_stderr(self, nbytes: int) -> bytes:
+        return self._take(self._stderr, nbytes)
+
+    def recv_ready(self) -> bool:
+        return bool(self._stdout)
+
+    def recv_stderr_ready(self) -> bool:
+        return bool(self._stderr)
+
+    def exit_status_ready(self) -> bool:
+        return self._exit_status is not None or self.closed
+
+    def recv_exit_status(self) -> int:
+        with self._cond:
+            while self._exit_status is None and not self.closed:
+                self._cond.wait()
+        return self._exit_status if self._exit_status is not None else -1
+
+    def send(self, data: bytes) -> int:
+        if self.closed:
+            return 0
+        _send_frame(self._sock, DATA, bytes(data))
+        return len(data)
+
+    def sendall(self, data: bytes) -> None:
+        if self.send(data) == 0 and data:
+            raise OSError("Socket is closed")
+
+    def sendall_stderr(self, data: bytes) -> None:
+        raise OSError("stderr is read-only on the client side")
+
+    def shutdown_write(self) -> None:
+        try:
+            _send_frame(self._sock, EOF)
+        except OSError:
+            pass
+
+    # ---------- misc Channel API ---------- #
+
+    def settimeout(self, timeout: Optional[float]) -> None:
+        self._timeout = timeout
+
+    def gettimeout(self) -> Optional[float]:
+        return self._timeout
+
+    def setblocking(self, blocking) -> None:
+        self._timeout = None if blocking else 0.0
+
+    def fileno(self) -> int:
+        return self._pipe_r
+
+    def get_name(self) -> str:
+        return f"agentd-chan {self.chanid}"
+
+    def get_transport(self) -> "ProxyTransport":
+        return self._transport
+
+    def makefile(self, *params) -> ChannelFile:
+        return ChannelFile(self, *params)
+
+    def makefile_stderr(self, *params) -> ChannelStderrFile:
+        return ChannelStderrFile(self, *params)
+
+    def makefile_stdin(self, *params) -> ChannelStdinFile:
+        return ChannelStdinFile(self, *params)
+
+    def close(self) -> None:
+        with self._cond:
+            if self._sock is None:
+                return
+            sock, self._sock = self._sock, None
+            self.closed = True
+            self._cond.notify_all()
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
+        self._reader.join(timeout=1)
+        os.close(self._pipe_r)
+        os.close(self._pipe_w)
+
+
+class ProxyTransport:
+    """The `Transport` half of `ProxyClient`: hands out daemon-backed channels."""
+
+    def __init__(self, socket_path: Path, params: dict):
+        self.socket_path = Path(socket_path)
+        self.params = params
+        self._active = True
+        self._next_chanid = 0
+
+    def open_session(self, window_size=None, max_packet_size=None, timeout=None) -> RemoteChannel:
+        sock = _connect_unix(self.socket_path)
+        if sock is None:
+            self._active = False
+            raise paramiko.SSHException("ssh-agentd is no longer running")
+        try:
+            sock.settimeout(timeout or REQUEST_TIMEOUT)
+            _send_json_line(sock, {
+                "op": "open",
+                "params": self.params,
+                "window_size": window_size,
+                "max_packet_size": max_packet_size,
+            })
+            reply = _recv_json_line(sock)
+        except (OSError, EOFError, ValueError) as e:
+            sock.close()
+            raise paramiko.SSHException(f"ssh-agentd: {e}")
+        if not reply.get("ok"):
+            sock.close()
+            raise paramiko.SSHException(reply.get("error", "ssh-agentd refused the channel"))
+        sock.settimeout(None)
+        self._next_chanid += 1
+        return RemoteChannel(sock, self, self._next_chanid)
+
+    def is_active(self) -> bool:
+        return self._active
+
+    def set_keepalive(self, interval: int) -> None:
+        pass  # the daemon keeps its own transports alive
+
+    def close(self) -> None:
+        self._active = False
+
+
+class ProxyClient:
+    """The subset of `paramiko.SSHClient` odooflow uses, backed by ssh-agentd."""
+
+    def __init__(self, transport: ProxyTransport):
+        self._transport = transport
+
+    def get_transport(self) -> ProxyTransport:
+        return self._transport
+
+    def exec_command(self, command, bufsize=-1, timeout=None, get_pty=False, environment=None):
+        chan = self._transport.open_session(timeout=timeout)
+        if get_pty:
+            chan.get_pty()
+        chan.settimeout(timeout)
+        if environment:
+            chan.update_environment(environment)
+        chan.exec_command(command)
+        return (
+            chan.makefile_stdin("wb", bufsize),
+            chan.makefile("r", bufsize),
+            chan.makefile_stderr("r", bufsize),
+        )
+
+    def invoke_shell(self, term="vt100", width=80, height=24, width_pixels=0, height_pixels=0, environment=None):
+        chan = self._transport.open_session()
+        chan.get_pty(term, width, height, width_pixels, height_pixels)
+        chan.invoke_shell()
+        return chan
+
+    def open_sftp(self) -> paramiko.SFTPClient:
+        return paramiko.SFTPClient.from_transport(self._transport)
+
+    def close(self) -> None:
+        # The daemon owns the real connection; it stays up for the next command.
+        self._transport.close()
+
+
+def connect(
+    user: str,
+    host: str,
+    port: int = 22,
+    key_path: Optional[str] = None,
+    password: Optional[str] = None,
+    strict_host_key_checking: bool = False,
+    socket_path: Optional[Path] = None,
+    tuning=None,
+    allow_agent: bool = True,
+) -> Optional[ProxyClient]:
+    """
+    A `ProxyClient` for user@host:port through a running daemon, or None
+    when no daemon is listening. Authentication errors are raised.
+
+    When the daemon needs the passphrase of an encrypted key, it is asked
+    for here (prompt or $ODOOFLOW_KEY_PASSPHRASE) and sent along with the
+    retried request. Once connected, the daemon keeps the decrypted key.
+    """
+    socket_path = Path(socket_path or default_socket_path())
+    params = _params(user, host, port, key_path, password, strict_host_key_checking, tuning, allow_agent)
+    reply = _call(socket_path, {"op": "connect", "params": params})
+    if reply is None:
+        return None
+    if reply.get("passphrase_required") and key_path:
+        params["passphrase"] = keys._passphrase(os.path.expanduser(key_path))
+        reply = _call(socket_path, {"op": "connect", "params": params})
+        if reply is None:
+            return None
+    if not reply.get("ok"):
+        raise paramiko.SSHException(reply.get("error", "ssh-agentd could not connect"))
+    return ProxyClient(ProxyTransport(socket_path, params))
+
+
+__all__ = [
+    "SOCKET_ENV",
+    "DEFAULT_IDLE_TIMEOUT",
+    "default_socket_path",
+    "AgentDaemon",
+    "ping",
+    "stop",
+    "connect",
+    "RemoteChannel",
+    "ProxyTransport",
+    "ProxyClient",
+]
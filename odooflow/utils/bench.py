@@ -0,0 +1,245 @@
+"""
+SSH algorithm benchmark for `odooflow server bench`.
+
+For each cipher paramiko can negotiate, a connection is opened that
+offers only that cipher. The handshake is timed and a payload is pushed
+through `cat > /dev/null` on the remote side, which gives bulk
+throughput the way an upload sees it. The fastest cipher is then
+measured again with transport compression on, and each key-exchange
+method is timed on handshakes alone.
+
+The payload is built from the project's own source files, so the
+compression result reflects what a push actually sends rather than
+random or trivially compressible bytes.
+
+The result is an `SSHTuning`: ciphers ranked by throughput, key exchange
+ranked by handshake time, and compression only if it was faster.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+import paramiko
+
+from odooflow.utils import probe
+from odooflow.utils.tuning import SSHTuning, supported_ciphers, supported_kex
+
+
+DEFAULT_PAYLOAD_MB = 4
+DEFAULT_ROUNDS = 2
+SINK_COMMAND = "cat > /dev/null"
+SEND_CHUNK_SIZE = 128 * 1024
+PAYLOAD_SUFFIXES = frozenset({".py", ".xml", ".js", ".css", ".scss", ".csv", ".po", ".pot", ".rst", ".md", ".html"})
+
+
+class BenchResult:
+    """Timings for one algorithm choice."""
+
+    def __init__(self, cipher: Optional[str], compression: bool = False, kex: Optional[str] = None):
+        self.cipher = cipher
+        self.compression = compression
+        self.kex = kex
+        self.handshakes: List[float] = []  # seconds
+        self.transfers: List[float] = []  # seconds per payload
+        self.size = 0
+        self.error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and bool(self.handshakes)
+
+    @property
+    def label(self) -> str:
+        return self.kex or self.cipher or "-"
+
+    @property
+    def handshake_ms(self) -> Optional[float]:
+        return probe.percentile(self.handshakes, 50) * 1000.0 if self.handshakes else None
+
+    @property
+    def mb_per_second(self) -> Optional[float]:
+        if not self.transfers or not self.size:
+            return None
+        best = min(self.transfers)
+        return self.size / 2**20 / best if best > 0 else None
+
+
+class BenchReport:
+    """All results for one profile, and the preferences they point to."""
+
+    def __init__(self) -> None:
+        self.ciphers: List[BenchResult] = []
+        self.compressed: Optional[BenchResult] = None
+        self.kex: List[BenchResult] = []
+
+    def fastest_cipher(self) -> Optional[BenchResult]:
+        measured = [r for r in self.ciphers if r.ok and r.mb_per_second]
+        return max(measured, key=lambda r: r.mb_per_second) if measured else None
+
+    def compression_helps(self) -> bool:
+        best = self.fastest_cipher()
+        return bool(
+            best is not None
+            and self.compressed is not None
+            and self.compressed.ok
+            and (self.compressed.mb_per_second or 0) > best.mb_per_second
+        )
+
+    def tuning(self) -> SSHTuning:
+        ciphers = sorted(
+            (r for r in self.ciphers if r.ok and r.mb_per_second),
+            key=lambda r: (-r.mb_per_second, r.handshake_ms),
+        )
+        kex = sorted((r for r in self.kex if r.ok), key=lambda r: r.handshake_ms)
+        return SSHTuning(
+            ciphers=[r.cipher for r in ciphers],
+            kex=[r.kex for r in kex],
+            compression=self.compression_helps(),
+        )
+
+
+def build_payload(root: Path, size: int) -> bytes:
+    """`size` bytes of the project's text sources (repeated), or pseudo-text without any."""
+    chunks: List[bytes] = []
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith(".") and d != "__pycache__")
+        for filename in sorted(filenames):
+            if Path(filename).suffix not in PAYLOAD_SUFFIXES:
+                continue
+            try:
+                data = (Path(dirpath) / filename).read_bytes()
+            except OSError:
+                continue
+            chunks.append(data)
+            total += len(data)
+            if total >= size:
+                break
+        if total >= size:
+            break
+    data = b"".join(chunks)
+    if not data:
+        # Half text, half incompressible: neither flatters nor punishes compression.
+        data = b"".join(f"<field name=\"x_{i}\">{i * 7919}</field>\n".encode() for i in range(2048))
+        data += os.urandom(len(data))
+    return (data * (size // len(data) + 1))[:size]
+
+
+def _connect(
+    profile: dict,
+    cipher: Optional[str],
+    kex: Optional[str],
+    compression: bool,
+    timeout: float,
+) -> tuple:
+    """A started transport offering only `cipher` / `kex`, and its handshake time."""
+    sock = socket.create_connection((profile.get("host", ""), int(profile.get("port", 22))), timeout=timeout)
+    transport = paramiko.Transport(sock)
+    try:
+        options = transport.get_security_options()
+        if cipher:
+            options.ciphers = (cipher,)
+        if kex:
+            options.kex = (kex,)
+        transport.use_compression(compression)
+        start = time.perf_counter()
+        transport.start_client(timeout=timeout)
+        return transport, time.perf_counter() - start
+    except BaseException:
+        transport.close()
+        raise
+
+
+def _push_payload(transport: paramiko.Transport, payload: bytes, timeout: float) -> float:
+    """Seconds to stream `payload` into `cat > /dev/null` and see it exit."""
+    channel = transport.open_session(timeout=timeout)
+    try:
+        channel.exec_command(SINK_COMMAND)
+        view = memoryview(payload)
+        start = time.perf_counter()
+        for offset in range(0, len(payload), SEND_CHUNK_SIZE):
+            channel.sendall(view[offset:offset + SEND_CHUNK_SIZE])
+        channel.shutdown_write()
+        status = channel.recv_exit_status()
+        elapsed = time.perf_counter() - start
+    finally:
+        channel.close()
+    if status != 0:
+        raise paramiko.SSHException(f"`{SINK_COMMAND}` exited with status {status}")
+    return elapsed
+
+
+def measure(
+    profile: dict,
+    cipher: Optional[str],
+    compression: bool = False,
+    kex: Optional[str] = None,
+    payload: Optional[bytes] = None,
+    rounds: int = DEFAULT_ROUNDS,
+    timeout: float = probe.DEFAULT_TIMEOUT,
+) -> BenchResult:
+    """Time `rounds` handshakes (and payload pushes, when given). Never raises."""
+    result = BenchResult(cipher, compression, kex)
+    try:
+        for _ in range(rounds):
+            transport, seconds = _connect(profile, cipher, kex, compression, timeout)
+            try:
+                result.handshakes.append(seconds)
+                if payload:
+                    probe._authenticate(transport, profile)
+                    result.transfers.append(_push_payload(transport, payload, timeout))
+                    result.size = len(payload)
+            finally:
+                transport.close()
+    except Exception as e:  # noqa: BLE001 — recorded per algorithm
+        message = str(e) or type(e).__name__
+        if "Incompatible" in message:
+            message = "not offered by the server"
+        result.error = message
+    return result
+
+
+def run_bench(
+    profile: dict,
+    payload: bytes,
+    rounds: int = DEFAULT_ROUNDS,
+    timeout: float = probe.DEFAULT_TIMEOUT,
+    ciphers: Optional[Sequence[str]] = None,
+    kex: Optional[Sequence[str]] = None,
+    on_result: Optional[Callable[[BenchResult], None]] = None,
+) -> BenchReport:
+    """Benchmark every cipher, compression on the fastest, then every key exchange."""
+    report = BenchReport()
+
+    def record(result: BenchResult) -> BenchResult:
+        if on_result is not None:
+            on_result(result)
+        return result
+
+    for cipher in ciphers or supported_ciphers():
+        report.ciphers.append(record(measure(profile, cipher, payload=payload, rounds=rounds, timeout=timeout)))
+    best = report.fastest_cipher()
+    if best is None:
+        return report
+    report.compressed = record(
+        measure(profile, best.cipher, compression=True, payload=payload, rounds=rounds, timeout=timeout)
+    )
+    for method in kex or supported_kex():
+        report.kex.append(record(measure(profile, best.cipher, kex=method, rounds=rounds, timeout=timeout)))
+    return report
+
+
+__all__ = [
+    "DEFAULT_PAYLOAD_MB",
+    "DEFAULT_ROUNDS",
+    "BenchResult",
+    "BenchReport",
+    "build_payload",
+    "measure",
+    "run_bench",
+]
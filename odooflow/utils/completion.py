@@ -0,0 +1,192 @@
+"""
+Tab completion of remote paths and commands for `odooflow server connect`.
+
+Completions come from SFTP `listdir_attr` over one SFTP channel that stays
+open for the session. Listings are cached per directory for a short TTL,
+so pressing Tab repeatedly in the same directory costs no round-trip, and
+the shell prefetches the current directory in the background after every
+command so that even the first Tab is usually answered from the cache.
+
+Command names are the entries of the directories on the remote `$PATH`
+(read once per session) plus common shell builtins.
+"""
+
+from __future__ import annotations
+
+import posixpath
+import stat
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import paramiko
+
+
+DEFAULT_TTL = 5.0  # seconds a directory listing is trusted
+COMMANDS_TTL = 300.0  # $PATH contents change rarely
+
+BUILTINS = (
+    "alias", "cd", "echo", "exit", "export", "history", "printf", "pwd",
+    "read", "set", "source", "test", "type", "ulimit", "umask", "unset",
+)
+
+Listing = List[Tuple[str, bool]]  # (name, is_dir)
+
+
+class RemoteCompleter:
+    """Completion candidates for one SSH client, backed by a TTL listing cache."""
+
+    def __init__(self, client: paramiko.SSHClient, ttl: float = DEFAULT_TTL) -> None:
+        self._client = client
+        self.ttl = ttl
+        self._sftp: Optional[paramiko.SFTPClient] = None
+        self._home: Optional[str] = None
+        self._cache: Dict[str, Tuple[float, Listing]] = {}
+        self._commands: Optional[Tuple[float, List[str]]] = None
+        self._lock = threading.Lock()  # one SFTP request at a time
+        self._inflight: Set[str] = set()
+
+    # ---------- listings ---------- #
+
+    def _sftp_client(self) -> paramiko.SFTPClient:
+        if self._sftp is None:
+            self._sftp = self._client.open_sftp()
+            # SFTP sessions start in the login directory.
+            self._home = self._sftp.normalize(".")
+        return self._sftp
+
+    def _fresh(self, path: str, ttl: float) -> Optional[Listing]:
+        cached = self._cache.get(path)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        return None
+
+    def listdir(self, path: str) -> Listing:
+        """Entries of remote `path`, from the cache when it is fresh. [] if unreadable."""
+        cached = self._fresh(path, self.ttl)
+        if cached is not None:
+            return cached
+        with self._lock:
+            cached = self._fresh(path, self.ttl)  # a prefetch may have just filled it
+            if cached is not None:
+                return cached
+            try:
+                entries = [
+                    (attr.filename, stat.S_ISDIR(attr.st_mode or 0))
+                    for attr in self._sftp_client().listdir_attr(path)
+                ]
+            except (IOError, OSError, paramiko.SSHException):
+                entries = []
+            self._cache[path] = (time.monotonic(), entries)
+            return entries
+
+    def _key(self, path: str) -> str:
+        # The cache is keyed by absolute path; `~` and relative ones can be
+        # mapped without a round-trip once the login directory is known.
+        if path.startswith("/") or self._home is not None:
+            return self.resolve(path)
+        return path
+
+    def prefetch(self, path: Optional[str]) -> None:
+        """
+        Warm the cache for `path` (`~`, relative or absolute) in a background
+        thread (no-op if fresh or pending). Opening SFTP and finding the
+        login directory happen on that thread too, never on the caller's.
+        """
+        if not path or self._fresh(self._key(path), self.ttl) is not None or path in self._inflight:
+            return
+        self._inflight.add(path)
+
+        def work() -> None:
+            try:
+                self.listdir(self.resolve(path))
+            except Exception:  # noqa: BLE001 — prefetch is best-effort
+                pass
+            finally:
+                self._inflight.discard(path)
+
+        threading.Thread(target=work, name="odooflow-complete-prefetch", daemon=True).start()
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Forget one listing (or all), e.g. after a command that may have changed files."""
+        if path is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(self._key(path), None)
+
+    def commands(self) -> List[str]:
+        """Executable names on the remote $PATH plus shell builtins."""
+        if self._commands and time.monotonic() - self._commands[0] < COMMANDS_TTL:
+            return self._commands[1]
+        names = set(BUILTINS)
+        try:
+            _, stdout, _ = self._client.exec_command('printf %s "$PATH"', timeout=10)
+            path_var = stdout.read().decode("utf-8", errors="replace")
+        except (paramiko.SSHException, OSError, EOFError):
+            path_var = ""
+        for directory in filter(None, path_var.split(":")):
+            names.update(name for name, is_dir in self.listdir(directory) if not is_dir)
+        self._commands = (time.monotonic(), sorted(names))
+        return self._commands[1]
+
+    def close(self) -> None:
+        if self._sftp is not None:
+            try:
+                self._sftp.close()
+            finally:
+                self._sftp = None
+
+    # ---------- completion ---------- #
+
+    def _absolute(self, path: str) -> str:
+        # Same rules as ssh.resolve_remote_path, but with the login directory cached.
+        if path.startswith("/"):
+            return path
+        if self._home is None:
+            with self._lock:  # the prefetch thread may be opening it too
+                self._sftp_client()
+        home = self._home or "."
+        if path == "~" or path.startswith("~/"):
+            return home + path[1:]
+        return posixpath.join(home, path)
+
+    def resolve(self, path: str, cwd: str = "") -> str:
+        """
+        Absolute, normalised form of remote `path`: `~` is the login
+        directory, and a relative path is taken from `cwd` (itself `~`,
+        relative or absolute) or from the login directory.
+        """
+        if path == "~" or path.startswith(("/", "~/")):
+            return posixpath.normpath(self._absolute(path))
+        return posixpath.normpath(posixpath.join(self._absolute(cwd or "~"), path or "."))
+
+    def complete(self, line: str, cursor: int, cwd: str) -> Tuple[int, List[str]]:
+        """
+        Candidates for the word ending at `cursor`. Returns (start, words):
+        each word replaces `line[start:cursor]`. Directories end in "/".
+        """
+        before = line[:cursor]
+        start = max(before.rfind(" "), before.rfind("\t")) + 1
+        word = before[start:]
+        preceding = before[:start].split()
+
+        if not preceding and "/" not in word:
+            return start, [name for name in self.commands() if name.startswith(word)]
+
+        directory, _, partial = word.rpartition("/")
+        if word.startswith("/") and not directory:
+            directory = "/"
+        listing = self.listdir(self.resolve(directory, cwd))
+        dirs_only = preceding[:1] == ["cd"]
+        prefix = word[: len(word) - len(partial)]
+        words = [
+            prefix + name + ("/" if is_dir else "")
+            for name, is_dir in sorted(listing)
+            if name.startswith(partial)
+            and (partial.startswith(".") or not name.startswith("."))
+            and (is_dir or not dirs_only)
+        ]
+        return start, words
+
+
+__all__ = ["DEFAULT_TTL", "BUILTINS", "RemoteCompleter"]
@@ -0,0 +1,141 @@
+"""
+One authenticated SSH connection per host, shared by everything a command does.
+
+paramiko multiplexes any number of channels (exec, SFTP, port forwards)
+over a single transport, so a command that needs several round-trips to
+the same server only has to pay for one key exchange and one
+authentication:
+
+    with ConnectionManager() as connections:
+        client = connections.client_for_profile(profile)
+        client.exec_command(...)          # new channel, same transport
+        sftp = client.open_sftp()         # another one
+
+Callers must not close the clients they get; the manager closes them all
+on `close_all()` / exit. A client whose transport died is transparently
+replaced on the next request. Keepalives stop idle NAT / firewall entries
+from expiring between uses.
+
+When `odooflow ssh-agentd` is running, clients are borrowed from it
+instead (see `odooflow.utils.agentd`), so even separate invocations skip
+the handshake.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Optional, Tuple
+
+import paramiko
+
+from odooflow.utils import agentd
+from odooflow.utils.metrics import PushMetrics
+from odooflow.utils.ssh import open_ssh_client
+from odooflow.utils.tuning import SSHTuning
+
+
+DEFAULT_KEEPALIVE = 30  # seconds
+DEFAULT_TIMEOUT = 10  # seconds, for TCP connect and auth
+
+_Key = Tuple[str, str, int]
+
+
+class ConnectionManager:
+    """Cache of authenticated `paramiko.SSHClient`s keyed by (user, host, port)."""
+
+    def __init__(
+        self,
+        keepalive: int = DEFAULT_KEEPALIVE,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+        use_agentd: bool = True,
+        allow_agent: bool = True,
+    ):
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.use_agentd = use_agentd
+        # Passed to `open_ssh_client`: also try the ssh-agent and ~/.ssh keys.
+        self.allow_agent = allow_agent
+        self._clients: Dict[_Key, paramiko.SSHClient] = {}
+        self._locks: Dict[_Key, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    @staticmethod
+    def _is_alive(client: paramiko.SSHClient) -> bool:
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def client(
+        self,
+        user: str,
+        host: str,
+        port: int = 22,
+        key_path: Optional[str] = None,
+        password: Optional[str] = None,
+        strict_host_key_checking: bool = False,
+        metrics: Optional[PushMetrics] = None,
+        tuning: Optional[SSHTuning] = None,
+    ) -> paramiko.SSHClient:
+        """Return a live client for user@host:port, connecting only if needed."""
+        key = (user, host, int(port))
+        with self._guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            cached = self._clients.get(key)
+            if cached is not None and self._is_alive(cached):
+                return cached
+            if cached is not None:
+                cached.close()
+            if self.use_agentd:
+                proxied = agentd.connect(
+                    user, host, int(port), key_path, password, strict_host_key_checking, tuning=tuning,
+                    allow_agent=self.allow_agent,
+                )
+                if proxied is not None:
+                    self._clients[key] = proxied
+                    return proxied
+            client = open_ssh_client(
+                user, host, int(port), key_path, password, strict_host_key_checking,
+                metrics=metrics, timeout=self.timeout, tuning=tuning, allow_agent=self.allow_agent,
+            )
+            if self.keepalive:
+                client.get_transport().set_keepalive(self.keepalive)
+            self._clients[key] = client
+            return client
+
+    def client_for_profile(
+        self,
+        profile: dict,
+        password: Optional[str] = None,
+        metrics: Optional[PushMetrics] = None,
+    ) -> paramiko.SSHClient:
+        """`client()` for a server profile; `password` overrides a prompt-only profile."""
+        return self.client(
+            profile["user"],
+            profile["host"],
+            int(profile.get("port", 22)),
+            key_path=profile.get("key_path") or profile.get("key"),
+            password=password if password is not None else profile.get("password"),
+            metrics=metrics,
+            tuning=SSHTuning.from_profile(profile),
+        )
+
+    def close(self, user: str, host: str, port: int = 22) -> None:
+        client = self._clients.pop((user, host, int(port)), None)
+        if client is not None:
+            client.close()
+
+    def close_all(self) -> None:
+        with self._guard:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+    def __enter__(self) -> "ConnectionManager":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close_all()
+
+
+__all__ = ["DEFAULT_KEEPALIVE", "ConnectionManager"]
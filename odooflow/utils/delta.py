@@ -0,0 +1,202 @@
+"""
+Git change sets for incremental deploys.
+
+After a successful upload `odooflow push` writes a small JSON marker
+(`.odooflow-deploy.json`) into the remote module directory recording the
+commit it shipped and the working-tree paths that were dirty at the time.
+The next push diffs that commit against HEAD, adds the working-tree
+changes, and ships only those paths.
+
+Whenever the history cannot be trusted (no marker, unknown commit, the
+deployed commit is not an ancestor of HEAD) `compute_changes` returns
+None and the caller falls back to a full upload.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath
+from typing import Iterable, List, Optional, Set
+
+from git import Git, GitCommandError, InvalidGitRepositoryError, NoSuchPathError, Repo
+
+
+MARKER_NAME = ".odooflow-deploy.json"
+
+
+class ChangeSet:
+    """Project-relative POSIX paths to upload and to delete on the remote."""
+
+    def __init__(self, upload: Iterable[str] = (), delete: Iterable[str] = ()):
+        self.upload: Set[str] = set(upload)
+        self.delete: Set[str] = set(delete)
+
+    def __bool__(self) -> bool:
+        return bool(self.upload or self.delete)
+
+    def __repr__(self) -> str:
+        return f"ChangeSet(upload={sorted(self.upload)!r}, delete={sorted(self.delete)!r})"
+
+
+# --------------------------------------------------------------------------- #
+# Local git inspection
+# --------------------------------------------------------------------------- #
+
+
+def _open_repo(local_path: Path) -> Optional[Repo]:
+    try:
+        return Repo(local_path, search_parent_directories=True)
+    except (InvalidGitRepositoryError, NoSuchPathError):
+        return None
+
+
+def _git(local_path: Path) -> Optional[Git]:
+    """A git command runner rooted at `local_path` (so `--relative` works)."""
+    if _open_repo(local_path) is None:
+        return None
+    return Git(str(local_path))
+
+
+def _parse_name_status(raw: str) -> List[str]:
+    """Return the paths of a `git diff --name-status -z --no-renames` listing."""
+    parts = [p for p in raw.split("\0") if p]
+    # Entries alternate: status, path.
+    return parts[1::2]
+
+
+def _is_excluded(rel_path: str, exclude_dirs: Set[str]) -> bool:
+    return any(part in exclude_dirs for part in Path(rel_path).parts)
+
+
+def head_sha(local_path: Path) -> Optional[str]:
+    """Return the HEAD commit of the repository containing `local_path`."""
+    repo = _open_repo(local_path)
+    if repo is None:
+        return None
+    try:
+        return repo.head.commit.hexsha
+    except ValueError:  # unborn branch, no commits yet
+        return None
+
+
+def working_tree_paths(local_path: Path) -> List[str]:
+    """
+    Paths that differ from HEAD in the working tree: staged and unstaged
+    modifications, deletions and untracked (non-ignored) files. Paths are
+    relative to `local_path`.
+    """
+    git = _git(local_path)
+    if git is None:
+        return []
+    try:
+        changed = _parse_name_status(
+            git.diff("--name-status", "-z", "--no-renames", "--relative", "HEAD")
+        )
+        untracked = [
+            p for p in git.ls_files("-z", "--others", "--exclude-standard").split("\0") if p
+        ]
+    except GitCommandError:
+        return []
+    return sorted(set(changed) | set(untracked))
+
+
+def compute_changes(
+    local_path: Path,
+    since_sha: Optional[str],
+    previously_dirty: Iterable[str] = (),
+    exclude_dirs: Optional[Set[str]] = None,
+) -> Optional[ChangeSet]:
+    """
+    Return the paths that must be uploaded / deleted to bring a remote that
+    has `since_sha` (plus `previously_dirty` working-tree files) up to the
+    current working tree, or None when a full upload is required.
+    """
+    local_path = Path(local_path)
+    exclude_dirs = exclude_dirs or set()
+    if not since_sha:
+        return None
+    git = _git(local_path)
+    if git is None:
+        return None
+
+    try:
+        # Fails both for unknown commits and for diverged histories.
+        git.merge_base("--is-ancestor", since_sha, "HEAD")
+        committed = _parse_name_status(
+            git.diff("--name-status", "-z", "--no-renames", "--relative", f"{since_sha}..HEAD")
+        )
+    except GitCommandError:
+        return None
+
+    candidates = set(committed) | set(working_tree_paths(local_path)) | set(previously_dirty)
+
+    # Classify by what is on disk right now: that is what a full upload
+    # would ship, so it is the state the remote must end up in.
+    changes = ChangeSet()
+    for rel in candidates:
+        if _is_excluded(rel, exclude_dirs):
+            continue
+        if os.path.lexists(local_path / rel) and not (local_path / rel).is_dir():
+            changes.upload.add(rel)
+        else:
+            changes.delete.add(rel)
+    return changes
+
+
+def type_changes(changes: ChangeSet) -> Set[str]:
+    """
+    Changed paths that are also the parent of another changed path: a file
+    that became a directory (`a` deleted, `a/x` uploaded) or the reverse.
+    On the remote these must go with `rm -rf` before anything is extracted.
+    """
+    changed = changes.upload | changes.delete
+    return changed & {parent.as_posix() for rel in changed for parent in PurePosixPath(rel).parents}
+
+
+# --------------------------------------------------------------------------- #
+# Remote marker
+# --------------------------------------------------------------------------- #
+
+
+def read_marker(sftp, module_root: str) -> dict:
+    """Return the deploy marker stored under `module_root`, or {}."""
+    try:
+        with sftp.open(f"{module_root}/{MARKER_NAME}", "r") as fh:
+            data = json.loads(fh.read().decode() or "{}")
+    except (IOError, OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def write_marker(sftp, module_root: str, local_path: Path, **extra) -> Optional[dict]:
+    """
+    Record the deployed HEAD (and the dirty working-tree paths shipped with
+    it) under `module_root`. Returns the marker, or None when `local_path`
+    is not inside a git repository.
+    """
+    sha = head_sha(local_path)
+    if not sha:
+        return None
+    marker = {
+        "sha": sha,
+        "dirty": working_tree_paths(local_path),
+        "deployed_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    marker.update(extra)
+    with sftp.open(f"{module_root}/{MARKER_NAME}", "w") as fh:
+        fh.write(json.dumps(marker, indent=2))
+    return marker
+
+
+__all__ = [
+    "MARKER_NAME",
+    "ChangeSet",
+    "head_sha",
+    "working_tree_paths",
+    "compute_changes",
+    "type_changes",
+    "read_marker",
+    "write_marker",
+]
@@ -0,0 +1,146 @@
+"""
+Server-side pull deploys.
+
+A profile with `"deploy_strategy": "git"` makes `odooflow push` skip the
+archive. The server fetches the pushed commit from the git host into a
+persistent bare clone:
+
+    <directory>/.odooflow-git/<module>.git
+
+Then it checks the module tree out of that clone into the live (or
+release) directory with `git archive | tar -x`. The clone keeps every
+object it has already seen, so each deploy fetches only the new
+commits. Nothing crosses the developer's uplink.
+
+The strategy needs a clean working tree, because uncommitted changes are
+in no commit. It also needs a server that can reach the repository.
+`git_url` in the profile overrides the local `origin` URL, e.g. for a
+server that pulls over HTTPS with a deploy token. When either
+requirement is missing, `PullUnavailable` is raised and the deploy
+falls back to the tar upload.
+"""
+
+from __future__ import annotations
+
+import shlex
+from pathlib import Path
+from typing import Iterable, Optional
+
+from git import InvalidGitRepositoryError, NoSuchPathError, Repo
+
+from odooflow.utils import delta
+
+
+STRATEGY_KEY = "deploy_strategy"
+GIT_URL_KEY = "git_url"
+STRATEGIES = ("tar", "git")
+GIT_DIR = ".odooflow-git"
+
+# Never let git wait for a password or a host-key confirmation on the server.
+_NON_INTERACTIVE = "GIT_TERMINAL_PROMPT=0 GIT_SSH_COMMAND='ssh -o BatchMode=yes'"
+
+
+class PullUnavailable(RuntimeError):
+    """The server cannot pull this deploy; the archive must be uploaded instead."""
+
+
+class GitSource:
+    """The commit to deploy, where the server fetches it from, and the module's path in the repo."""
+
+    def __init__(self, url: str, sha: str, subdir: str = "", branch: Optional[str] = None):
+        self.url = url
+        self.sha = sha
+        self.subdir = subdir
+        self.branch = branch
+
+    @classmethod
+    def for_checkout(
+        cls,
+        local_path: Path,
+        url: Optional[str] = None,
+        exclude_dirs: Optional[Iterable[str]] = None,
+    ) -> "GitSource":
+        """The HEAD of the checkout at `local_path`; raises PullUnavailable if it cannot be pulled."""
+        try:
+            repo = Repo(local_path, search_parent_directories=True)
+        except (InvalidGitRepositoryError, NoSuchPathError):
+            raise PullUnavailable("the project is not a git checkout")
+        sha = delta.head_sha(local_path)
+        if not sha:
+            raise PullUnavailable("the repository has no commits")
+
+        excluded = set(exclude_dirs or ())
+        dirty = [p for p in delta.working_tree_paths(local_path) if not delta._is_excluded(p, excluded)]
+        if dirty:
+            raise PullUnavailable(f"{len(dirty)} uncommitted change(s) are in no commit")
+
+        if not url:
+            try:
+                url = repo.remotes.origin.url
+            except (AttributeError, IndexError, ValueError):
+                raise PullUnavailable("no `origin` remote (set `git_url` in the profile)")
+
+        subdir = Path(local_path).resolve().relative_to(Path(repo.working_tree_dir).resolve()).as_posix()
+        branch = None if repo.head.is_detached else repo.active_branch.name
+        return cls(url, sha, "" if subdir == "." else subdir, branch)
+
+    def __repr__(self) -> str:
+        return f"GitSource({self.url!r}, {self.sha[:10]!r}, subdir={self.subdir!r}, branch={self.branch!r})"
+
+
+def git_dir(resolved_remote_path: str, module_name: str) -> str:
+    return f"{resolved_remote_path}/{GIT_DIR}/{module_name}.git"
+
+
+def pull_command(source: GitSource, repo_dir: str, target: str, exclude_dirs: Iterable[str] = ()) -> str:
+    """
+    One shell command that makes sure `source.sha` is in the clone at
+    `repo_dir` and extracts the module tree into `target`.
+
+    The branch is fetched first: servers commonly refuse to serve a bare
+    commit id. Only when that did not bring the commit is it requested by
+    id.
+    """
+    git = f"{_NON_INTERACTIVE} git --git-dir={shlex.quote(repo_dir)}"
+    commit = shlex.quote(f"{source.sha}^{{commit}}")
+    tree = shlex.quote(f"{source.sha}:{source.subdir}")
+    url = shlex.quote(source.url)
+    fetch_branch = (
+        f"{git} fetch --quiet --no-tags {url} "
+        f"{shlex.quote(f'+refs/heads/{source.branch}:refs/heads/{source.branch}')} || true; "
+        if source.branch else ""
+    )
+    excludes = "".join(f" --exclude={shlex.quote(name)}" for name in sorted(exclude_dirs))
+    return (
+        "command -v git >/dev/null || { echo 'git is not installed' >&2; exit 127; }; "
+        f"[ -d {shlex.quote(repo_dir)} ] || git init --quiet --bare {shlex.quote(repo_dir)} || exit 1; "
+        f"if ! {git} cat-file -e {commit} 2>/dev/null; then "
+        f"{fetch_branch}"
+        f"{git} cat-file -e {commit} 2>/dev/null || {git} fetch --quiet --no-tags {url} {shlex.quote(source.sha)} || exit 1; "
+        "fi; "
+        # Checked up front: a failing `git archive` would not fail the pipeline in sh.
+        f"{git} cat-file -e {tree} || exit 1; "
+        f"mkdir -p {shlex.quote(target)} && "
+        f"{git} archive --format=tar {tree} | tar -x -C {shlex.quote(target)}{excludes}"
+    )
+
+
+def pull(ssh, source: GitSource, repo_dir: str, target: str, exclude_dirs: Iterable[str] = ()) -> None:
+    """Run `pull_command` over `ssh`; raises PullUnavailable with git's own error on failure."""
+    stdin, stdout, stderr = ssh.exec_command(pull_command(source, repo_dir, target, exclude_dirs))
+    if stdout.channel.recv_exit_status() != 0:
+        message = stderr.read().decode(errors="replace").strip().splitlines()
+        raise PullUnavailable(message[-1] if message else "the server could not fetch the commit")
+
+
+__all__ = [
+    "STRATEGY_KEY",
+    "GIT_URL_KEY",
+    "STRATEGIES",
+    "GIT_DIR",
+    "PullUnavailable",
+    "GitSource",
+    "git_dir",
+    "pull_command",
+    "pull",
+]
@@ -0,0 +1,139 @@
+"""
+Background round-trip measurement and liveness check for one SSH transport.
+
+`server connect` keeps a `Heartbeat` next to its session. Every
+`interval` seconds it sends a `keepalive@openssh.com` global request with
+want-reply set and times the answer. Servers reply to unknown requests
+with a failure message, so any reply proves the link works. The traffic
+also keeps NAT mappings and idle firewalls open.
+
+After `misses` pings in a row go unanswered for `timeout` seconds each,
+or as soon as the transport reports itself inactive, the link is
+declared dead. The transport is then closed and `on_dead` is called. A
+shell can reconnect at once instead of waiting for the next command to
+fail.
+
+Transports without `global_request` (ssh-agentd proxies, whose daemon
+keeps its own connections alive) are left alone: `rtt_ms` stays None.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Optional
+
+
+DEFAULT_INTERVAL = 15.0  # seconds between pings
+DEFAULT_MISSES = 3  # consecutive unanswered pings before the link is dead
+PING_REQUEST = "keepalive@openssh.com"
+SMOOTHING = 0.3  # weight of the newest sample in `rtt_ms`
+
+
+class Heartbeat:
+    """Pings `transport` from a daemon thread; exposes the smoothed RTT."""
+
+    def __init__(
+        self,
+        transport,
+        interval: float = DEFAULT_INTERVAL,
+        timeout: Optional[float] = None,
+        misses: int = DEFAULT_MISSES,
+        on_dead: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self._transport = transport
+        self.interval = interval
+        self.timeout = timeout if timeout is not None else interval
+        self.misses = misses
+        self._on_dead = on_dead
+        self.rtt_ms: Optional[float] = None
+        self.last_rtt_ms: Optional[float] = None
+        self.dead_reason: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ping_thread: Optional[threading.Thread] = None
+
+    @property
+    def supported(self) -> bool:
+        return hasattr(self._transport, "global_request")
+
+    @property
+    def dead(self) -> bool:
+        return self.dead_reason is not None
+
+    def start(self) -> "Heartbeat":
+        if self.supported and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="odooflow-heartbeat", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+
+    # ---------- internals ---------- #
+
+    def _run(self) -> None:
+        missed = 0
+        while True:
+            if not self._transport.is_active():
+                self._declare_dead("the SSH transport closed")
+                return
+            rtt = self.ping()
+            if self._stop.is_set():
+                return
+            if rtt is None:
+                missed += 1
+                if missed >= self.misses:
+                    self._declare_dead(
+                        f"no reply to {missed} keepalives ({missed * self.timeout:g}s)"
+                    )
+                    return
+            else:
+                missed = 0
+            if self._stop.wait(self.interval):
+                return
+
+    def ping(self) -> Optional[float]:
+        """One round-trip in ms, or None without a reply within `timeout`."""
+        if self._ping_thread is not None and self._ping_thread.is_alive():
+            # The previous request is still unanswered; don't stack another.
+            self._ping_thread.join(self.timeout)
+            return None
+        replied = threading.Event()
+
+        def request() -> None:
+            try:
+                self._transport.global_request(PING_REQUEST, wait=True)
+            except Exception:  # noqa: BLE001 — a failed send is just a miss
+                return
+            if self._transport.is_active():
+                replied.set()
+
+        started = time.monotonic()
+        self._ping_thread = threading.Thread(target=request, name="odooflow-ping", daemon=True)
+        self._ping_thread.start()
+        self._ping_thread.join(self.timeout)
+        if not replied.is_set():
+            return None
+        sample = (time.monotonic() - started) * 1000
+        self.last_rtt_ms = sample
+        self.rtt_ms = sample if self.rtt_ms is None else (
+            SMOOTHING * sample + (1 - SMOOTHING) * self.rtt_ms
+        )
+        return sample
+
+    def _declare_dead(self, reason: str) -> None:
+        if self._stop.is_set():
+            return  # the owner closed the transport itself
+        self.dead_reason = reason
+        try:
+            self._transport.close()  # also releases a request still waiting for a reply
+        except Exception:  # noqa: BLE001
+            pass
+        if self._on_dead is not None:
+            self._on_dead(reason)
+
+
+__all__ = ["DEFAULT_INTERVAL", "DEFAULT_MISSES", "Heartbeat"]
@@ -0,0 +1,227 @@
+"""
+Persistent, indexed command history for `odooflow server connect`.
+
+Each profile gets an append-only file (one command per line, mode 0600)
+under ~/.cache/odooflow/history/. It is only read the first time the
+history is actually browsed, so opening a session stays instant however
+long the file has grown. Until then only its last line is read, so that
+a command repeating the newest entry is still not written twice.
+
+Two small indexes keep lookups fast with tens of thousands of entries:
+
+  * prefix buckets: the first 1-3 characters of every command -> the
+    entry numbers starting with them, for prefix-filtered Up / Down;
+  * trigrams: every 3-character substring -> the entry numbers containing
+    it, for Ctrl-R reverse search.
+
+Posting lists are `array("I")`s in ascending entry order, so "the most
+recent match before entry i" is a bisect plus a short backwards walk.
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import re
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+
+DEFAULT_MAX_ENTRIES = 50_000
+PREFIX_KEY_LENGTH = 3
+TAIL_CHUNK_SIZE = 4096
+_UNSAFE = re.compile(r"[^A-Za-z0-9._@-]+")
+
+
+def default_path(profile_name: str, user: str, host: str, port: int) -> Path:
+    """~/.cache/odooflow/history/<profile>__<user>@<host>_<port>.history"""
+    stem = _UNSAFE.sub("_", f"{profile_name}__{user}@{host}_{port}")
+    return Path.home() / ".cache" / "odooflow" / "history" / f"{stem}.history"
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class CommandHistory:
+    """Deque-like command history, optionally backed by a file."""
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.path = Path(path) if path is not None else None
+        self.max_entries = max_entries
+        self._entries: List[str] = []
+        self._prefixes: Dict[str, array] = {}
+        self._trigram_index: Dict[str, array] = {}
+        self._loaded = self.path is None
+        # Newest entry while the file is not loaded yet, read from its end on first need.
+        self._tail: Optional[str] = None
+        self._tail_read = False
+
+    # ---------- deque-like surface ---------- #
+
+    def append(self, command: str) -> None:
+        """Record `command` (consecutive duplicates and multi-line input are skipped)."""
+        if not command or "\n" in command:
+            return
+        if self._last() == command:
+            return
+        if self.path is not None:
+            self._write(command)
+        self._tail = command
+        if self._loaded:
+            self._add(command)
+            if len(self._entries) > self.max_entries + self.max_entries // 10:
+                self._reset(self._entries[-self.max_entries:])
+
+    def extend(self, commands) -> None:
+        for command in commands:
+            self.append(command)
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._entries)
+
+    def __getitem__(self, index: int) -> str:
+        self._ensure_loaded()
+        return self._entries[index]
+
+    def __iter__(self) -> Iterator[str]:
+        self._ensure_loaded()
+        return iter(list(self._entries))
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    # ---------- lookups ---------- #
+
+    def previous(self, prefix: str = "", before: Optional[int] = None) -> Optional[int]:
+        """Index of the newest entry before `before` that starts with `prefix`."""
+        self._ensure_loaded()
+        before = len(self._entries) if before is None else before
+        if not prefix:
+            return before - 1 if before > 0 else None
+        postings = self._prefixes.get(prefix[:PREFIX_KEY_LENGTH])
+        if postings is None:
+            return None
+        for position in range(bisect.bisect_left(postings, before) - 1, -1, -1):
+            index = postings[position]
+            if self._entries[index].startswith(prefix):
+                return index
+        return None
+
+    def next(self, prefix: str = "", after: int = -1) -> Optional[int]:
+        """Index of the oldest entry after `after` that starts with `prefix`."""
+        self._ensure_loaded()
+        if not prefix:
+            return after + 1 if after + 1 < len(self._entries) else None
+        postings = self._prefixes.get(prefix[:PREFIX_KEY_LENGTH])
+        if postings is None:
+            return None
+        for position in range(bisect.bisect_right(postings, after), len(postings)):
+            index = postings[position]
+            if self._entries[index].startswith(prefix):
+                return index
+        return None
+
+    def search(self, query: str, before: Optional[int] = None) -> Optional[int]:
+        """Index of the newest entry before `before` containing `query` (Ctrl-R)."""
+        self._ensure_loaded()
+        before = len(self._entries) if before is None else before
+        if not query:
+            return None
+        if len(query) < 3:
+            for index in range(before - 1, -1, -1):
+                if query in self._entries[index]:
+                    return index
+            return None
+        # Walk the rarest trigram's postings; the others are implied by `in`.
+        postings = min(
+            (self._trigram_index.get(gram) for gram in _trigrams(query)),
+            key=lambda p: len(p) if p is not None else -1,
+        )
+        if postings is None:
+            return None
+        for position in range(bisect.bisect_left(postings, before) - 1, -1, -1):
+            index = postings[position]
+            if query in self._entries[index]:
+                return index
+        return None
+
+    # ---------- storage ---------- #
+
+    def _add(self, command: str) -> None:
+        index = len(self._entries)
+        self._entries.append(command)
+        for length in range(1, min(PREFIX_KEY_LENGTH, len(command)) + 1):
+            self._prefixes.setdefault(command[:length], array("I")).append(index)
+        for gram in _trigrams(command):
+            self._trigram_index.setdefault(gram, array("I")).append(index)
+
+    def _reset(self, commands: List[str]) -> None:
+        self._entries, self._prefixes, self._trigram_index = [], {}, {}
+        for command in commands:
+            self._add(command)
+
+    def _last(self) -> Optional[str]:
+        if self._loaded:
+            return self._entries[-1] if self._entries else None
+        if not self._tail_read:
+            self._tail_read = True
+            self._tail = self._read_last_line()
+        return self._tail
+
+    def _read_last_line(self) -> Optional[str]:
+        """The newest entry in the file, read backwards from its end without loading it."""
+        try:
+            with open(self.path, "rb") as fh:
+                end = fh.seek(0, os.SEEK_END)
+                data = b""
+                while end > 0:
+                    start = max(0, end - TAIL_CHUNK_SIZE)
+                    fh.seek(start)
+                    data = fh.read(end - start) + data
+                    end = start
+                    lines = [line for line in data.split(b"\n") if line.strip()]
+                    # The first line of a chunk may be cut off; the last one is whole.
+                    if len(lines) > 1 or (lines and end == 0):
+                        return lines[-1].decode("utf-8", errors="replace")
+        except OSError:
+            pass
+        return None
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8", errors="replace") as fh:
+                lines = [line.rstrip("\n") for line in fh if line.strip()]
+        except OSError:
+            lines = []
+        if len(lines) > 2 * self.max_entries:
+            self._compact(lines[-self.max_entries:])
+        self._reset(lines[-self.max_entries:])
+
+    def _write(self, command: str) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            with os.fdopen(fd, "a", encoding="utf-8") as fh:
+                fh.write(command + "\n")
+        except OSError:
+            pass  # history is a convenience; never break the session over it
+
+    def _compact(self, lines: List[str]) -> None:
+        """Rewrite the file with only the newest entries, atomically."""
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write("\n".join(lines) + "\n")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+__all__ = ["DEFAULT_MAX_ENTRIES", "default_path", "CommandHistory"]
@@ -0,0 +1,159 @@
+"""
+Which Odoo modules does a change set touch?
+
+Changed paths are mapped to the module directory that contains them (the
+nearest parent with a `__manifest__.py`), then expanded with every local
+module that depends on one of those, directly or transitively. The result
+fills the `{changed_modules}` placeholder of `post_push_cmd` / `--exec`, so
+
+    odoo -c /etc/odoo.conf -u {changed_modules} --stop-after-init
+
+upgrades only what the push could have affected instead of `-u all`.
+
+Manifests are parsed with `ast.literal_eval` and cached per (path, mtime,
+size), so `push --watch` does not re-read them on every batch.
+"""
+
+from __future__ import annotations
+
+import ast
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+PLACEHOLDER = "{changed_modules}"
+MANIFEST_NAMES = ("__manifest__.py", "__openerp__.py")
+
+_manifest_cache: Dict[Path, Tuple[Tuple[int, int], dict]] = {}
+_cache_lock = threading.Lock()
+
+
+def read_manifest_cached(path: Path) -> dict:
+    """Parse a manifest, reusing the previous result while the file is unchanged. {} if unreadable."""
+    path = Path(path)
+    try:
+        st = path.stat()
+    except OSError:
+        return {}
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        cached = _manifest_cache.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    try:
+        data = ast.literal_eval(path.read_text())
+    except (OSError, SyntaxError, ValueError):
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    with _cache_lock:
+        _manifest_cache[path] = (stamp, data)
+    return data
+
+
+def _manifest_path(directory: Path) -> Optional[Path]:
+    for name in MANIFEST_NAMES:
+        candidate = directory / name
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def find_modules(root: Path, exclude_dirs: Optional[Set[str]] = None) -> Dict[str, str]:
+    """
+    Map module name -> directory relative to `root` ("" when `root` itself
+    is the module, the usual odooflow layout). Module directories are not
+    searched for nested modules.
+    """
+    root = Path(root)
+    exclude_dirs = exclude_dirs or set()
+    if _manifest_path(root):
+        return {root.name: ""}
+    modules = {}
+    for dirpath, dirs, _files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in exclude_dirs and not d.startswith("."))
+        here = Path(dirpath)
+        if here != root and _manifest_path(here):
+            modules[here.name] = here.relative_to(root).as_posix()
+            dirs[:] = []
+    return modules
+
+
+def module_for_path(rel_path: str, modules: Dict[str, str]) -> Optional[str]:
+    """The module owning `rel_path` (deepest module directory containing it)."""
+    best, best_len = None, -1
+    for name, directory in modules.items():
+        if directory == "" or rel_path == directory or rel_path.startswith(directory + "/"):
+            if len(directory) > best_len:
+                best, best_len = name, len(directory)
+    return best
+
+
+def reverse_dependencies(root: Path, modules: Dict[str, str]) -> Dict[str, Set[str]]:
+    """Module -> local modules that list it in `depends`."""
+    root = Path(root)
+    dependants: Dict[str, Set[str]] = {name: set() for name in modules}
+    for name, directory in modules.items():
+        manifest = _manifest_path(root / directory)
+        for dep in read_manifest_cached(manifest).get("depends", []) if manifest else []:
+            if dep in dependants:
+                dependants[dep].add(name)
+    return dependants
+
+
+def affected_modules(
+    root: Path,
+    changed_paths: Optional[Iterable[str]],
+    exclude_dirs: Optional[Set[str]] = None,
+) -> List[str]:
+    """
+    Sorted names of the local modules owning `changed_paths` plus everything
+    that depends on them. `changed_paths=None` (a full upload) means all.
+    """
+    modules = find_modules(root, exclude_dirs)
+    if changed_paths is None:
+        return sorted(modules)
+    touched = {module_for_path(p.rstrip("/"), modules) for p in changed_paths} - {None}
+    dependants = reverse_dependencies(root, modules)
+    affected = set()
+    pending = list(touched)
+    while pending:
+        name = pending.pop()
+        if name in affected:
+            continue
+        affected.add(name)
+        pending.extend(dependants.get(name, ()))
+    return sorted(affected)
+
+
+def expand_command(
+    command: str,
+    root: Path,
+    changed_paths: Optional[Iterable[str]],
+    exclude_dirs: Optional[Set[str]] = None,
+) -> Optional[str]:
+    """
+    Fill `{changed_modules}` in `command` with a comma-separated module list.
+    Returns None when the placeholder is used but no module was affected
+    (the command should be skipped); commands without it pass through.
+    """
+    if PLACEHOLDER not in command:
+        return command
+    modules = affected_modules(root, changed_paths, exclude_dirs)
+    if not modules:
+        return None
+    # str.replace, not format(): shell commands often contain braces.
+    return command.replace(PLACEHOLDER, ",".join(modules))
+
+
+__all__ = [
+    "PLACEHOLDER",
+    "read_manifest_cached",
+    "find_modules",
+    "module_for_path",
+    "reverse_dependencies",
+    "affected_modules",
+    "expand_command",
+]
@@ -0,0 +1,152 @@
+"""
+Remote log following for `odooflow server logs`.
+
+Each host runs one `tail -F` on its own exec channel. With a pattern, the
+tail is piped through `grep --line-buffered` on the server, so only the
+matching lines cross the wire.
+
+Lines from several hosts are merged by their own timestamps (the Odoo
+`YYYY-MM-DD HH:MM:SS,mmm` prefix, or ISO 8601). `LogMerger` holds each
+line for a short window before printing it, which absorbs the difference
+in network delay between hosts. Lines without a timestamp, such as
+traceback frames, take the timestamp of the line before them on the same
+host, so they stay attached to it.
+"""
+
+from __future__ import annotations
+
+import codecs
+import heapq
+import itertools
+import re
+import select
+import shlex
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from odooflow.utils.ssh import STREAM_CHUNK_SIZE, LineBuffer, send_signal
+
+
+DEFAULT_LOG_PATH = "/var/log/odoo/odoo-server.log"
+DEFAULT_MERGE_WINDOW = 0.5  # seconds a line may wait for earlier lines from slower hosts
+
+_TIMESTAMP = re.compile(r"^(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})(?:[,.](\d{1,6}))?")
+
+
+def tail_command(
+    path: str,
+    lines: int = 20,
+    pattern: Optional[str] = None,
+    ignore_case: bool = False,
+) -> str:
+    """The remote shell command following `path`, filtered by `pattern` (extended regex)."""
+    command = f"tail -n {int(lines)} -F -- {shlex.quote(path)}"
+    if pattern:
+        flags = "-E -i" if ignore_case else "-E"
+        command += f" | grep --line-buffered {flags} -e {shlex.quote(pattern)}"
+    return command
+
+
+def parse_timestamp(line: str) -> Optional[str]:
+    """A sortable "YYYY-MM-DD HH:MM:SS.ffffff" key for `line`, or None if it has none."""
+    match = _TIMESTAMP.match(line)
+    if not match:
+        return None
+    date, clock, fraction = match.groups()
+    return f"{date} {clock}.{(fraction or '').ljust(6, '0')}"
+
+
+class LogMerger:
+    """Reorders lines from several hosts by timestamp within a short window."""
+
+    def __init__(
+        self,
+        emit: Callable[[str, str, bool], None],
+        window: float = DEFAULT_MERGE_WINDOW,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._emit = emit  # emit(host, line, is_stderr)
+        self.window = window
+        self._clock = clock
+        self._heap: List[Tuple[str, int, float, str, str, bool]] = []
+        self._last_stamp: Dict[str, str] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, host: str, line: str, is_stderr: bool = False) -> None:
+        """Queue one line from `host` (thread-safe)."""
+        with self._lock:
+            stamp = parse_timestamp(line)
+            if stamp is None:
+                stamp = self._last_stamp.get(host, "")
+            else:
+                self._last_stamp[host] = stamp
+            heapq.heappush(
+                self._heap, (stamp, next(self._seq), self._clock(), host, line, is_stderr)
+            )
+
+    def flush(self, force: bool = False) -> int:
+        """Emit every line that has waited out the window (all of them with `force`)."""
+        ready = []
+        with self._lock:
+            now = self._clock()
+            while self._heap and (force or now - self._heap[0][2] >= self.window):
+                ready.append(heapq.heappop(self._heap))
+        for _, _, _, host, line, is_stderr in ready:
+            self._emit(host, line, is_stderr)
+        return len(ready)
+
+
+def follow(
+    client,
+    command: str,
+    on_line: Callable[[str], None],
+    on_error_line: Callable[[str], None],
+    stop: threading.Event,
+) -> Optional[int]:
+    """
+    Run `command` and feed its stdout / stderr to the callbacks line by line
+    until it exits or `stop` is set. Returns the exit status, or None when
+    stopped (the remote command is sent TERM and its channel closed).
+    """
+    channel = client.get_transport().open_session()
+    channel.exec_command(command)
+    decoders = {
+        "out": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+        "err": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+    }
+    buffers = {"out": LineBuffer(on_line), "err": LineBuffer(on_error_line)}
+
+    def _drain(final: bool = False) -> None:
+        while channel.recv_ready():
+            buffers["out"].feed(decoders["out"].decode(channel.recv(STREAM_CHUNK_SIZE)))
+        while channel.recv_stderr_ready():
+            buffers["err"].feed(decoders["err"].decode(channel.recv_stderr(STREAM_CHUNK_SIZE)))
+        if final:
+            for kind in ("out", "err"):
+                buffers[kind].feed(decoders[kind].decode(b"", final=True))
+                buffers[kind].flush()
+
+    try:
+        while not stop.is_set():
+            select.select([channel], [], [], 0.2)
+            _drain()
+            if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+                _drain(final=True)
+                return channel.recv_exit_status()
+        send_signal(channel, "TERM")
+        _drain(final=True)
+        return None
+    finally:
+        channel.close()
+
+
+__all__ = [
+    "DEFAULT_LOG_PATH",
+    "DEFAULT_MERGE_WINDOW",
+    "tail_command",
+    "parse_timestamp",
+    "LogMerger",
+    "follow",
+]
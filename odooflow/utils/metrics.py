@@ -0,0 +1,89 @@
+"""
+Per-phase timings and byte counters for `odooflow push`.
+
+`upload_directory_via_ssh` wraps each step (connect, auth, compress,
+upload, extract, cleanup, post_exec, ...) in `metrics.phase(...)` and
+bumps counters such as `bytes_uploaded`. The push command prints a one-line
+breakdown per server and can dump everything with `--metrics-json` so deploy
+time can be tracked across runs.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+# Display order for the breakdown; phases not listed here follow in the
+# order they were first recorded.
+PHASE_ORDER = (
+    "connect",
+    "auth",
+    "plan",
+    "compress",
+    "prepare",
+    "pull",
+    "upload",
+    "extract",
+    "delete",
+    "switch",
+    "cleanup",
+    "post_exec",
+)
+
+
+class PushMetrics:
+    """Wall-clock time per phase and named counters for one server."""
+
+    def __init__(self, server: Optional[str] = None):
+        self.server = server
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self._started = time.monotonic()
+        self._finished: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.monotonic() - started
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def finish(self) -> None:
+        if self._finished is None:
+            self._finished = time.monotonic()
+
+    @property
+    def total_seconds(self) -> float:
+        end = self._finished if self._finished is not None else time.monotonic()
+        return end - self._started
+
+    def ordered_phases(self) -> Dict[str, float]:
+        known = [p for p in PHASE_ORDER if p in self.phases]
+        extra = [p for p in self.phases if p not in PHASE_ORDER]
+        return {p: self.phases[p] for p in known + extra}
+
+    def summary(self) -> str:
+        parts = [f"{name} {seconds:.2f}s" for name, seconds in self.ordered_phases().items()]
+        uploaded = self.counters.get("bytes_uploaded")
+        upload_time = self.phases.get("upload")
+        if uploaded and upload_time:
+            parts.append(f"{uploaded / 2**20 / upload_time:.1f} MB/s")
+        parts.append(f"total {self.total_seconds:.2f}s")
+        return " · ".join(parts)
+
+    def to_dict(self) -> dict:
+        return {
+            "server": self.server,
+            "total_seconds": round(self.total_seconds, 4),
+            "phases": {k: round(v, 4) for k, v in self.ordered_phases().items()},
+            "counters": dict(self.counters),
+        }
+
+
+__all__ = ["PHASE_ORDER", "PushMetrics"]
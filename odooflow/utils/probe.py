@@ -0,0 +1,195 @@
+"""
+Staged SSH latency probes for `odooflow server test`.
+
+Each probe opens a fresh connection and times its three stages on their
+own, because they fail and degrade for different reasons:
+
+    tcp        socket.create_connection          (routing, firewalls)
+    handshake  version exchange + key exchange   (server CPU, ciphers)
+    auth       publickey / password              (PAM, LDAP, DNS lookups)
+
+Repeating the probe gives p50 / p95 figures, which say far more about a
+jittery VPN than a single sample. The last probe's transport is reused
+for the remote directory check, so that costs no extra handshake.
+"""
+
+from __future__ import annotations
+
+import math
+import socket
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import paramiko
+
+from odooflow.utils import keys
+from odooflow.utils.ssh import resolve_remote_path
+from odooflow.utils.tuning import SSHTuning
+
+
+STAGES = ("tcp", "handshake", "auth")
+DEFAULT_PROBES = 3  # with --all / --tag; a single profile is probed once unless asked
+DEFAULT_TIMEOUT = 10.0  # seconds, per stage
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list (`pct` in 0..100)."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class ProbeResult:
+    """Timings and outcome of probing one server profile."""
+
+    def __init__(self, name: str, profile: dict):
+        self.name = name
+        self.target = f"{profile.get('user', '')}@{profile.get('host', '')}:{int(profile.get('port', 22))}"
+        self.directory = profile.get("directory", "")
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.failed_stage: Optional[str] = None
+        self.error: Optional[str] = None
+        # True / False once checked; None when the check could not run.
+        self.directory_exists: Optional[bool] = None
+        self.directory_error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.failed_stage is None
+
+    def latency(self, stage: str) -> Optional[Tuple[float, float]]:
+        """(p50, p95) in milliseconds for `stage`, or None without samples."""
+        values = self.samples[stage]
+        if not values:
+            return None
+        return percentile(values, 50) * 1000.0, percentile(values, 95) * 1000.0
+
+    def to_metadata(self) -> dict:
+        """The `last_test_latency` value stored in the profile."""
+        data: dict = {"probes": len(self.samples["auth"])}
+        for stage in STAGES:
+            pair = self.latency(stage)
+            if pair is not None:
+                data[f"{stage}_ms"] = {"p50": round(pair[0], 1), "p95": round(pair[1], 1)}
+        return data
+
+
+DEFAULT_KEY_FILES = ("id_ed25519", "id_ecdsa", "id_rsa")
+
+
+def _default_keys() -> Iterator[paramiko.PKey]:
+    """The ssh-agent's keys, then the unencrypted ~/.ssh defaults, as paramiko's SSHClient tries them."""
+    agent = paramiko.Agent()
+    try:
+        yield from agent.get_keys()
+    finally:
+        agent.close()
+    for name in DEFAULT_KEY_FILES:
+        path = Path.home() / ".ssh" / name
+        if not path.is_file():
+            continue
+        try:
+            yield keys.load_private_key(str(path), interactive=False)
+        except (paramiko.SSHException, OSError, ValueError):
+            continue  # encrypted or unreadable: paramiko skips these as well
+
+
+def _authenticate(transport: paramiko.Transport, profile: dict) -> None:
+    # Same credentials as `client_for_profile`: the profile's key (`key_path`
+    # or its `key` alias) or password. A profile with neither relies on the
+    # ssh-agent or the default ~/.ssh keys, as push and the old test did.
+    user = profile.get("user", "")
+    key_path = profile.get("key_path") or profile.get("key")
+    password = profile.get("password")
+    if key_path:
+        transport.auth_publickey(user, keys.load_private_key(key_path))
+    elif password is not None:
+        transport.auth_password(user, password)
+    else:
+        for pkey in _default_keys():
+            try:
+                transport.auth_publickey(user, pkey)
+            except paramiko.AuthenticationException:
+                continue
+            if transport.is_authenticated():
+                return
+        raise paramiko.AuthenticationException(
+            "no key or password in the profile, and no ssh-agent or ~/.ssh key was accepted"
+        )
+    if not transport.is_authenticated():
+        raise paramiko.AuthenticationException("server asked for further authentication")
+
+
+def _probe_once(result: ProbeResult, profile: dict, timeout: float) -> paramiko.Transport:
+    """Run one staged connection, appending its timings. Caller closes the transport."""
+    host = profile.get("host", "")
+    port = int(profile.get("port", 22))
+
+    result.failed_stage = "tcp"
+    start = time.perf_counter()
+    sock = socket.create_connection((host, port), timeout=timeout)
+    result.samples["tcp"].append(time.perf_counter() - start)
+
+    transport = SSHTuning.from_profile(profile).apply(paramiko.Transport(sock))
+    try:
+        result.failed_stage = "handshake"
+        start = time.perf_counter()
+        transport.start_client(timeout=timeout)
+        result.samples["handshake"].append(time.perf_counter() - start)
+
+        result.failed_stage = "auth"
+        start = time.perf_counter()
+        _authenticate(transport, profile)
+        result.samples["auth"].append(time.perf_counter() - start)
+    except BaseException:
+        transport.close()
+        raise
+    result.failed_stage = None
+    return transport
+
+
+def probe_profile(
+    name: str,
+    profile: dict,
+    probes: int = DEFAULT_PROBES,
+    timeout: float = DEFAULT_TIMEOUT,
+    check_directory: bool = True,
+) -> ProbeResult:
+    """
+    Probe `profile` `probes` times, then stat its remote directory over the
+    last connection. Never raises for connection problems: the failing
+    stage and error are recorded on the result instead.
+    """
+    result = ProbeResult(name, profile)
+    transport = None
+    try:
+        for _ in range(max(1, probes)):
+            if transport is not None:
+                transport.close()
+            transport = _probe_once(result, profile, timeout)
+    except Exception as e:  # noqa: BLE001
+        result.error = str(e) or type(e).__name__
+        transport = None
+
+    if transport is None:
+        return result
+    try:
+        if check_directory and result.directory:
+            try:
+                sftp = paramiko.SFTPClient.from_transport(transport)
+                try:
+                    sftp.stat(resolve_remote_path(sftp, result.directory))
+                    result.directory_exists = True
+                except IOError:
+                    result.directory_exists = False
+                finally:
+                    sftp.close()
+            except Exception as e:  # noqa: BLE001
+                result.directory_error = str(e) or type(e).__name__
+    finally:
+        transport.close()
+    return result
+
+
+__all__ = ["STAGES", "DEFAULT_PROBES", "DEFAULT_TIMEOUT", "percentile", "ProbeResult", "probe_profile"]
@@ -0,0 +1,178 @@
+"""
+One long-lived `invoke_shell` PTY channel, driven command by command.
+
+`server connect --persistent` runs every line through the same remote
+shell instead of a fresh `exec_command` channel, so `cd`, `export`,
+`source venv/bin/activate` and friends persist, and each command skips
+the channel-open round-trip.
+
+The shell is told to stop echoing and prompting; after each command a
+sentinel line carrying the exit status and `$PWD` is printed:
+
+    <command>
+    printf '\\n__ODOOFLOW_<nonce>_<seq>__:%d:%s\\n' "$?" "$PWD"
+
+Everything before the sentinel is the command's output (stdout and
+stderr merged, as on any terminal) and is streamed as it arrives. The
+sequence number lets stale sentinels, e.g. one re-sent after Ctrl-C,
+be recognised and dropped.
+"""
+
+from __future__ import annotations
+
+import codecs
+import re
+import secrets
+import select
+import time
+from typing import Callable, Optional
+
+import paramiko
+
+from odooflow.utils.ssh import STREAM_CHUNK_SIZE, quote_remote_path
+
+
+DEFAULT_TERM = "xterm-256color"
+OPEN_TIMEOUT = 15.0  # seconds for the shell to come up and settle
+
+_SETUP = "stty -echo 2>/dev/null; unset PROMPT_COMMAND; PS1=''; PS2=''; export PAGER=cat GIT_PAGER=cat"
+
+
+class RemoteShell:
+    """A stateful remote shell on one PTY channel of `client`."""
+
+    def __init__(
+        self,
+        client: paramiko.SSHClient,
+        directory: Optional[str] = None,
+        *,
+        term: str = DEFAULT_TERM,
+        width: int = 80,
+        height: int = 24,
+    ) -> None:
+        self._client = client
+        self.cwd = directory
+        self._term = term
+        self._size = (width, height)
+        self._channel = None
+        self._nonce = secrets.token_hex(4)
+        self._seq = 0
+        self._sentinel = re.compile(
+            rf"\r?\n?__ODOOFLOW_{self._nonce}_(\d+)__:(\d+):([^\r\n]*)\r?\n"
+        )
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+
+    # ---------- lifecycle ---------- #
+
+    def open(self) -> None:
+        """Start the shell, silence it and move to the start directory."""
+        width, height = self._size
+        self._channel = self._client.invoke_shell(term=self._term, width=width, height=height)
+        setup = _SETUP
+        if self.cwd:
+            setup += f"; cd {quote_remote_path(self.cwd)}"
+        # The login banner and the echo of the setup line are discarded.
+        self._send_with_sentinel(setup)
+        self._read_until_sentinel(None, deadline=time.monotonic() + OPEN_TIMEOUT)
+
+    def close(self) -> None:
+        if self._channel is not None:
+            try:
+                self._channel.close()
+            finally:
+                self._channel = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._channel is not None and not self._channel.closed
+
+    def resize(self, width: int, height: int) -> None:
+        self._size = (width, height)
+        if self._channel is not None:
+            self._channel.resize_pty(width=width, height=height)
+
+    # ---------- commands ---------- #
+
+    def run(self, command: str, on_output: Callable[[str], None]) -> int:
+        """
+        Run `command` in the shell, streaming its output to `on_output`.
+        Returns the exit status; `cwd` is updated. Ctrl-C interrupts the
+        remote command (as on a local terminal) and the shell stays usable.
+        Raises EOFError when the channel closes (e.g. the user ran `exit`).
+        """
+        self._send_with_sentinel(command)
+        while True:
+            try:
+                return self._read_until_sentinel(on_output)
+            except KeyboardInterrupt:
+                self.interrupt()
+
+    def interrupt(self) -> None:
+        """Send Ctrl-C. The terminal may drop the queued sentinel, so send a fresh one."""
+        self._channel.send(b"\x03")
+        self._send_with_sentinel("")
+
+    # ---------- internals ---------- #
+
+    def _send_with_sentinel(self, command: str) -> None:
+        self._seq += 1
+        line = f"printf '\\n__ODOOFLOW_{self._nonce}_{self._seq}__:%d:%s\\n' \"$?\" \"$PWD\""
+        payload = f"{command}\n{line}\n" if command else f"{line}\n"
+        self._channel.sendall(payload.encode("utf-8"))
+
+    def _read_until_sentinel(
+        self,
+        on_output: Optional[Callable[[str], None]],
+        deadline: Optional[float] = None,
+    ) -> int:
+        while True:
+            match = self._sentinel.search(self._pending)
+            while match and int(match.group(1)) != self._seq:
+                # A stale sentinel (from before an interrupt): drop it.
+                self._emit(on_output, self._pending[:match.start()])
+                self._pending = self._pending[match.end():]
+                match = self._sentinel.search(self._pending)
+            if match:
+                self._emit(on_output, self._pending[:match.start()])
+                self._pending = self._pending[match.end():]
+                self.cwd = match.group(3) or self.cwd
+                return int(match.group(2))
+
+            flushable = self._flushable()
+            if flushable:
+                self._emit(on_output, self._pending[:flushable])
+                self._pending = self._pending[flushable:]
+
+            wait = 0.5
+            if deadline is not None:
+                wait = deadline - time.monotonic()
+                if wait <= 0:
+                    raise paramiko.SSHException("Remote shell did not respond in time.")
+            select.select([self._channel], [], [], min(wait, 0.5))
+            if self._channel.recv_ready():
+                data = self._channel.recv(STREAM_CHUNK_SIZE)
+                if not data:
+                    raise EOFError("remote shell closed")
+                self._pending += self._decoder.decode(data)
+            elif self._channel.closed or self._channel.exit_status_ready():
+                raise EOFError("remote shell closed")
+
+    def _flushable(self) -> int:
+        """How much of `_pending` cannot turn into a sentinel as more data arrives."""
+        text = self._pending
+        head = f"__ODOOFLOW_{self._nonce}_"
+        newline = text.rfind("\n")
+        if newline >= 0:
+            tail = text[newline + 1:]
+            if tail.startswith(head) or head.startswith(tail):
+                return newline - 1 if newline > 0 and text[newline - 1] == "\r" else newline
+        return len(text) - 1 if text.endswith("\r") else len(text)
+
+    @staticmethod
+    def _emit(on_output: Optional[Callable[[str], None]], text: str) -> None:
+        if text and on_output is not None:
+            on_output(text.replace("\r\n", "\n"))
+
+
+__all__ = ["DEFAULT_TERM", "RemoteShell"]
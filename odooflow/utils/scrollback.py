@@ -0,0 +1,133 @@
+"""
+Memory-bounded scrollback for `odooflow server connect`.
+
+Entries are `(kind, text)` pairs ("cmd", "out", "err", "exit"). The newest
+ones stay in memory up to `memory_limit` characters; older ones are
+spilled, a batch at a time, to a gzip-compressed JSON-lines segment file
+(mode 0600, removed on `close()`). A day of tailing logs therefore costs a
+few MB of RAM and a compressed temp file, and a reconnect replays only
+`tail(lines)` — the last few screens — instead of everything.
+
+Iterating a `Scrollback` yields every entry, oldest first, reading the
+spilled part back from disk.
+"""
+
+from __future__ import annotations
+
+import collections
+import gzip
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Deque, Iterator, List, Optional, Tuple
+
+
+DEFAULT_MEMORY_LIMIT = 8 * 1024 * 1024  # characters kept in memory
+SPILL_TARGET = 0.75  # after spilling, memory use drops to this fraction of the cap
+
+Entry = Tuple[str, str]
+
+
+class Scrollback:
+    """Append-only `(kind, text)` log with an in-memory tail and a gzip spill file."""
+
+    def __init__(
+        self,
+        memory_limit: int = DEFAULT_MEMORY_LIMIT,
+        spill_dir: Optional[Path] = None,
+    ) -> None:
+        self.memory_limit = memory_limit
+        self._spill_dir = spill_dir
+        self._entries: Deque[Entry] = collections.deque()
+        self._size = 0
+        self._spill_path: Optional[Path] = None
+        self.spilled = 0  # entries on disk
+
+    # ---------- list-like surface ---------- #
+
+    def append(self, entry: Entry) -> None:
+        kind, text = entry
+        self._entries.append((kind, text))
+        self._size += len(text)
+        if self._size > self.memory_limit:
+            self._spill()
+
+    def __len__(self) -> int:
+        return self.spilled + len(self._entries)
+
+    def __iter__(self) -> Iterator[Entry]:
+        yield from self._read_spilled()
+        yield from list(self._entries)
+
+    def __contains__(self, entry: object) -> bool:
+        return any(candidate == entry for candidate in self)
+
+    # ---------- replay ---------- #
+
+    def tail(self, lines: int) -> List[Entry]:
+        """The newest entries spanning at most `lines` lines; the oldest one may be cut."""
+        picked: List[Entry] = []
+        remaining = lines
+        for kind, text in self._newest_first():
+            if remaining <= 0:
+                break
+            text_lines = text.splitlines(keepends=True) or [text]
+            if len(text_lines) > remaining:
+                text = "".join(text_lines[-remaining:])
+            picked.append((kind, text))
+            remaining -= len(text_lines)
+        picked.reverse()
+        return picked
+
+    def _newest_first(self) -> Iterator[Entry]:
+        yield from reversed(list(self._entries))
+        if self.spilled:
+            yield from reversed(list(self._read_spilled()))
+
+    # ---------- spill file ---------- #
+
+    def _spill(self) -> None:
+        target = int(self.memory_limit * SPILL_TARGET)
+        batch = []
+        while self._entries and self._size > target:
+            kind, text = self._entries.popleft()
+            self._size -= len(text)
+            batch.append(json.dumps({"k": kind, "t": text}, ensure_ascii=False))
+        if not batch:
+            return
+        if self._spill_path is None:
+            if self._spill_dir is not None:
+                Path(self._spill_dir).mkdir(parents=True, exist_ok=True)
+            fd, name = tempfile.mkstemp(
+                prefix="odooflow-scrollback-", suffix=".jsonl.gz", dir=self._spill_dir
+            )
+            os.close(fd)  # mkstemp already created it 0600
+            self._spill_path = Path(name)
+        # Each batch is its own gzip member; gzip readers concatenate them.
+        with gzip.open(self._spill_path, "at", encoding="utf-8") as fh:
+            fh.write("\n".join(batch) + "\n")
+        self.spilled += len(batch)
+
+    def _read_spilled(self) -> Iterator[Entry]:
+        if self._spill_path is None:
+            return
+        with gzip.open(self._spill_path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                record = json.loads(line)
+                yield record["k"], record["t"]
+
+    def close(self) -> None:
+        """Drop everything and delete the spill file."""
+        self._entries.clear()
+        self._size = 0
+        self.spilled = 0
+        if self._spill_path is not None:
+            try:
+                self._spill_path.unlink()
+            except OSError:
+                pass
+            self._spill_path = None
+
+
+__all__ = ["DEFAULT_MEMORY_LIMIT", "Scrollback"]
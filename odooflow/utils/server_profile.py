@@ -7,7 +7,13 @@ Schema (in .odooflow.env.json under `remotes`):
       "staging": {
         "host": "...", "port": 22, "user": "...",
         "directory": "...", "key_path": "...", "password": "...",
-        "post_push_cmd": "..."
+        "post_push_cmd": "...", "tags": ["prod", "eu"],
+        "log_path": "/var/log/odoo/odoo-server.log",
+        "ssh_ciphers": ["aes128-gcm@openssh.com"], "ssh_kex": [...],
+        "ssh_compression": false,
+        "release_mode": false, "keep_releases": 5,
+        "deploy_strategy": "tar", "git_url": "git@gitlab.example.com:team/module.git",
+        "sftp_channels": 1, "sftp_window_size": 67108864, "sftp_packet_size": 32768
       }
     },
     "default_server": "staging",
@@ -35,14 +41,41 @@ ALLOWED_KEYS = frozenset(
         "key_path",
         "directory",
         "post_push_cmd",
+        "post_push_timeout",
+        "release_mode",
+        "keep_releases",
+        "deploy_strategy",
+        "git_url",
+        "sftp_channels",
+        "sftp_window_size",
+        "sftp_packet_size",
+        "tags",
+        "log_path",
+        # SSH algorithm preferences, usually written by `server bench`:
+        "ssh_ciphers",
+        "ssh_kex",
+        "ssh_compression",
         # Runtime metadata, written silently by `server test` and `push`:
         "last_used",
         "last_test_ok",
+        "last_test_latency",
+        "last_deployed_sha",
     }
 )
 
 REQUIRED_KEYS = ("host", "user", "directory")
 
+INTEGER_KEYS = frozenset(
+    {
+        "port",
+        "post_push_timeout",
+        "keep_releases",
+        "sftp_channels",
+        "sftp_window_size",
+        "sftp_packet_size",
+    }
+)
+
 LEGACY_KEY = "server"
 NEW_KEY = "servers"
 DEFAULT_KEY = "default_server"
@@ -153,6 +186,48 @@ def validate_profile(profile: dict) -> List[str]:
     if password is not None and not isinstance(password, str):
         errors_list.append("'password' must be a string")
 
+    release_mode = profile.get("release_mode")
+    if release_mode is not None and not isinstance(release_mode, bool):
+        errors_list.append("'release_mode' must be true or false")
+
+    strategy = profile.get("deploy_strategy")
+    if strategy is not None and strategy not in ("tar", "git"):
+        errors_list.append(f"'deploy_strategy' must be 'tar' or 'git' (got {strategy!r})")
+
+    git_url = profile.get("git_url")
+    if git_url is not None and (not isinstance(git_url, str) or not git_url.strip()):
+        errors_list.append("'git_url' must be a non-empty string")
+
+    log_path = profile.get("log_path")
+    if log_path is not None and (not isinstance(log_path, str) or not log_path.strip()):
+        errors_list.append("'log_path' must be a non-empty string")
+
+    for key in ("ssh_ciphers", "ssh_kex"):
+        value = profile.get(key)
+        if value is not None and (
+            not isinstance(value, list) or not all(isinstance(v, str) and v for v in value)
+        ):
+            errors_list.append(f"'{key}' must be a list of algorithm names")
+
+    compression = profile.get("ssh_compression")
+    if compression is not None and not isinstance(compression, bool):
+        errors_list.append("'ssh_compression' must be true or false")
+
+    tags = profile.get("tags")
+    if tags is not None and (
+        not isinstance(tags, list) or not all(isinstance(t, str) and t.strip() for t in tags)
+    ):
+        errors_list.append("'tags' must be a list of non-empty strings")
+
+    for key in sorted(INTEGER_KEYS - {"port"}):
+        value = profile.get(key)
+        if value is None:
+            continue
+        if not isinstance(value, int) or isinstance(value, bool):
+            errors_list.append(f"'{key}' must be an integer")
+        elif value < 1:
+            errors_list.append(f"'{key}' must be at least 1")
+
     return errors_list
 
 
@@ -162,7 +237,7 @@ def sanitise_profile(profile: dict) -> dict:
     for key, value in profile.items():
         if key not in ALLOWED_KEYS:
             continue
-        if key == "port" and isinstance(value, str) and value.isdigit():
+        if key in INTEGER_KEYS and isinstance(value, str) and value.isdigit():
             cleaned[key] = int(value)
         elif key == "key_path" and isinstance(value, str):
             cleaned[key] = str(Path(value).expanduser())
@@ -213,6 +288,15 @@ def select_profile(
     return None, None
 
 
+def select_by_tags(servers: Dict[str, dict], tags: List[str]) -> List[str]:
+    """Names of the profiles carrying every one of `tags`, in config order."""
+    wanted = set(tags)
+    return [
+        name for name, profile in servers.items()
+        if wanted <= set(profile.get("tags") or [])
+    ]
+
+
 # --------------------------------------------------------------------------- #
 # Persistence
 # --------------------------------------------------------------------------- #
@@ -286,6 +370,30 @@ def remove_profile(env_path: Path, env: dict, profile_name: str) -> bool:
     return True
 
 
+def record_metadata(env_path: Path, env: dict, profile_name: str, **fields) -> dict:
+    """
+    Merge runtime metadata (e.g. `last_used`, `last_deployed_sha`) into an
+    existing named profile and persist it. Silent by design: profiles that
+    only exist in the legacy form are left untouched, unknown keys are
+    dropped, and no validation is run. Returns the updated env dict.
+    """
+    servers = load_remotes(env).get(NEW_KEY)
+    if not isinstance(servers, dict) or not isinstance(servers.get(profile_name), dict):
+        return env
+    env = dict(env)
+    env["remotes"] = dict(env.get("remotes", {}))
+    env["remotes"][NEW_KEY] = dict(servers)
+    profile = dict(servers[profile_name])
+    profile.update({k: v for k, v in fields.items() if k in ALLOWED_KEYS})
+    env["remotes"][NEW_KEY][profile_name] = profile
+    env_path.write_text(json.dumps(env, indent=4))
+    try:
+        env_path.chmod(0o600)
+    except OSError:
+        pass
+    return env
+
+
 def set_default(env_path: Path, env: dict, profile_name: str) -> dict:
     """Persist `default_server = profile_name`. Returns the updated env dict."""
     env = dict(env)
@@ -302,6 +410,7 @@ def set_default(env_path: Path, env: dict, profile_name: str) -> dict:
 __all__ = [
     "ALLOWED_KEYS",
     "REQUIRED_KEYS",
+    "INTEGER_KEYS",
     "LEGACY_KEY",
     "NEW_KEY",
     "DEFAULT_KEY",
@@ -313,7 +422,9 @@ __all__ = [
     "validate_profile",
     "sanitise_profile",
     "select_profile",
+    "select_by_tags",
     "save_profile",
     "remove_profile",
+    "record_metadata",
     "set_default",
 ]
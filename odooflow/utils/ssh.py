@@ -1,10 +1,24 @@
+import codecs
 import os
+import posixpath
+import select
+import shlex
+import socket
 import tarfile
 import tempfile
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Set
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set
 import paramiko
 import hashlib
+from tqdm import tqdm
+
+from odooflow.utils import delta, gitpull, impact, keys, transfer, treehash
+from odooflow.utils.metrics import PushMetrics
+from odooflow.utils.tuning import SSHTuning
 
 
 def resolve_remote_path(sftp, path: str) -> str:
@@ -21,29 +35,489 @@ def resolve_remote_path(sftp, path: str) -> str:
         return path
 
 
-def compress_directory(source_dir: Path, exclude_dirs: Optional[Set[str]] = None) -> Path:
+def quote_remote_path(path: str) -> str:
+    """
+    `shlex.quote` for a path used in a remote shell command, leaving a
+    leading `~` unquoted so the shell still expands it.
+    """
+    if path == "~" or path == "~/":
+        return "~"
+    if path.startswith("~/"):
+        return "~/" + shlex.quote(path[2:])
+    return shlex.quote(path)
+
+
+def compress_directory(
+    source_dir: Path,
+    exclude_dirs: Optional[Set[str]] = None,
+    paths: Optional[Iterable[str]] = None,
+    log: Callable[[str], None] = print,
+) -> Path:
     """
     Compress a directory into a .tar.gz archive in a cross-platform safe temp location.
+
+    When `paths` is given, only those files (relative to `source_dir`) are archived.
     """
     exclude_dirs = exclude_dirs or set()
-    print(f"🔧 Compressing directory: {source_dir}")
+    log(f"🔧 Compressing directory: {source_dir}")
     archive_fd, archive_path = tempfile.mkstemp(suffix=".tar.gz")
     os.close(archive_fd)
 
     with tarfile.open(archive_path, "w:gz") as tar:
-        for root, dirs, files in os.walk(source_dir):
-            rel_root = Path(root).relative_to(source_dir)
-            if any(part in exclude_dirs for part in rel_root.parts):
-                continue
-            for file in files:
-                file_path = Path(root) / file
-                arcname = Path(source_dir.name) / rel_root / file
-                tar.add(file_path, arcname=str(arcname).replace("\\", "/"))
-
-    print(f"✅ Compression complete: {archive_path}")
+        if paths is not None:
+            for rel in sorted(paths):
+                arcname = Path(source_dir.name) / rel
+                tar.add(source_dir / rel, arcname=str(arcname).replace("\\", "/"), recursive=False)
+            log(f"✅ Compression complete: {archive_path}")
+            return Path(archive_path)
+
+        for rel in treehash.upload_files(source_dir, exclude_dirs):
+            tar.add(source_dir / rel, arcname=f"{source_dir.name}/{rel}")
+
+    log(f"✅ Compression complete: {archive_path}")
     return Path(archive_path)
 
 
+class ArchiveCache:
+    """
+    Build each distinct archive once and share it between uploads.
+
+    Keyed by the set of paths to include (None = the whole directory), so a
+    fan-out push to several servers that need the same change set only
+    compresses it once. The tree hash is likewise computed once. Safe to
+    use from several threads; call `cleanup()` when every upload is done.
+    """
+
+    def __init__(self, source_dir: Path, exclude_dirs: Optional[Set[str]] = None):
+        self.source_dir = Path(source_dir)
+        self.exclude_dirs = exclude_dirs or set()
+        self._archives: Dict[Optional[FrozenSet[str]], Path] = {}
+        self._locks: Dict[Optional[FrozenSet[str]], threading.Lock] = {}
+        self._guard = threading.Lock()
+        self._hash: Optional[str] = None
+        self._hash_lock = threading.Lock()
+
+    def tree_hash(self) -> str:
+        """`treehash.tree_hash` of the source directory, computed on first use."""
+        with self._hash_lock:
+            if self._hash is None:
+                self._hash = treehash.tree_hash(self.source_dir, self.exclude_dirs)
+            return self._hash
+
+    def get(self, paths: Optional[Iterable[str]] = None, log: Callable[[str], None] = print) -> Path:
+        key = frozenset(paths) if paths is not None else None
+        with self._guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._archives:
+                self._archives[key] = compress_directory(
+                    self.source_dir, self.exclude_dirs, paths=key, log=log
+                )
+            else:
+                log(f"♻️  Reusing archive: {self._archives[key]}")
+            return self._archives[key]
+
+    def cleanup(self, log: Callable[[str], None] = print) -> None:
+        if not self._archives:
+            return
+        log(f"🧼 Removing temporary local archive ...")
+        with self._guard:
+            for archive_path in self._archives.values():
+                if archive_path.exists():
+                    archive_path.unlink()
+            self._archives.clear()
+        log(f"✅ Local cleanup complete.")
+
+
+def remove_remote_paths(
+    ssh, root: str, paths: Iterable[str], batch_size: int = 200, recursive: bool = False
+) -> None:
+    """Delete `paths` (relative to `root`) on the remote host, in batches; `recursive` uses rm -rf."""
+    paths = sorted(paths)
+    rm = "rm -rf" if recursive else "rm -f"
+    for i in range(0, len(paths), batch_size):
+        batch = " ".join(shlex.quote(p) for p in paths[i:i + batch_size])
+        stdin, stdout, stderr = ssh.exec_command(f"cd {shlex.quote(root)} && {rm} -- {batch}")
+        if stdout.channel.recv_exit_status() != 0:
+            raise RuntimeError(stderr.read().decode())
+
+
+def open_ssh_client(
+    remote_user: str,
+    remote_host: str,
+    port: int = 22,
+    key_path: Optional[str] = None,
+    password: Optional[str] = None,
+    strict_host_key_checking: bool = False,
+    metrics: Optional[PushMetrics] = None,
+    timeout: Optional[float] = None,
+    tuning: Optional[SSHTuning] = None,
+    passphrase: Optional[str] = None,
+    interactive: bool = True,
+    allow_agent: bool = True,
+) -> paramiko.SSHClient:
+    """
+    Open and authenticate a paramiko.SSHClient. Caller closes.
+
+    Besides the profile's key or password, the ssh-agent and the default
+    ~/.ssh keys are tried, as paramiko does by default and as push always
+    has; `allow_agent=False` offers the profile's credentials only. `tuning` puts the profile's preferred ciphers / key exchange
+    first and turns on compression if asked (see `odooflow.utils.tuning`). With `metrics`, the TCP connect and the SSH handshake + auth are
+    timed as separate "connect" and "auth" phases. Prefer
+    `odooflow.utils.connection.ConnectionManager` when the same host may be
+    needed again in the same command. `passphrase` and `interactive` go to
+    `keys.load_private_key`.
+    """
+    ssh = paramiko.SSHClient()
+
+    if strict_host_key_checking:
+        ssh.load_system_host_keys()
+        ssh.set_missing_host_key_policy(paramiko.RejectPolicy())
+    else:
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+    credentials = {"password": password}
+    if key_path:
+        credentials = {"pkey": keys.load_private_key(key_path, passphrase, interactive=interactive)}
+    if tuning is not None and not tuning.is_default:
+        credentials.update(transport_factory=tuning.transport_factory, compress=tuning.compression)
+
+    try:
+        sock = None
+        if metrics is not None:
+            with metrics.phase("connect"):
+                sock = socket.create_connection((remote_host, port), timeout=timeout)
+
+        with metrics.phase("auth") if metrics is not None else nullcontext():
+            ssh.connect(
+                remote_host,
+                port=port,
+                username=remote_user,
+                sock=sock,
+                timeout=timeout,
+                banner_timeout=timeout,
+                auth_timeout=timeout,
+                allow_agent=allow_agent,
+                look_for_keys=allow_agent,
+                **credentials,
+            )
+    except Exception:
+        ssh.close()
+        raise
+    return ssh
+
+
+def _client(
+    connections,
+    remote_user: str,
+    remote_host: str,
+    port: int,
+    key_path: Optional[str],
+    password: Optional[str],
+    strict_host_key_checking: bool,
+    metrics: Optional[PushMetrics] = None,
+    tuning: Optional[SSHTuning] = None,
+) -> paramiko.SSHClient:
+    """Borrow a client from `connections`, or open a private one when it is None."""
+    if connections is not None:
+        return connections.client(
+            remote_user, remote_host, port, key_path, password, strict_host_key_checking,
+            metrics=metrics, tuning=tuning,
+        )
+    return open_ssh_client(
+        remote_user, remote_host, port, key_path, password, strict_host_key_checking,
+        metrics=metrics, tuning=tuning,
+    )
+
+
+@contextmanager
+def _progress_bar(enabled: bool):
+    """Yield a `put_file` callback driving a tqdm byte counter (or None when disabled)."""
+    if not enabled:
+        yield None
+        return
+    bar = tqdm(unit="B", unit_scale=True, unit_divisor=1024, leave=False, desc="   upload")
+    lock = threading.Lock()  # multi-channel uploads report from several threads
+
+    def on_progress(done: int, total: int) -> None:
+        with lock:
+            if bar.total != total:
+                bar.total = total
+            if done > bar.n:
+                bar.update(done - bar.n)
+
+    try:
+        yield on_progress
+    finally:
+        bar.close()
+
+
+def _run_remote(ssh, command: str) -> str:
+    """Run `command`, raising RuntimeError with its stderr on a non-zero exit."""
+    stdin, stdout, stderr = ssh.exec_command(command)
+    if stdout.channel.recv_exit_status() != 0:
+        raise RuntimeError(stderr.read().decode() or f"Remote command failed: {command}")
+    return stdout.read().decode()
+
+
+# --------------------------------------------------------------------------- #
+# Streaming remote commands
+# --------------------------------------------------------------------------- #
+
+
+STREAM_CHUNK_SIZE = 32768
+# After forwarding Ctrl-C / a timeout, give the remote process this long to exit.
+SIGNAL_GRACE_SECONDS = 5.0
+
+
+class CommandTimeout(RuntimeError):
+    """A streamed remote command ran longer than its timeout."""
+
+
+def send_signal(channel, name: str = "INT") -> None:
+    """
+    Best-effort RFC 4254 "signal" request (paramiko has no public API for
+    it). OpenSSH honours it since 7.9; older servers silently ignore it.
+    """
+    if hasattr(channel, "send_signal"):  # relayed by ssh-agentd
+        channel.send_signal(name)
+        return
+    message = paramiko.Message()
+    message.add_byte(paramiko.common.cMSG_CHANNEL_REQUEST)
+    message.add_int(channel.remote_chanid)
+    message.add_string("signal")
+    message.add_boolean(False)
+    message.add_string(name)
+    try:
+        channel._send_user_message(message)
+    except (paramiko.SSHException, EOFError, OSError):
+        pass
+
+
+class LineBuffer:
+    """Turn decoded chunks into complete lines for `emit`; `flush()` sends the tail."""
+
+    def __init__(self, emit: Callable[[str], None]):
+        self.emit = emit
+        self._pending = ""
+
+    def feed(self, text: str) -> None:
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self.emit(line.rstrip("\r"))
+
+    def flush(self) -> None:
+        if self._pending:
+            self.emit(self._pending.rstrip("\r"))
+            self._pending = ""
+
+
+def stream_command(
+    ssh,
+    command: str,
+    on_stdout: Optional[Callable[[str], None]] = None,
+    on_stderr: Optional[Callable[[str], None]] = None,
+    timeout: Optional[float] = None,
+    get_pty: bool = False,
+) -> int:
+    """
+    Run `command` and hand its output to `on_stdout` / `on_stderr` as it
+    arrives, in decoded chunks. Returns the exit status.
+
+    Both streams are drained continuously, so a chatty command never stalls
+    on a full channel window. After `timeout` seconds the remote process is
+    sent TERM and `CommandTimeout` is raised; Ctrl-C is forwarded as INT
+    and then re-raised.
+    """
+    channel = ssh.get_transport().open_session()
+    if get_pty:
+        channel.get_pty()
+    channel.exec_command(command)
+    decoders = {
+        "out": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+        "err": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+    }
+    sinks = {"out": on_stdout, "err": on_stderr}
+
+    def _emit(kind: str, data: bytes, final: bool = False) -> None:
+        text = decoders[kind].decode(data, final=final)
+        if text and sinks[kind]:
+            sinks[kind](text)
+
+    def _drain() -> bool:
+        got = False
+        while channel.recv_ready():
+            _emit("out", channel.recv(STREAM_CHUNK_SIZE))
+            got = True
+        while channel.recv_stderr_ready():
+            _emit("err", channel.recv_stderr(STREAM_CHUNK_SIZE))
+            got = True
+        return got
+
+    def _wait_for_exit(seconds: float) -> None:
+        deadline = time.monotonic() + seconds
+        while not channel.exit_status_ready() and time.monotonic() < deadline:
+            select.select([channel], [], [], 0.1)
+            _drain()
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while True:
+            wait = 0.5 if deadline is None else max(0.0, min(0.5, deadline - time.monotonic()))
+            select.select([channel], [], [], wait)
+            _drain()
+            if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                send_signal(channel, "TERM")
+                _wait_for_exit(SIGNAL_GRACE_SECONDS)
+                raise CommandTimeout(f"Remote command timed out after {timeout:g}s: {command}")
+        # paramiko handles messages in order, so all output is buffered by now.
+        _drain()
+        _emit("out", b"", final=True)
+        _emit("err", b"", final=True)
+        return channel.recv_exit_status()
+    except KeyboardInterrupt:
+        if get_pty:
+            channel.send(b"\x03")
+        send_signal(channel, "INT")
+        _wait_for_exit(SIGNAL_GRACE_SECONDS)
+        raise
+    finally:
+        channel.close()
+
+
+def _run_post_exec(
+    ssh,
+    post_exec_cmd: str,
+    on_post_exec,
+    log: Callable[[str], None],
+    timeout: Optional[float] = None,
+) -> int:
+    """
+    Run the post-upload command, streaming its output line by line through
+    `log`. Output is only buffered when `on_post_exec(stdout, stderr,
+    exit_status)` is given, since that callback wants the whole text.
+    Returns the exit status; without a callback a failure raises instead.
+    """
+    log(f"⚙️  Running post-upload command: {post_exec_cmd}")
+    out_lines = LineBuffer(log)
+    err_lines = LineBuffer(log)
+    captured = {"out": [], "err": []} if on_post_exec else None
+
+    def on_stdout(text: str) -> None:
+        out_lines.feed(text)
+        if captured is not None:
+            captured["out"].append(text)
+
+    def on_stderr(text: str) -> None:
+        err_lines.feed(text)
+        if captured is not None:
+            captured["err"].append(text)
+
+    try:
+        exit_status = stream_command(ssh, post_exec_cmd, on_stdout, on_stderr, timeout=timeout)
+    finally:
+        out_lines.flush()
+        err_lines.flush()
+
+    if on_post_exec:
+        on_post_exec("".join(captured["out"]), "".join(captured["err"]), exit_status)
+    elif exit_status != 0:
+        raise RuntimeError(f"Post-upload command failed with exit status {exit_status}")
+    if exit_status == 0:
+        log(f"✅ Post-upload command complete.")
+    return exit_status
+
+
+# --------------------------------------------------------------------------- #
+# Release directories
+#
+#   <directory>/<module>                          -> symlink to the live release
+#   <directory>/.odooflow-releases/<module>/<ts>  -> one full copy per deploy
+#
+# The module path itself is the "current" symlink, so Odoo's addons_path does
+# not change. Switching is `ln -s` to a temp name + `mv -T` over the link,
+# which is a single rename(2) and therefore atomic.
+# --------------------------------------------------------------------------- #
+
+
+RELEASES_DIR = ".odooflow-releases"
+DEFAULT_KEEP_RELEASES = 5
+
+
+def releases_root(resolved_remote_path: str, module_name: str) -> str:
+    return f"{resolved_remote_path}/{RELEASES_DIR}/{module_name}"
+
+
+def _release_stamp() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def list_releases(sftp, root: str) -> List[str]:
+    """Release directory names under `root`, oldest first."""
+    try:
+        return sorted(sftp.listdir(root))
+    except IOError:
+        return []
+
+
+def current_release(sftp, live_path: str) -> Optional[str]:
+    """Name of the release `live_path` points at, or None if it is not a release link."""
+    try:
+        return posixpath.basename(sftp.readlink(live_path).rstrip("/"))
+    except (IOError, OSError):
+        return None
+
+
+def _legacy_release_name(stamp: str) -> str:
+    # "<stamp minus Z>-pre" sorts just before "<stamp>" ('-' < 'Z'), so the
+    # adopted in-place tree becomes the release right before the new one.
+    return f"{stamp[:-1]}-pre"
+
+
+def switch_release(
+    ssh,
+    live_path: str,
+    release_path: str,
+    legacy_path: Optional[str] = None,
+    log: Callable[[str], None] = print,
+) -> None:
+    """
+    Atomically point `live_path` at `release_path`.
+
+    If `live_path` is still a plain directory from an in-place deploy it is
+    first moved to `legacy_path` (once, not atomic); every later switch is a
+    single rename of the symlink.
+    """
+    live = shlex.quote(live_path)
+    tmp = shlex.quote(f"{live_path}.odooflow-switch")
+    log(f"🔀 Switching {live_path} -> {release_path}")
+    command = f"ln -sfn {shlex.quote(release_path)} {tmp} && mv -Tf {tmp} {live}"
+    if legacy_path:
+        command = (
+            f"if [ -d {live} ] && [ ! -L {live} ]; then "
+            f"mv {live} {shlex.quote(legacy_path)}; fi && " + command
+        )
+    _run_remote(ssh, command)
+    log(f"✅ Release switch complete.")
+
+
+def prune_releases(ssh, sftp, root: str, live_path: str, keep: int, log: Callable[[str], None] = print) -> None:
+    """Delete all but the newest `keep` releases; never the live one."""
+    releases = list_releases(sftp, root)
+    live = current_release(sftp, live_path)
+    stale = [r for r in releases[:-keep] if r != live] if keep > 0 else []
+    if not stale:
+        return
+    log(f"🧹 Pruning {len(stale)} old release(s) ...")
+    _run_remote(
+        ssh,
+        f"cd {shlex.quote(root)} && rm -rf -- " + " ".join(shlex.quote(r) for r in stale),
+    )
+
+
 def upload_directory_via_ssh(
     local_path: Path,
     remote_user: str,
@@ -56,82 +530,305 @@ def upload_directory_via_ssh(
     strict_host_key_checking: bool = False,
     post_exec_cmd: Optional[str] = None,
     on_post_exec=None,
+    incremental: bool = False,
+    archive_cache: Optional[ArchiveCache] = None,
+    log: Callable[[str], None] = print,
+    release_mode: bool = False,
+    keep_releases: int = DEFAULT_KEEP_RELEASES,
+    transfer_settings: Optional[transfer.TransferSettings] = None,
+    metrics: Optional[PushMetrics] = None,
+    show_progress: bool = True,
+    post_exec_timeout: Optional[float] = None,
+    connections=None,
+    tuning: Optional[SSHTuning] = None,
+    git_source: Optional[gitpull.GitSource] = None,
 ):
     """
     Uploads a local directory to a remote server via SSH by compressing it and extracting it remotely.
     Cross-platform compatible.
 
     If `post_exec_cmd` is provided, it is executed over the same SSH connection after a successful
-    extract/cleanup (and before the connection is closed). `on_post_exec(stdout, stderr, exit_status)`
-    is an optional callback that receives the command's streams and exit status for custom reporting.
+    extract/cleanup (and before the connection is closed). Its output is streamed through `log` as it
+    arrives and it is stopped after `post_exec_timeout` seconds, if set. `on_post_exec(stdout, stderr,
+    exit_status)` is an optional callback that receives the command's streams and exit status for
+    custom reporting. A `{changed_modules}` placeholder in the command is replaced by the modules
+    the upload affected (see `odooflow.utils.impact`); the command is skipped if there are none.
+
+    With `incremental=True` only the files changed since the commit recorded in the remote deploy
+    marker are sent, and files removed locally are deleted remotely (see `odooflow.utils.delta`).
+    Falls back to a full upload when there is no usable marker. Nothing is sent at all when the
+    marker's tree hash equals the local one (see `odooflow.utils.treehash`); the hash is only computed
+    for incremental uploads. Returns the marker written after
+    the upload, or None when `local_path` is not a git checkout. The marker is written last and not at
+    all when the post-upload command fails, so the next push sends the same changes and retries it.
+
+    Pass a shared `archive_cache` to reuse archives across several uploads (the caller then owns
+    its cleanup), and `log` to redirect the progress lines, e.g. to prefix them per server.
+
+    With `release_mode=True` the archive is extracted into a fresh release directory and the module
+    path is switched to it atomically (see `switch_release`); only `keep_releases` are kept.
+
+    The archive is sent with `transfer.put_file`, tuned by `transfer_settings`.
+
+    Each step is timed into `metrics` (a fresh `PushMetrics` when not given) and the breakdown is
+    logged at the end. `show_progress` draws a tqdm bar during the upload; turn it off when several
+    uploads share the terminal.
+
+    With a `connections` manager (`odooflow.utils.connection.ConnectionManager`) the SSH connection
+    is borrowed from it and left open for the next caller instead of being closed here. `tuning`
+    carries the profile's cipher / compression preferences to the handshake.
+
+    With a `git_source` the server first tries to fetch that commit and check the module out
+    itself (see `odooflow.utils.gitpull`); nothing is compressed or uploaded when it succeeds.
+    If it cannot, the archive is uploaded as usual over the same connection.
     """
     exclude_dirs = exclude_dirs or set()
     local_path = Path(local_path).resolve()
     archive_name = f"{local_path.name}.tar.gz"
+    metrics = metrics if metrics is not None else PushMetrics()
 
-    print(f"🔐 Connecting to {remote_user}@{remote_host}:{port} ...")
-    ssh = paramiko.SSHClient()
+    log(f"🔐 Connecting to {remote_user}@{remote_host}:{port} ...")
+    ssh = _client(
+        connections, remote_user, remote_host, port, key_path, password,
+        strict_host_key_checking, metrics, tuning=tuning,
+    )
 
-    if strict_host_key_checking:
-        ssh.load_system_host_keys()
-        ssh.set_missing_host_key_policy(paramiko.RejectPolicy())
-    else:
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    sftp = ssh.open_sftp()
+    resolved_remote_path = resolve_remote_path(sftp, remote_path)
+    log(f"📁 Remote path resolved to: {resolved_remote_path}")
+    module_root = f"{resolved_remote_path}/{local_path.name}"
 
-    if key_path:
-        key_path = os.path.expanduser(key_path)
-        pkey = paramiko.RSAKey.from_private_key_file(key_path)
-        ssh.connect(remote_host, port=port, username=remote_user, pkey=pkey)
+    owns_cache = archive_cache is None
+    if owns_cache:
+        archive_cache = ArchiveCache(local_path, exclude_dirs)
+
+    # Step 1: Work out what to send
+    changes = None
+    unchanged = False
+    local_hash = None
+    with metrics.phase("plan"):
+        if incremental:
+            # Only worth reading the whole tree when the remote may already have it.
+            local_hash = archive_cache.tree_hash()
+            marker = delta.read_marker(sftp, module_root)
+            unchanged = marker.get(treehash.HASH_KEY) == local_hash
+            changes = delta.ChangeSet() if unchanged else delta.compute_changes(
+                local_path, marker.get("sha"), marker.get("dirty", []), exclude_dirs
+            )
+    if unchanged:
+        log(f"🟰 Remote already has this exact tree (hash {local_hash[:12]}); skipping compression and upload.")
+    elif changes is None:
+        if incremental:
+            log(f"ℹ️  No usable deploy marker on remote; doing a full upload.")
     else:
-        ssh.connect(remote_host, port=port, username=remote_user, password=password)
+        log(
+            f"🔎 Incremental deploy since {marker['sha'][:10]}: "
+            f"{len(changes.upload)} changed, {len(changes.delete)} removed."
+        )
+        metrics.count("files_changed", len(changes.upload))
+        metrics.count("files_deleted", len(changes.delete))
 
-    sftp = ssh.open_sftp()
-    resolved_remote_path = resolve_remote_path(sftp, remote_path)
-    print(f"📁 Remote path resolved to: {resolved_remote_path}")
+    send = changes is None or bool(changes.upload)
 
-    # Step 1: Compress local directory
-    archive_path = compress_directory(local_path, exclude_dirs)
+    # In release mode everything lands in a new release directory, which
+    # becomes live only once it is complete.
+    new_release = release_mode and (changes is None or bool(changes))
+    if new_release:
+        release_root = releases_root(resolved_remote_path, local_path.name)
+        stamp = _release_stamp()
+        target_root = f"{release_root}/{stamp}"
+    else:
+        target_root = module_root
 
+    deployed_marker = None
+    post_exec_failed = False
     try:
-        # Step 2: Upload archive
-        remote_archive = f"{resolved_remote_path}/{archive_name}"
-        print(f"📤 Uploading archive to remote: {remote_archive}")
-        sftp.put(str(archive_path), remote_archive)
-        print(f"✅ Upload complete.")
-
-        # Step 3: Extract archive on remote server
-        print(f"📦 Extracting archive on remote server ...")
-        extract_cmd = f"mkdir -p {resolved_remote_path} && tar -xzf {remote_archive} -C {resolved_remote_path}"
-        stdin, stdout, stderr = ssh.exec_command(extract_cmd)
-        if stdout.channel.recv_exit_status() != 0:
-            raise RuntimeError(stderr.read().decode())
-        print(f"✅ Extraction complete.")
+        if new_release:
+            log(f"🗂️  Preparing release directory: {target_root}")
+            prepare_cmd = f"mkdir -p {shlex.quote(target_root)}"
+            if changes is not None:
+                # Incremental: start from the live tree, then apply the delta.
+                prepare_cmd += f" && cp -a {shlex.quote(module_root)}/. {shlex.quote(target_root)}/"
+            with metrics.phase("prepare"):
+                _run_remote(ssh, prepare_cmd)
+
+        # Removals come first: a path that turned from a file into a directory
+        # (or back) has to be gone before the new one can be extracted.
+        retyped = delta.type_changes(changes) if changes is not None else set()
+        if changes is not None and (changes.delete or retyped):
+            log(f"🗑️  Removing {len(changes.delete)} deleted file(s) on remote ...")
+            with metrics.phase("delete"):
+                remove_remote_paths(ssh, target_root, changes.delete - retyped)
+                if retyped:
+                    remove_remote_paths(ssh, target_root, retyped, recursive=True)
+            log(f"✅ Remote deletions complete.")
+
+        pulled = False
+        if send and git_source is not None:
+            log(f"🌿 Asking the server to fetch {git_source.sha[:10]} from {git_source.url} ...")
+            try:
+                with metrics.phase("pull"):
+                    gitpull.pull(
+                        ssh, git_source, gitpull.git_dir(resolved_remote_path, local_path.name),
+                        target_root, exclude_dirs,
+                    )
+                pulled = True
+                # `git archive` ships the commit's tracked files, which need not
+                # be what the local tree hash covers: record no hash for it.
+                local_hash = None
+                log(f"✅ Server checked out {git_source.sha[:10]}; nothing to upload.")
+            except gitpull.PullUnavailable as e:
+                log(f"⚠️  Server-side pull failed ({e}); uploading an archive instead.")
 
-        # Step 4: Remove remote archive
-        print(f"🧹 Cleaning up remote archive ...")
-        ssh.exec_command(f"rm -f {remote_archive}")
-        print(f"✅ Remote cleanup complete.")
+        if send and not pulled:
+            with metrics.phase("compress"):
+                archive_path = archive_cache.get(
+                    changes.upload if changes is not None else None, log=log
+                )
+            metrics.count("bytes_archive", archive_path.stat().st_size)
+
+            # Step 2: Upload archive
+            remote_archive = f"{resolved_remote_path}/{archive_name}"
+            log(f"📤 Uploading archive to remote: {remote_archive}")
+            with metrics.phase("upload"), _progress_bar(show_progress) as on_progress:
+                stats = transfer.put_file(
+                    ssh.get_transport(), archive_path, remote_archive, transfer_settings,
+                    callback=on_progress,
+                )
+            metrics.count("bytes_uploaded", stats.size)
+            log(f"✅ Upload complete ({stats}).")
+
+            # Step 3: Extract archive on remote server
+            log(f"📦 Extracting archive on remote server ...")
+            if new_release:
+                extract_cmd = (
+                    f"tar -xzf {shlex.quote(remote_archive)} -C {shlex.quote(target_root)} "
+                    f"--strip-components=1"
+                )
+            else:
+                extract_cmd = f"mkdir -p {resolved_remote_path} && tar -xzf {remote_archive} -C {resolved_remote_path}"
+            with metrics.phase("extract"):
+                stdin, stdout, stderr = ssh.exec_command(extract_cmd)
+                if stdout.channel.recv_exit_status() != 0:
+                    raise RuntimeError(stderr.read().decode())
+            log(f"✅ Extraction complete.")
+
+            # Step 4: Remove remote archive
+            log(f"🧹 Cleaning up remote archive ...")
+            with metrics.phase("cleanup"):
+                ssh.exec_command(f"rm -f {remote_archive}")
+            log(f"✅ Remote cleanup complete.")
+        elif not send:
+            log(f"✅ No changed files to upload.")
+
+        if new_release:
+            with metrics.phase("switch"):
+                switch_release(
+                    ssh,
+                    module_root,
+                    target_root,
+                    legacy_path=f"{release_root}/{_legacy_release_name(stamp)}",
+                    log=log,
+                )
+                prune_releases(ssh, sftp, release_root, module_root, keep_releases, log=log)
 
         # Step 5: Optionally run a post-upload command on the remote host
         if post_exec_cmd:
-            print(f"⚙️  Running post-upload command: {post_exec_cmd}")
-            stdin, stdout, stderr = ssh.exec_command(post_exec_cmd)
-            exit_status = stdout.channel.recv_exit_status()
-            out_text = stdout.read().decode()
-            err_text = stderr.read().decode()
-            if on_post_exec:
-                on_post_exec(out_text, err_text, exit_status)
-            elif exit_status != 0:
-                raise RuntimeError(err_text or f"Post-upload command failed with exit status {exit_status}")
-            print(f"✅ Post-upload command complete.")
+            command = impact.expand_command(
+                post_exec_cmd,
+                local_path,
+                None if changes is None else changes.upload | changes.delete,
+                exclude_dirs,
+            )
+            if command is None and unchanged:
+                log(
+                    f"ℹ️  Remote tree unchanged, so no module to update; "
+                    f"skipping post-upload command ({impact.PLACEHOLDER} would be empty)."
+                )
+            elif command is None:
+                log(f"ℹ️  No Odoo module affected; skipping post-upload command.")
+            else:
+                with metrics.phase("post_exec"):
+                    post_exec_status = _run_post_exec(
+                        ssh, command, on_post_exec, log, timeout=post_exec_timeout
+                    )
+                if post_exec_status != 0:
+                    post_exec_failed = True
+
+        # Written last: a push whose post-upload command failed keeps the previous
+        # marker, so the next push sends the same changes and runs the command again.
+        if post_exec_failed:
+            log(f"⚠️  Deploy marker not updated; the next push will retry the post-upload command.")
+        else:
+            try:
+                deployed_marker = delta.write_marker(
+                    sftp, target_root, local_path,
+                    **({treehash.HASH_KEY: local_hash} if local_hash else {}),
+                )
+            except (IOError, OSError) as e:
+                log(f"⚠️  Could not write deploy marker ({e}); next push will be a full upload.")
 
     finally:
         # Step 6: Clean up local archive
-        print(f"🧼 Removing temporary local archive ...")
-        if archive_path.exists():
-            archive_path.unlink()
-        print(f"✅ Local cleanup complete.")
+        if owns_cache:
+            archive_cache.cleanup(log=log)
 
         sftp.close()
-        ssh.close()
-        print(f"🔒 SSH connection closed.")
+        if connections is None:
+            ssh.close()
+            log(f"🔒 SSH connection closed.")
+        metrics.finish()
+        log(f"⏱️  {metrics.summary()}")
+
+    return deployed_marker
+
+
+def rollback_release(
+    module_name: str,
+    remote_user: str,
+    remote_host: str,
+    remote_path: str,
+    port: int = 22,
+    key_path: Optional[str] = None,
+    password: Optional[str] = None,
+    strict_host_key_checking: bool = False,
+    post_exec_cmd: Optional[str] = None,
+    on_post_exec=None,
+    log: Callable[[str], None] = print,
+    post_exec_timeout: Optional[float] = None,
+    connections=None,
+    tuning: Optional[SSHTuning] = None,
+) -> str:
+    """
+    Point the module back at the release before the live one. Nothing is
+    uploaded; this is a single symlink switch (plus `post_exec_cmd`, if any).
+    Returns the name of the release that is now live.
+    """
+    log(f"🔐 Connecting to {remote_user}@{remote_host}:{port} ...")
+    ssh = _client(
+        connections, remote_user, remote_host, port, key_path, password, strict_host_key_checking,
+        tuning=tuning,
+    )
+    sftp = ssh.open_sftp()
+    try:
+        resolved_remote_path = resolve_remote_path(sftp, remote_path)
+        module_root = f"{resolved_remote_path}/{module_name}"
+        root = releases_root(resolved_remote_path, module_name)
+        releases = list_releases(sftp, root)
+        live = current_release(sftp, module_root)
+        if live not in releases:
+            raise RuntimeError(f"{module_root} is not a release symlink; nothing to roll back.")
+        index = releases.index(live)
+        if index == 0:
+            raise RuntimeError(f"'{live}' is the oldest kept release; nothing to roll back to.")
+        previous = releases[index - 1]
+        log(f"⏪ Rolling back {live} -> {previous}")
+        switch_release(ssh, module_root, f"{root}/{previous}", log=log)
+        if post_exec_cmd:
+            _run_post_exec(ssh, post_exec_cmd, on_post_exec, log, timeout=post_exec_timeout)
+        return previous
+    finally:
+        sftp.close()
+        if connections is None:
+            ssh.close()
+            log(f"🔒 SSH connection closed.")
@@ -0,0 +1,190 @@
+"""
+High-throughput SFTP uploads.
+
+`SFTPClient.put` runs over a single channel, and upload throughput on one
+channel is capped at roughly (server-advertised window) / RTT: with
+OpenSSH's 2 MiB session window that is about 25 MB/s at 80 ms, before any
+other overhead. `put_file` keeps writes pipelined, opens its SFTP
+channels with a tunable window and packet size (which governs the reply
+direction), and — the main lever — can split a large file into byte
+ranges written concurrently over several SFTP channels on the same
+transport, each with its own server window.
+
+All knobs come from the server profile (`sftp_channels`,
+`sftp_window_size`, `sftp_packet_size`); see `TransferSettings.from_profile`.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+import paramiko
+
+
+DEFAULT_WINDOW_SIZE = 64 * 2**20
+DEFAULT_PACKET_SIZE = 2**15
+DEFAULT_CHANNELS = 1
+# Below this many bytes per channel, splitting costs more round-trips than it saves.
+MIN_RANGE_SIZE = 4 * 2**20
+# Bytes handed to SFTPFile.write per call; paramiko cuts them into 32 KiB requests.
+WRITE_BLOCK_SIZE = 2**20
+
+
+class TransferSettings:
+    """Per-profile tuning for `put_file`."""
+
+    def __init__(
+        self,
+        channels: int = DEFAULT_CHANNELS,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        packet_size: int = DEFAULT_PACKET_SIZE,
+    ):
+        self.channels = max(1, int(channels))
+        self.window_size = int(window_size)
+        self.packet_size = int(packet_size)
+
+    @classmethod
+    def from_profile(cls, profile: dict) -> "TransferSettings":
+        return cls(
+            channels=profile.get("sftp_channels", DEFAULT_CHANNELS),
+            window_size=profile.get("sftp_window_size", DEFAULT_WINDOW_SIZE),
+            packet_size=profile.get("sftp_packet_size", DEFAULT_PACKET_SIZE),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"TransferSettings(channels={self.channels}, "
+            f"window_size={self.window_size}, packet_size={self.packet_size})"
+        )
+
+
+class TransferStats:
+    """Bytes moved and wall-clock time for one upload."""
+
+    def __init__(self, size: int, seconds: float, channels: int):
+        self.size = size
+        self.seconds = seconds
+        self.channels = channels
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.size / 2**20 / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.size / 2**20:.1f} MB in {self.seconds:.1f}s, "
+            f"{self.mb_per_second:.1f} MB/s over {self.channels} channel(s)"
+        )
+
+
+def open_sftp(transport: paramiko.Transport, settings: TransferSettings) -> paramiko.SFTPClient:
+    """Open an SFTP channel on `transport` with the tuned window / packet size."""
+    return paramiko.SFTPClient.from_transport(
+        transport,
+        window_size=settings.window_size,
+        max_packet_size=settings.packet_size,
+    )
+
+
+def _write_range(
+    transport: paramiko.Transport,
+    settings: TransferSettings,
+    local_path: Path,
+    remote_path: str,
+    offset: int,
+    length: int,
+    progress: Callable[[int], None],
+) -> None:
+    sftp = open_sftp(transport, settings)
+    try:
+        with open(local_path, "rb") as src, sftp.open(remote_path, "r+b") as dst:
+            dst.set_pipelined(True)
+            src.seek(offset)
+            dst.seek(offset)
+            remaining = length
+            while remaining > 0:
+                block = src.read(min(WRITE_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                dst.write(block)
+                remaining -= len(block)
+                progress(len(block))
+    finally:
+        sftp.close()
+
+
+def put_file(
+    transport: paramiko.Transport,
+    local_path: Path,
+    remote_path: str,
+    settings: Optional[TransferSettings] = None,
+    callback: Optional[Callable[[int, int], None]] = None,
+) -> TransferStats:
+    """
+    Upload `local_path` to `remote_path` over `transport`.
+
+    `callback(bytes_done, total)` is called as data is written, like
+    `SFTPClient.put`. The remote size is checked afterwards because
+    pipelined write errors are otherwise only reported on close.
+    """
+    settings = settings or TransferSettings()
+    local_path = Path(local_path)
+    size = os.path.getsize(local_path)
+    channels = max(1, min(settings.channels, size // MIN_RANGE_SIZE or 1))
+
+    done = 0
+    lock = threading.Lock()
+
+    def progress(n: int) -> None:
+        nonlocal done
+        with lock:
+            done += n
+            current = done
+        if callback:
+            callback(current, size)
+
+    started = time.monotonic()
+    sftp = open_sftp(transport, settings)
+    try:
+        if channels == 1:
+            with open(local_path, "rb") as src:
+                sftp.putfo(src, remote_path, file_size=size, callback=callback, confirm=False)
+        else:
+            # Create / truncate once, then let each channel fill its own range.
+            with sftp.open(remote_path, "wb") as fh:
+                fh.truncate(size)
+            step = -(-size // channels)
+            ranges = [(off, min(step, size - off)) for off in range(0, size, step)]
+            with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                futures = [
+                    executor.submit(
+                        _write_range, transport, settings, local_path, remote_path, off, length, progress
+                    )
+                    for off, length in ranges
+                ]
+                for future in futures:
+                    future.result()
+
+        remote_size = sftp.stat(remote_path).st_size
+        if remote_size != size:
+            raise IOError(f"size mismatch in put! {remote_size} != {size}")
+    finally:
+        sftp.close()
+
+    return TransferStats(size, time.monotonic() - started, channels)
+
+
+__all__ = [
+    "DEFAULT_WINDOW_SIZE",
+    "DEFAULT_PACKET_SIZE",
+    "DEFAULT_CHANNELS",
+    "TransferSettings",
+    "TransferStats",
+    "open_sftp",
+    "put_file",
+]
@@ -0,0 +1,76 @@
+"""
+Content hash of the files a push uploads.
+
+`tree_hash` is a Merkle hash over exactly the files a full upload would
+archive. Each file is hashed, each directory hashes its sorted
+`(kind, name, hash)` entries, and the root digest covers the whole
+tree. Two trees with the same content therefore share a hash, whatever
+their git history or file timestamps.
+
+After every incremental deploy the hash is stored in the remote deploy
+marker (`delta.MARKER_NAME`). When the next incremental push computes the
+same hash, the remote already has this content. Compression and transfer are then
+skipped, which saves a CI re-run from a full upload even when its
+shallow clone cannot see the deployed commit.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import stat
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set
+
+
+HASH_KEY = "tree_hash"
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def upload_files(source_dir: Path, exclude_dirs: Optional[Set[str]] = None) -> Iterator[str]:
+    """POSIX paths, relative to `source_dir`, of every file a full upload archives."""
+    exclude_dirs = exclude_dirs or set()
+    for root, dirs, files in os.walk(source_dir):
+        # Pruned in place, so excluded trees (node_modules, .venv) are never walked.
+        dirs[:] = [d for d in dirs if d not in exclude_dirs]
+        rel_root = Path(root).relative_to(source_dir)
+        for name in files:
+            yield (rel_root / name).as_posix()
+
+
+def _file_entry(path: Path) -> str:
+    info = os.lstat(path)
+    digest = hashlib.sha256()
+    if stat.S_ISLNK(info.st_mode):
+        digest.update(os.readlink(path).encode())
+        return f"link {digest.hexdigest()}"
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(READ_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    kind = "exec" if info.st_mode & stat.S_IXUSR else "blob"
+    return f"{kind} {digest.hexdigest()}"
+
+
+def _tree_digest(base: Path, node: Dict[str, Optional[dict]]) -> str:
+    digest = hashlib.sha256()
+    for name in sorted(node):
+        child = node[name]
+        entry = f"tree {_tree_digest(base / name, child)}" if child is not None else _file_entry(base / name)
+        digest.update(f"{name}\0{entry}\n".encode())
+    return digest.hexdigest()
+
+
+def tree_hash(source_dir: Path, exclude_dirs: Optional[Set[str]] = None) -> str:
+    """Merkle root over the `upload_files` of `source_dir`."""
+    source_dir = Path(source_dir)
+    root: Dict[str, Optional[dict]] = {}
+    for rel in upload_files(source_dir, exclude_dirs):
+        *parents, name = rel.split("/")
+        node = root
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[name] = None
+    return _tree_digest(source_dir, root)
+
+
+__all__ = ["HASH_KEY", "upload_files", "tree_hash"]
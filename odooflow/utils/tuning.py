@@ -0,0 +1,112 @@
+"""
+Per-profile SSH algorithm preferences.
+
+A profile may carry
+
+    "ssh_ciphers":     ["aes128-gcm@openssh.com", "aes128-ctr"],
+    "ssh_kex":         ["curve25519-sha256@libssh.org"],
+    "ssh_compression": false
+
+usually written by `odooflow server bench`. The listed algorithms are
+moved to the front of paramiko's own preference order, and the rest
+stay behind them as fallbacks. A server that stops offering the
+favourite therefore still connects. Names this paramiko does not know
+are ignored.
+
+Every SSH entry point applies the preferences: `open_ssh_client` (and
+with it `ConnectionManager`, ssh-agentd, push and `server connect`) and
+the staged probes of `server test`.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import paramiko
+
+
+CIPHERS_KEY = "ssh_ciphers"
+KEX_KEY = "ssh_kex"
+COMPRESSION_KEY = "ssh_compression"
+
+
+def supported_ciphers() -> Tuple[str, ...]:
+    """Ciphers this paramiko can negotiate, in its default preference order."""
+    return tuple(paramiko.Transport._preferred_ciphers)
+
+
+def supported_kex() -> Tuple[str, ...]:
+    """Key-exchange methods this paramiko can negotiate, in its default order."""
+    return tuple(paramiko.Transport._preferred_kex)
+
+
+def _ordered(preferred: Iterable[str], available: Sequence[str]) -> Tuple[str, ...]:
+    """`preferred` (those that are `available`) first, then the rest of `available`."""
+    front = [name for name in dict.fromkeys(preferred) if name in available]
+    return tuple(front + [name for name in available if name not in front])
+
+
+class SSHTuning:
+    """Cipher / key-exchange preferences and transport compression for one profile."""
+
+    def __init__(
+        self,
+        ciphers: Optional[Sequence[str]] = None,
+        kex: Optional[Sequence[str]] = None,
+        compression: bool = False,
+    ):
+        self.ciphers: List[str] = list(ciphers or [])
+        self.kex: List[str] = list(kex or [])
+        self.compression = bool(compression)
+
+    @classmethod
+    def from_profile(cls, profile: Optional[dict]) -> "SSHTuning":
+        profile = profile or {}
+        return cls(
+            ciphers=profile.get(CIPHERS_KEY),
+            kex=profile.get(KEX_KEY),
+            compression=profile.get(COMPRESSION_KEY, False),
+        )
+
+    def to_profile(self) -> dict:
+        """The profile keys that reproduce these preferences."""
+        data: dict = {COMPRESSION_KEY: self.compression}
+        if self.ciphers:
+            data[CIPHERS_KEY] = list(self.ciphers)
+        if self.kex:
+            data[KEX_KEY] = list(self.kex)
+        return data
+
+    @property
+    def is_default(self) -> bool:
+        return not self.ciphers and not self.kex and not self.compression
+
+    def apply(self, transport: paramiko.Transport) -> paramiko.Transport:
+        """Set the preferences on a transport that has not started yet."""
+        options = transport.get_security_options()
+        if self.ciphers:
+            options.ciphers = _ordered(self.ciphers, options.ciphers)
+        if self.kex:
+            options.kex = _ordered(self.kex, options.kex)
+        transport.use_compression(self.compression)
+        return transport
+
+    def transport_factory(self, sock, **kwargs) -> paramiko.Transport:
+        """For `SSHClient.connect(transport_factory=...)`."""
+        return self.apply(paramiko.Transport(sock, **kwargs))
+
+    def __repr__(self) -> str:
+        return (
+            f"SSHTuning(ciphers={self.ciphers!r}, kex={self.kex!r}, "
+            f"compression={self.compression})"
+        )
+
+
+__all__ = [
+    "CIPHERS_KEY",
+    "KEX_KEY",
+    "COMPRESSION_KEY",
+    "supported_ciphers",
+    "supported_kex",
+    "SSHTuning",
+]
@@ -0,0 +1,372 @@
+"""
+Local port forwarding (`ssh -L`) over one paramiko transport.
+
+`TunnelServer` listens on each local port and, for every accepted
+connection, opens a `direct-tcpip` channel to the remote destination.
+A single `selectors` loop then moves bytes in both directions for all
+forwarded connections at once: one thread however many browser tabs or
+psql sessions use the tunnel.
+
+Every socket and channel is non-blocking, and each connection buffers
+at most `BUFFER_LIMIT` bytes per direction. A side whose buffer is full
+is not read until the other side has taken the data, so a slow client or
+an exhausted SSH window only stalls its own connection.
+
+Opening a channel costs a round-trip. Opens are therefore done by a
+small thread pool and handed back to the loop, so a slow open never
+stalls traffic on connections that are already established.
+
+The listening sockets outlive the transport. After a drop, `serve()`
+returns False and the caller can reconnect and call it again, while
+local clients keep connecting to the same ports.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import re
+import selectors
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+
+CHUNK_SIZE = 65536
+BUFFER_LIMIT = 4 * CHUNK_SIZE  # per direction and connection; reading pauses beyond it
+OPEN_WORKERS = 4  # channel opens in flight at once
+OPEN_TIMEOUT = 10.0  # seconds for the server to accept a direct-tcpip channel
+DEFAULT_BIND = "127.0.0.1"
+
+_SPEC = re.compile(
+    r"^(?:(?P<bind>\[[^\]]+\]|[^:\[\]]+):)?(?P<lport>\d+):(?P<host>\[[^\]]+\]|[^:\[\]]+):(?P<rport>\d+)$"
+)
+
+
+class Forward:
+    """One `[bind:]port:host:hostport` rule."""
+
+    def __init__(self, bind_host: str, bind_port: int, dest_host: str, dest_port: int):
+        self.bind_host = bind_host
+        self.bind_port = bind_port
+        self.dest_host = dest_host
+        self.dest_port = dest_port
+
+    def __str__(self) -> str:
+        return f"{self.bind_host}:{self.bind_port} → {self.dest_host}:{self.dest_port}"
+
+    def __repr__(self) -> str:
+        return f"Forward({self.bind_host!r}, {self.bind_port}, {self.dest_host!r}, {self.dest_port})"
+
+
+def parse_forward(spec: str) -> Forward:
+    """Parse an `ssh -L` style spec: `8069:localhost:8069` or `0.0.0.0:8069:db:5432`."""
+    match = _SPEC.match(spec.strip())
+    if not match:
+        raise ValueError(f"'{spec}' is not [bind_address:]port:host:hostport")
+    ports = int(match.group("lport")), int(match.group("rport"))
+    if not all(1 <= p <= 65535 for p in ports):
+        raise ValueError(f"'{spec}': ports must be between 1 and 65535")
+    bind = (match.group("bind") or DEFAULT_BIND).strip("[]")
+    return Forward(bind, ports[0], match.group("host").strip("[]"), ports[1])
+
+
+class _Pair:
+    """A local socket, its SSH channel, and the bytes each is still owed."""
+
+    def __init__(self, sock: socket.socket, channel, forward: Forward):
+        self.sock = sock
+        self.channel = channel
+        self.forward = forward
+        self.up = bytearray()  # local client -> remote, not yet accepted by the channel
+        self.down = bytearray()  # remote -> local client, not yet accepted by the socket
+        self.sock_eof = False  # the local client stopped sending
+        self.channel_eof = False  # the remote end stopped sending
+        self.up_closed = False  # shutdown_write() sent to the channel
+        self.down_closed = False  # SHUT_WR sent to the local socket
+        self.events: Dict[object, int] = {}
+
+    @property
+    def done(self) -> bool:
+        return self.up_closed and self.down_closed
+
+
+class TunnelServer:
+    """Listens on every `Forward` and relays accepted connections over `serve(transport)`."""
+
+    def __init__(self, forwards: List[Forward], log: Callable[[str], None] = print):
+        self.forwards = forwards
+        self.log = log
+        self.active = 0
+        self.total = 0
+        self.bytes_up = 0
+        self.bytes_down = 0
+        self._listeners: Dict[socket.socket, Forward] = {}
+        self._wake_r, self._wake_w = os.pipe()
+        self._stopped = False
+
+    # ---------- lifecycle ---------- #
+
+    def bind(self) -> None:
+        """Open the listening sockets (raises OSError if a port is taken)."""
+        for forward in self.forwards:
+            family = socket.AF_INET6 if ":" in forward.bind_host else socket.AF_INET
+            listener = socket.socket(family, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                listener.bind((forward.bind_host, forward.bind_port))
+                listener.listen(128)
+            except OSError:
+                listener.close()
+                self.close()
+                raise
+            listener.setblocking(False)
+            if forward.bind_port == 0:  # tests bind to an ephemeral port
+                forward.bind_port = listener.getsockname()[1]
+            self._listeners[listener] = forward
+
+    def stop(self) -> None:
+        """Make `serve()` return True (thread-safe)."""
+        self._stopped = True
+        self._wake()
+
+    def close(self) -> None:
+        for listener in self._listeners:
+            listener.close()
+        self._listeners.clear()
+        for fd in (self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+
+    # ---------- event loop ---------- #
+
+    def serve(self, transport) -> bool:
+        """
+        Relay traffic until `stop()` (returns True) or until `transport`
+        dies (returns False). Open forwarded connections are closed on return.
+        """
+        self._selector = selectors.DefaultSelector()
+        self._pairs: List[_Pair] = []
+        # Per call, so a channel opened on a dead transport never reaches the next serve().
+        opened: "queue.Queue[Tuple[socket.socket, Forward, object, Optional[str]]]" = queue.Queue()
+        pending: Set[socket.socket] = set()  # accepted, channel not open yet
+        finished = threading.Lock()
+        state = {"done": False}
+
+        self._selector.register(self._wake_r, selectors.EVENT_READ, ("wake", None))
+        for listener, forward in self._listeners.items():
+            self._selector.register(listener, selectors.EVENT_READ, ("listen", forward))
+        opener = ThreadPoolExecutor(max_workers=OPEN_WORKERS, thread_name_prefix="odooflow-tunnel-open")
+
+        def open_channel(sock: socket.socket, forward: Forward) -> None:
+            channel, error = None, None
+            try:
+                channel = transport.open_channel(
+                    "direct-tcpip",
+                    (forward.dest_host, forward.dest_port),
+                    sock.getpeername()[:2],
+                    timeout=OPEN_TIMEOUT,
+                )
+            except Exception as exc:  # noqa: BLE001 — reported, the tunnel keeps running
+                error = str(exc) or type(exc).__name__
+            with finished:
+                if not state["done"]:
+                    opened.put((sock, forward, channel, error))
+                    self._wake()
+                    return
+            # serve() has returned: nobody will adopt these.
+            if channel is not None:
+                channel.close()
+            sock.close()
+
+        try:
+            while not self._stopped:
+                if not transport.is_active():
+                    return False
+                # The channel has no write readiness to select on: while data
+                # waits for window space, poll for it every few milliseconds.
+                waiting = any(pair.up for pair in self._pairs)
+                for key, events in self._selector.select(timeout=0.02 if waiting else 1.0):
+                    kind, item = key.data
+                    if kind == "wake":
+                        os.read(self._wake_r, 4096)
+                        self._adopt_opened(opened, pending)
+                    elif kind == "listen":
+                        try:
+                            sock, _ = key.fileobj.accept()
+                        except OSError:
+                            continue
+                        sock.setblocking(False)
+                        if sock.family in (socket.AF_INET, socket.AF_INET6):
+                            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                        pending.add(sock)
+                        opener.submit(open_channel, sock, item)
+                    elif item in self._pairs:  # may have been closed earlier in this batch
+                        if kind == "sock":
+                            if events & selectors.EVENT_READ:
+                                self._read_local(item)
+                            if events & selectors.EVENT_WRITE:
+                                self._write_local(item)
+                        else:
+                            self._read_remote(item)
+                        self._update(item)
+                for pair in [p for p in self._pairs if p.up]:
+                    self._write_remote(pair)
+                    self._update(pair)
+            return True
+        finally:
+            with finished:
+                state["done"] = True
+            opener.shutdown(wait=False, cancel_futures=True)
+            while True:
+                try:
+                    sock, _, channel, _ = opened.get_nowait()
+                except queue.Empty:
+                    break
+                pending.discard(sock)
+                if channel is not None:
+                    channel.close()
+                sock.close()
+            # Cancelled opens never ran; running ones fail on the closed socket.
+            for sock in pending:
+                sock.close()
+            for pair in list(self._pairs):
+                self._close_pair(pair)
+            self._selector.close()
+
+    def _adopt_opened(self, opened: "queue.Queue", pending: Set[socket.socket]) -> None:
+        while True:
+            try:
+                sock, forward, channel, error = opened.get_nowait()
+            except queue.Empty:
+                return
+            pending.discard(sock)
+            if channel is None:
+                self.log(f"✗ {forward}: {error}")
+                sock.close()
+                continue
+            channel.setblocking(False)
+            pair = _Pair(sock, channel, forward)
+            self._pairs.append(pair)
+            self.active += 1
+            self.total += 1
+            self._update(pair)
+
+    # ---------- per-connection state ---------- #
+
+    def _watch(self, pair: _Pair, obj, events: int, kind: str) -> None:
+        current = pair.events.get(obj, 0)
+        if events == current:
+            return
+        if not current:
+            self._selector.register(obj, events, (kind, pair))
+        elif not events:
+            self._selector.unregister(obj)
+        else:
+            self._selector.modify(obj, events, (kind, pair))
+        pair.events[obj] = events
+
+    def _update(self, pair: _Pair) -> None:
+        """Propagate EOFs, then watch only the directions that have room to move."""
+        if pair not in self._pairs:
+            return
+        if pair.sock_eof and not pair.up and not pair.up_closed:
+            pair.up_closed = True
+            try:
+                pair.channel.shutdown_write()
+            except Exception:  # noqa: BLE001
+                pass
+        if pair.channel_eof and not pair.down and not pair.down_closed:
+            pair.down_closed = True
+            try:
+                pair.sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+        if pair.done:
+            self._close_pair(pair)
+            return
+        # A full buffer stops reading its source: that is the backpressure.
+        sock_events = 0
+        if not pair.sock_eof and len(pair.up) < BUFFER_LIMIT:
+            sock_events |= selectors.EVENT_READ
+        if pair.down:
+            sock_events |= selectors.EVENT_WRITE
+        channel_events = selectors.EVENT_READ if not pair.channel_eof and len(pair.down) < BUFFER_LIMIT else 0
+        self._watch(pair, pair.sock, sock_events, "sock")
+        self._watch(pair, pair.channel, channel_events, "channel")
+
+    def _close_pair(self, pair: _Pair) -> None:
+        for obj in (pair.sock, pair.channel):
+            if pair.events.pop(obj, 0):
+                try:
+                    self._selector.unregister(obj)
+                except (KeyError, ValueError):
+                    pass
+            try:
+                obj.close()
+            except OSError:
+                pass
+        if pair in self._pairs:
+            self._pairs.remove(pair)
+            self.active -= 1
+
+    def _read_local(self, pair: _Pair) -> None:
+        try:
+            data = pair.sock.recv(CHUNK_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if data:
+            pair.up += data
+        else:
+            pair.sock_eof = True
+
+    def _write_local(self, pair: _Pair) -> None:
+        try:
+            sent = pair.sock.send(pair.down)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self._close_pair(pair)
+            return
+        self.bytes_down += sent
+        del pair.down[:sent]
+
+    def _read_remote(self, pair: _Pair) -> None:
+        try:
+            data = pair.channel.recv(CHUNK_SIZE)
+        except (socket.timeout, BlockingIOError):
+            return
+        except Exception:  # noqa: BLE001
+            data = b""
+        if data:
+            pair.down += data
+        else:
+            pair.channel_eof = True
+
+    def _write_remote(self, pair: _Pair) -> None:
+        while pair.up and pair.channel.send_ready():
+            try:
+                sent = pair.channel.send(pair.up[:CHUNK_SIZE])
+            except (socket.timeout, BlockingIOError):
+                return
+            except Exception:  # noqa: BLE001
+                sent = 0
+            if not sent:  # the channel is closed
+                self._close_pair(pair)
+                return
+            self.bytes_up += sent
+            del pair.up[:sent]
+
+
+__all__ = ["Forward", "parse_forward", "TunnelServer", "DEFAULT_BIND"]
@@ -0,0 +1,447 @@
+"""
+File watching and live sync for `odooflow push --watch`.
+
+A watcher reports project-relative paths that were touched; `debounced()`
+groups bursts of saves into one batch; `WatchSession` keeps one
+authenticated SSH connection (and its SFTP channel) open and applies each
+batch to the remote module directory: small batches are written file by
+file over SFTP, larger ones go through the usual tar + extract.
+
+On Linux the watcher uses inotify (through ctypes, no extra dependency);
+everywhere else, or when inotify is unavailable (e.g. watch limit
+reached), it falls back to polling mtimes.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import posixpath
+import select
+import shlex
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+import paramiko
+
+from odooflow.utils import delta, transfer
+from odooflow.utils.ssh import (
+    _run_remote,
+    compress_directory,
+    remove_remote_paths,
+    resolve_remote_path,
+)
+
+
+DEFAULT_DEBOUNCE = 0.2
+# Flush a batch after this long even if saves keep coming.
+MAX_BATCH_DELAY = 1.0
+DEFAULT_POLL_INTERVAL = 0.5
+# Up to this many files are written one by one over SFTP; above it, tar wins.
+SFTP_BATCH_LIMIT = 32
+# Editor swap / backup files that should never be shipped.
+IGNORED_SUFFIXES = (".swp", ".swx", ".swo", "~", ".tmp")
+IGNORED_NAMES = {"4913"}  # vim's write-permission probe
+
+
+def _is_ignored(rel_path: str, exclude_dirs: Set[str]) -> bool:
+    parts = Path(rel_path).parts
+    if not parts or any(part in exclude_dirs for part in parts):
+        return True
+    name = parts[-1]
+    return name in IGNORED_NAMES or name.startswith(".#") or name.endswith(IGNORED_SUFFIXES)
+
+
+# --------------------------------------------------------------------------- #
+# Watchers
+# --------------------------------------------------------------------------- #
+
+
+class PollingWatcher:
+    """Detect changes by comparing (mtime, size) snapshots of the tree."""
+
+    def __init__(self, root: Path, exclude_dirs: Optional[Set[str]] = None, interval: float = DEFAULT_POLL_INTERVAL):
+        self.root = Path(root)
+        self.exclude_dirs = exclude_dirs or set()
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for dirpath, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if d not in self.exclude_dirs]
+            for name in files:
+                path = Path(dirpath) / name
+                rel = path.relative_to(self.root).as_posix()
+                if _is_ignored(rel, self.exclude_dirs):
+                    continue
+                try:
+                    st = path.lstat()
+                except OSError:
+                    continue
+                snapshot[rel] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def poll(self, timeout: Optional[float] = None) -> Set[str]:
+        """Wait up to `timeout` seconds (forever if None) for changes."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            changed = {
+                rel for rel in set(current) | set(self._snapshot)
+                if current.get(rel) != self._snapshot.get(rel)
+            }
+            self._snapshot = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            wait = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            time.sleep(max(0.0, wait))
+
+    def close(self) -> None:
+        pass
+
+
+# <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC if hasattr(os, "O_CLOEXEC") else 0
+_WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """
+    Recursive inotify watcher (Linux only). Raises OSError when inotify is
+    not available so callers can fall back to `PollingWatcher`.
+    """
+
+    def __init__(self, root: Path, exclude_dirs: Optional[Set[str]] = None):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name or "libc.so.6", use_errno=True)
+        self.root = Path(root)
+        self.exclude_dirs = exclude_dirs or set()
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._dirs: Dict[int, str] = {}  # watch descriptor -> rel dir ("" = root)
+        try:
+            self._add_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, path: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(path)), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch({path}): {os.strerror(err)}")
+        rel = path.relative_to(self.root).as_posix()
+        self._dirs[wd] = "" if rel == "." else rel
+
+    def _add_tree(self, top: Path) -> Set[str]:
+        """Watch `top` and its subdirectories; return the files already in them."""
+        found = set()
+        for dirpath, dirs, files in os.walk(top):
+            dirs[:] = [d for d in dirs if d not in self.exclude_dirs]
+            self._add_watch(Path(dirpath))
+            for name in files:
+                found.add((Path(dirpath) / name).relative_to(self.root).as_posix())
+        return found
+
+    def _read_events(self) -> Set[str]:
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="surrogateescape")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    # Lost events: report everything and let the caller sort it out.
+                    changed |= self._add_tree(self.root)
+                    continue
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                parent = self._dirs.get(wd)
+                if parent is None or not name:
+                    continue
+                rel = posixpath.join(parent, name) if parent else name
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and name not in self.exclude_dirs:
+                        # Files may land in a new directory before we watch it.
+                        changed |= self._add_tree(self.root / rel)
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        # Trailing slash: the whole directory went away.
+                        changed.add(rel + "/")
+                    continue
+                changed.add(rel)
+        return {rel for rel in changed if not _is_ignored(rel, self.exclude_dirs)}
+
+    def poll(self, timeout: Optional[float] = None) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], wait)
+            if ready:
+                changed = self._read_events()
+                if changed:
+                    return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def make_watcher(root: Path, exclude_dirs: Optional[Set[str]] = None, log: Callable[[str], None] = print):
+    """inotify when possible, polling otherwise."""
+    try:
+        return InotifyWatcher(root, exclude_dirs)
+    except (OSError, AttributeError) as e:
+        log(f"ℹ️  inotify unavailable ({e}); polling for changes every {DEFAULT_POLL_INTERVAL}s.")
+        return PollingWatcher(root, exclude_dirs)
+
+
+def debounced(
+    watcher,
+    debounce: float = DEFAULT_DEBOUNCE,
+    max_delay: float = MAX_BATCH_DELAY,
+    timeout: Optional[float] = None,
+) -> Set[str]:
+    """
+    Block for the next change (up to `timeout`), then keep collecting until
+    the tree has been quiet for `debounce` seconds or `max_delay` has passed.
+    """
+    batch = watcher.poll(timeout)
+    if not batch:
+        return batch
+    started = time.monotonic()
+    while True:
+        remaining = max_delay - (time.monotonic() - started)
+        if remaining <= 0:
+            return batch
+        more = watcher.poll(min(debounce, remaining))
+        if not more:
+            return batch
+        batch |= more
+
+
+# --------------------------------------------------------------------------- #
+# Remote side
+# --------------------------------------------------------------------------- #
+
+
+class WatchSession:
+    """
+    One persistent SSH connection to a server profile, applying batches of
+    changed paths to `<remote_path>/<module>`.
+
+    `connect` is a zero-argument callable returning an authenticated
+    `paramiko.SSHClient`; it is called again if the connection drops.
+    When the client belongs to someone else (a `ConnectionManager`),
+    `release(client)` hands it back instead of the session closing it.
+    """
+
+    def __init__(
+        self,
+        local_path: Path,
+        remote_path: str,
+        connect: Callable[[], paramiko.SSHClient],
+        exclude_dirs: Optional[Set[str]] = None,
+        transfer_settings: Optional[transfer.TransferSettings] = None,
+        log: Callable[[str], None] = print,
+        release: Optional[Callable[[paramiko.SSHClient], None]] = None,
+    ):
+        self.local_path = Path(local_path).resolve()
+        self.remote_path = remote_path
+        self.exclude_dirs = exclude_dirs or set()
+        self.transfer_settings = transfer_settings
+        self.log = log
+        self._connect = connect
+        self._release = release
+        self.ssh = None
+        self.sftp = None
+        self.module_root = None
+        self._known_dirs: Set[str] = set()
+
+    def open(self) -> None:
+        self.ssh = self._connect()
+        self.sftp = self.ssh.open_sftp()
+        self.module_root = f"{resolve_remote_path(self.sftp, self.remote_path)}/{self.local_path.name}"
+        self._known_dirs = {self.module_root}
+
+    def close(self) -> None:
+        sftp, ssh = self.sftp, self.ssh
+        self.sftp = self.ssh = None
+        try:
+            if sftp is not None:
+                sftp.close()
+        except Exception:  # noqa: BLE001 - already broken
+            pass
+        try:
+            if ssh is not None and self._release is not None:
+                self._release(ssh)
+            elif ssh is not None:
+                ssh.close()
+        except Exception:  # noqa: BLE001 - already broken
+            pass
+
+    def _connected(self) -> bool:
+        transport = self.ssh.get_transport() if self.ssh is not None else None
+        return transport is not None and transport.is_active()
+
+    def __enter__(self) -> "WatchSession":
+        self.open()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _classify(self, paths: Iterable[str]) -> delta.ChangeSet:
+        """Uploads / deletions by what is on disk now; removed directories keep their trailing '/'."""
+        changes = delta.ChangeSet()
+        for rel in paths:
+            local = self.local_path / rel
+            if rel.endswith("/"):
+                if not local.exists():
+                    changes.delete.add(rel)
+                continue
+            if local.is_dir() and not local.is_symlink():
+                continue
+            if os.path.lexists(local):
+                changes.upload.add(rel)
+            else:
+                changes.delete.add(rel)
+        return changes
+
+    def _ensure_dirs(self, rel_paths: Iterable[str]) -> None:
+        needed = {
+            posixpath.dirname(f"{self.module_root}/{rel}") for rel in rel_paths
+        } - self._known_dirs
+        if needed:
+            _run_remote(self.ssh, "mkdir -p -- " + " ".join(shlex.quote(d) for d in sorted(needed)))
+            self._known_dirs |= needed
+
+    def _put_files(self, paths: Set[str]) -> Set[str]:
+        """Write `paths` over SFTP; returns those deleted locally since they were classified."""
+        self._ensure_dirs(paths)
+        vanished = set()
+        for rel in sorted(paths):
+            remote = f"{self.module_root}/{rel}"
+            try:
+                fh = open(self.local_path / rel, "rb")
+            except FileNotFoundError:
+                vanished.add(rel)
+                continue
+            with fh:
+                self.sftp.putfo(fh, remote, confirm=False)
+                mode = os.fstat(fh.fileno()).st_mode
+            self.sftp.chmod(remote, mode & 0o7777)
+        return vanished
+
+    def _put_archive(self, paths: Set[str]) -> Set[str]:
+        try:
+            archive = compress_directory(self.local_path, self.exclude_dirs, paths=paths, log=lambda m: None)
+        except FileNotFoundError:
+            # A file went away while archiving (an editor's swap file, a checkout):
+            # send this batch file by file, which skips whatever is gone.
+            return self._put_files(paths)
+        remote_archive = f"{self.module_root}.odooflow-watch.tar.gz"
+        try:
+            transfer.put_file(self.ssh.get_transport(), archive, remote_archive, self.transfer_settings)
+            _run_remote(
+                self.ssh,
+                f"tar -xzf {shlex.quote(remote_archive)} -C {shlex.quote(self.module_root)} "
+                f"--strip-components=1 && rm -f {shlex.quote(remote_archive)}",
+            )
+        finally:
+            archive.unlink()
+        return set()
+
+    def _apply(self, changes: delta.ChangeSet) -> None:
+        if changes.upload:
+            if len(changes.upload) <= SFTP_BATCH_LIMIT:
+                vanished = self._put_files(changes.upload)
+            else:
+                vanished = self._put_archive(changes.upload)
+            # Deleted locally in the meantime: the remote copy goes too.
+            changes.upload -= vanished
+            changes.delete |= vanished
+        files = {p for p in changes.delete if not p.endswith("/")}
+        dirs = changes.delete - files
+        if files:
+            remove_remote_paths(self.ssh, self.module_root, files)
+        if dirs:
+            _run_remote(
+                self.ssh,
+                f"cd {shlex.quote(self.module_root)} && rm -rf -- "
+                + " ".join(shlex.quote(d.rstrip("/")) for d in sorted(dirs)),
+            )
+            gone = {f"{self.module_root}/{d.rstrip('/')}" for d in dirs}
+            self._known_dirs = {
+                k for k in self._known_dirs if not any(k == g or k.startswith(g + "/") for g in gone)
+            }
+        try:
+            delta.write_marker(self.sftp, self.module_root, self.local_path)
+        except (IOError, OSError):
+            pass  # the next full push re-creates it
+
+    def sync(self, paths: Iterable[str]) -> delta.ChangeSet:
+        """
+        Ship `paths` (uploads or deletions, decided from the local tree).
+        Reconnects once if the connection dropped; other errors, such as a
+        remote permission problem, are raised as they are.
+        """
+        changes = self._classify(p for p in paths if not _is_ignored(p, self.exclude_dirs))
+        if not changes:
+            return changes
+        try:
+            self._apply(changes)
+        except (paramiko.SSHException, EOFError, OSError) as e:
+            if isinstance(e, OSError) and self._connected():
+                raise
+            self.log(f"⚠️  Sync failed ({e}); reconnecting ...")
+            self.close()
+            self.open()
+            self._apply(changes)
+        return changes
+
+
+__all__ = [
+    "DEFAULT_DEBOUNCE",
+    "PollingWatcher",
+    "InotifyWatcher",
+    "make_watcher",
+    "debounced",
+    "WatchSession",
+]
@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _no_ssh_agentd(tmp_path_factory, monkeypatch):
+    """Keep a developer's running `odooflow ssh-agentd` out of the tests."""
+    sock = tmp_path_factory.mktemp("agentd") / "absent.sock"
+    monkeypatch.setenv("ODOOFLOW_AGENTD_SOCK", str(sock))
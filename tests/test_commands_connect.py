@@ -1,4 +1,7 @@
 import io
+import os
+import subprocess
+import time
 import json
 from unittest.mock import MagicMock, patch
 from pathlib import Path
@@ -15,6 +18,7 @@ from odooflow.commands.connect import (
     _open_client,
 )
 from odooflow.commands.connect import connect as server_connect
+from tests.test_utils_ssh import FakeChannel
 
 
 @pytest.fixture
@@ -149,6 +153,14 @@ class TestResolveProfile:
                 _resolve_profile("ghost")
 
 
+def test_sub_second_keepalive_is_not_turned_off():
+    from odooflow.commands.connect import _transport_keepalive
+
+    assert _transport_keepalive(0.5) == 1
+    assert _transport_keepalive(2.6) == 3
+    assert _transport_keepalive(0) == 0
+
+
 # --------------------------------------------------------------------------- #
 # Unit tests: _open_client
 # --------------------------------------------------------------------------- #
@@ -227,24 +239,24 @@ def make_fake_channel(stdout_text: str = "", stderr_text: str = "", exit_status:
 def make_fake_client(exec_outputs):
     """
     exec_outputs is a list of (stdout_text, stderr_text, exit_status) tuples,
-    one per exec_command call. Returns a fake SSHClient whose exec_command
-    pops from the list.
+    one per command. Returns a fake SSHClient whose channels pop from the
+    list.
     """
     client = MagicMock()
     iter_outputs = list(exec_outputs)
 
-    def exec_command(*args, **kw):
+    def open_session(*args, **kw):
         if not iter_outputs:
             stdout, stderr, status = "", "", 0
         else:
             stdout, stderr, status = iter_outputs.pop(0)
-        s = MagicMock()
-        s.read.return_value = stdout.encode()
-        s.channel.recv_exit_status.return_value = status
-        e = MagicMock(); e.read.return_value = stderr.encode()
-        return (MagicMock(), s, e)
+        return FakeChannel(
+            out=[stdout.encode()] if stdout else [],
+            err=[stderr.encode()] if stderr else [],
+            exit_status=status,
+        )
 
-    client.exec_command.side_effect = exec_command
+    client.get_transport.return_value.open_session.side_effect = open_session
     client.close = MagicMock()
     return client
 
@@ -322,6 +334,40 @@ class TestInteractiveShell:
         assert rc == 0
         assert shell._pre["directory"] == "/tmp"
 
+    def test_commands_run_in_the_session_directory(self):
+        shell, _ = self._build(outputs=[], stdin_text="cd odoo\nls -la\npwd\nexit\n")
+        client = shell._client_factory()
+        shell._client_factory = lambda: client
+        channels = []
+        open_session = client.get_transport.return_value.open_session.side_effect
+        client.get_transport.return_value.open_session.side_effect = (
+            lambda *a, **kw: channels.append(open_session()) or channels[-1]
+        )
+        assert shell.run() == 0
+        assert shell._pre["directory"] == "/srv/odoo"
+        assert channels[0].command.startswith("cd /srv/odoo 2>/dev/null || {")
+        assert channels[0].command.endswith("; ls -la")
+        # The missing-directory notice is only attached to the first command.
+        assert channels[1].command == "cd /srv/odoo 2>/dev/null || cd; pwd"
+
+    def test_missing_session_directory_falls_back_to_home(self, tmp_path):
+        shell, _ = self._build(outputs=[], stdin_text="", cwd="~/not-pushed-yet")
+        command = shell._in_directory("pwd")
+        assert command.startswith("cd ~/not-pushed-yet ")
+        proc = subprocess.run(
+            ["sh", "-c", command], capture_output=True, text=True, env={"HOME": str(tmp_path), "PATH": os.defpath}
+        )
+        assert proc.returncode == 0
+        assert proc.stdout.strip() == str(tmp_path)
+        assert "~/not-pushed-yet does not exist" in proc.stderr
+
+        (tmp_path / "not-pushed-yet").mkdir()
+        proc = subprocess.run(
+            ["sh", "-c", shell._in_directory("pwd")], capture_output=True, text=True,
+            env={"HOME": str(tmp_path), "PATH": os.defpath},
+        )
+        assert proc.stdout.strip() == str(tmp_path / "not-pushed-yet")
+
     def test_quit_exit_builtin(self):
         shell, _ = self._build(outputs=[], stdin_text="quit\n")
         rc = shell.run()
@@ -333,17 +379,13 @@ class TestInteractiveShell:
         client = MagicMock()
         call_count = {"n": 0}
 
-        def exec_command(*a, **kw):
+        def open_session(*a, **kw):
             call_count["n"] += 1
             if call_count["n"] == 1:
                 raise EOFError("Connection reset")
-            chan = MagicMock()
-            chan.recv_exit_status.return_value = 0
-            s = MagicMock(); s.read.return_value = b"after reconnect"
-            e = MagicMock(); e.read.return_value = b""
-            return (MagicMock(), s, e)
+            return FakeChannel(out=[b"after reconnect"])
 
-        client.exec_command.side_effect = exec_command
+        client.get_transport.return_value.open_session.side_effect = open_session
         client.close = MagicMock()
 
         pre = {
@@ -375,10 +417,8 @@ class TestInteractiveShell:
     def test_reconnect_declined_exits_cleanly(self):
         client = MagicMock()
 
-        def exec_command(*a, **kw):
-            raise EOFError("gone")
-
-        client.exec_command.side_effect = exec_command
+        open_session = client.get_transport.return_value.open_session
+        open_session.side_effect = EOFError("gone")
         client.close = MagicMock()
 
         pre = {
@@ -400,7 +440,55 @@ class TestInteractiveShell:
             rc = shell.run()
         assert rc == 0  # declines -> 0
         # Only one client instance; no reconnect happened.
-        assert client.exec_command.call_count == 1
+        assert open_session.call_count == 1
+
+    def test_dead_link_reconnects_before_the_next_command(self):
+        """A heartbeat-detected drop reconnects without a failed command or a prompt."""
+        dead = MagicMock()
+        dead.get_transport.return_value.is_active.return_value = False
+        alive = MagicMock()
+        alive.get_transport.return_value.open_session.return_value = FakeChannel(out=[b"ok\n"])
+        clients = iter([dead, alive])
+
+        pre = {
+            "host": "h", "port": 22, "user": "u", "directory": "/",
+            "key_path": None, "password": "pw",
+        }
+        from odooflow.commands.connect import InteractiveShell
+        shell = InteractiveShell(
+            client_factory=lambda: next(clients), pre=pre, console=MagicMock(), keepalive=30,
+        )
+        shell._setup_tty = lambda: None  # type: ignore[assignment]
+        shell._restore_tty = lambda: None  # type: ignore[assignment]
+
+        class WaitForHeartbeat(io.StringIO):
+            def read(self, n=-1):
+                deadline = time.monotonic() + 3
+                while shell._link_lost is None and time.monotonic() < deadline and self.tell() == 0:
+                    time.sleep(0.01)
+                return super().read(n)
+
+        shell._stdin = WaitForHeartbeat("ls\nexit\n")
+        with patch("odooflow.commands.connect.typer.confirm") as confirm:
+            assert shell.run() == 0
+        confirm.assert_not_called()
+        dead.get_transport.return_value.open_session.assert_not_called()
+        alive.get_transport.return_value.open_session.assert_called_once()
+
+    def test_dead_link_interrupts_terminal_input(self):
+        from odooflow.commands.connect import _LinkLost
+
+        shell, _ = self._build(outputs=[], stdin_text="")
+        stdin_r, stdin_w = os.pipe()
+        shell._stdin_fd = stdin_r
+        shell._wake_r, shell._wake_w = os.pipe()
+        try:
+            shell._on_link_dead("no reply to 3 keepalives (45s)")
+            with pytest.raises(_LinkLost, match="45s"):
+                shell._fill_input()
+        finally:
+            for fd in (stdin_r, stdin_w, shell._wake_r, shell._wake_w):
+                os.close(fd)
 
     def test_initial_connect_failure_returns_one(self):
         pre = {
@@ -423,6 +511,59 @@ class TestInteractiveShell:
         rc = shell.run()
         assert rc == 1
 
+    def test_long_output_streams_in_chunks_with_bounded_scrollback(self):
+        from odooflow.commands import connect as connect_mod
+
+        chunk = "x" * 9999 + "\n"
+        client = MagicMock()
+        client.get_transport.return_value.open_session.return_value = FakeChannel(
+            out=[chunk.encode()] * 20, err=[b"warning\n"]
+        )
+        pre = {"host": "h", "port": 22, "user": "u", "directory": "/", "key_path": None, "password": "pw"}
+        console = MagicMock()
+        shell = InteractiveShell(client_factory=lambda: client, pre=pre, console=console)
+        shell._client = client
+        assert shell._exec("cat odoo.log") is None
+
+        printed = [c.args[0] for c in console.print.call_args_list if c.args]
+        assert printed.count(chunk) == 20
+        assert "warning\n" in printed
+        out = dict(shell.scrollback)["out"]
+        assert out.startswith(f"… {200000 - connect_mod.SCROLLBACK_OUTPUT_LIMIT} earlier characters not kept …")
+        assert len(out) < connect_mod.SCROLLBACK_OUTPUT_LIMIT + 100
+
+    def test_ctrl_c_interrupts_command_but_not_session(self, monkeypatch):
+        def interrupted(*a, **kw):
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr("odooflow.commands.connect.stream_command", interrupted)
+        shell, _ = self._build(outputs=[], stdin_text="sleep 100\nexit\n")
+        assert shell.run() == 0
+        assert ("exit", "interrupted") in shell.scrollback
+
+    def test_persistent_mode_keeps_remote_state(self):
+        from tests.test_utils_remote_shell import FakeShellChannel
+
+        channel = FakeShellChannel()
+        client = MagicMock()
+        client.invoke_shell.return_value = channel
+        pre = {
+            "host": "h", "port": 22, "user": "u", "directory": "/opt/odoo",
+            "key_path": None, "password": "pw",
+        }
+        shell = InteractiveShell(
+            client_factory=lambda: client, pre=pre, console=MagicMock(), persistent=True
+        )
+        shell._setup_tty = lambda: None  # type: ignore[assignment]
+        shell._restore_tty = lambda: None  # type: ignore[assignment]
+        shell._stdin = io.StringIO("cd /srv\necho hi\nexit\n")
+        assert shell.run() == 0
+        client.exec_command.assert_not_called()
+        assert any(b"cd /srv" in data for data in channel.sent)
+        assert pre["directory"] == "/srv"
+        assert ("out", "hi\n") in shell.scrollback
+        assert channel.closed
+
 
 # --------------------------------------------------------------------------- #
 # CLI-level smoke: ensure the command is registered and --help works
@@ -481,13 +622,7 @@ class TestLineEditorReadsChars:
             "key_path": None,
             "password": "pw",
         }
-        client = MagicMock()
-        client.exec_command.side_effect = lambda *a, **kw: (
-            MagicMock(),
-            MagicMock(read=lambda: b"", channel=MagicMock(recv_exit_status=lambda: 0)),
-            MagicMock(read=lambda: b""),
-        )
-        client.close = MagicMock()
+        client = make_fake_client([])
         from odooflow.commands.connect import InteractiveShell
 
         shell = InteractiveShell(
@@ -518,7 +653,7 @@ class TestLineEditorReadsChars:
         rc = shell.run()
         assert rc == 0
         # 'ls' was executed (not 'l' + 's' on separate lines).
-        assert shell._test_client.exec_command.call_count == 1
+        assert shell._test_client.get_transport.return_value.open_session.call_count == 1
 
     def test_backspace_edits_inline(self):
         """\"hel\\x7flo\" should produce 'helo' (DEL/BS removes one char)."""
@@ -542,6 +677,32 @@ class TestLineEditorReadsChars:
         # line "second" (recalled via two ups) is appended at the end.
         assert list(shell.history) == ["first", "second", "third", "second"]
 
+    def test_up_arrow_filters_by_typed_prefix(self):
+        shell = self._build_shell(
+            "git\x1b[A\x1b[A\nexit\n",
+            history=["git status", "ls", "git log", "grep x"],
+        )
+        assert shell.run() == 0
+        assert list(shell.history)[-1] == "git status"
+
+    def test_ctrl_r_finds_and_runs_newest_match(self):
+        shell = self._build_shell(
+            "\x12log\n\x12g\x12\x1b[Cx\nexit\n",
+            history=["tail odoo.log", "ls", "git log"],
+        )
+        assert shell.run() == 0
+        # First search accepted "git log"; the second stepped back to "tail odoo.log" and edited it.
+        assert list(shell.history)[-2:] == ["git log", "tail odoo.logx"]
+
+    def test_tab_completes_remote_path(self):
+        from tests.test_utils_completion import attr
+
+        shell = self._build_shell("cat odoo.c\t\nexit\n")
+        sftp = shell._test_client.open_sftp.return_value
+        sftp.listdir_attr.return_value = [attr("odoo.conf", False), attr("addons", True)]
+        assert shell.run() == 0
+        assert list(shell.history) == ["cat odoo.conf"]
+
     def test_ctrl_c_breaks_line_returns_none(self):
         shell = self._build_shell("ls\x03exit\n")
         # The Ctrl-C cancels the current line. _read_line returns None,
@@ -549,7 +710,7 @@ class TestLineEditorReadsChars:
         rc = shell.run()
         assert rc == 0
         # The 'ls' command was NOT executed.
-        assert shell._test_client.exec_command.call_count == 0
+        assert shell._test_client.get_transport.return_value.open_session.call_count == 0
 
     def test_ctrl_d_on_empty_line_exits_cleanly(self):
         shell = self._build_shell("\x04")
@@ -584,13 +745,7 @@ class TestTTYSetupRegression:
             "host": "h", "port": 22, "user": "u", "directory": "/",
             "key_path": None, "password": "pw",
         }
-        client = MagicMock()
-        client.exec_command.side_effect = lambda *a, **kw: (
-            MagicMock(),
-            MagicMock(read=lambda: b"", channel=MagicMock(recv_exit_status=lambda: 0)),
-            MagicMock(read=lambda: b""),
-        )
-        client.close = MagicMock()
+        client = make_fake_client([])
         from odooflow.commands.connect import InteractiveShell
 
         shell = InteractiveShell(
@@ -655,4 +810,45 @@ class TestTTYSetupRegression:
         assert ch1 == "l"
         assert ch2 == "s"
         assert ch3 == "\n"
-        assert ch4 is None  # b'' => EOF
\ No newline at end of file
+        assert ch4 is None  # b'' => EOF
+
+class TestIncrementalRendering:
+    def _renderer(self):
+        from odooflow.commands.connect import _LineRenderer
+
+        stream = io.StringIO()
+        renderer = _LineRenderer(stream)
+
+        def update(text, cursor):
+            stream.seek(0)
+            stream.truncate()
+            renderer.update(list(text), cursor)
+            return stream.getvalue()
+
+        return update
+
+    def test_emits_minimal_edits(self):
+        update = self._renderer()
+        assert update("ls", 2) == "ls"
+        assert update("ls -l", 5) == " -l"           # typing at the end: just the new chars
+        assert update("ls -", 4) == "\b\x1b[K"       # backspace at the end
+        assert update("ls -", 1) == "\x1b[3D"        # Ctrl-A-ish cursor move
+        assert update("lXs -", 2) == "Xs -\x1b[3D"   # insert mid-line: rewrite the tail only
+        assert update("lXs -", 2) == ""              # nothing changed, nothing written
+        assert update("pwd", 3) == "\x1b[2Dpwd\x1b[K"  # history recall replaces the line
+
+    def test_paste_is_read_and_drawn_in_one_go(self):
+        pre = {"host": "h", "port": 22, "user": "u", "directory": "/", "key_path": None, "password": "pw"}
+        console = MagicMock()
+        shell = InteractiveShell(client_factory=lambda: None, pre=pre, console=console)
+        shell._stdin_fd = 42
+        reads = [b"echo caf\xc3", b"\xa9 && ls\n"]
+
+        def fake_os_read(fd, n):
+            return reads.pop(0) if reads else b""
+
+        with patch("odooflow.commands.connect.os.read", fake_os_read):
+            assert shell._read_line() == "echo café && ls"
+        writes = [c.args[0] for c in console.file.write.call_args_list if c.args[0]]
+        # One write per terminal read, not one per character.
+        assert writes == ["echo caf", "é && ls"]
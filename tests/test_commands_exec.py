@@ -0,0 +1,95 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from typer.testing import CliRunner
+
+from odooflow.cli import app
+from tests.test_utils_ssh import FakeChannel
+
+
+@pytest.fixture
+def runner():
+    return CliRunner(mix_stderr=False)
+
+
+@pytest.fixture
+def tmp_env_dir(tmp_path):
+    (tmp_path / ".odooflow.env.json").write_text(json.dumps({
+        "remotes": {
+            "servers": {
+                "web1": {"host": "w1", "user": "odoo", "directory": "/srv", "tags": ["prod"]},
+                "web2": {"host": "w2", "user": "odoo", "directory": "/srv", "tags": ["prod"]},
+                "qa": {"host": "q", "user": "odoo", "directory": "/srv"},
+            },
+            "default_server": "qa",
+        }
+    }))
+    return tmp_path
+
+
+def _patched(channels, behaviour):
+    def client_for_profile(self, profile, **kw):
+        host = profile["host"]
+        if isinstance(behaviour[host], Exception):
+            raise behaviour[host]
+        channel = FakeChannel(**behaviour[host])
+        channels[host] = channel
+        client = MagicMock()
+        client.get_transport.return_value.open_session.return_value = channel
+        return client
+
+    return patch("odooflow.commands.exec.ConnectionManager.client_for_profile", client_for_profile)
+
+
+def test_runs_on_named_and_tagged_profiles(runner, tmp_env_dir):
+    channels = {}
+    behaviour = {
+        "w1": {"out": [b"up 3 days\n"]},
+        "w2": {"out": [b"up 1 day\n"]},
+        "q": {"out": [b"up 9 days\n"], "err": [b"warning\n"]},
+    }
+    with patch("pathlib.Path.cwd", return_value=tmp_env_dir), _patched(channels, behaviour):
+        result = runner.invoke(app, ["server", "exec", "--servers", "qa", "--tag", "prod", "--", "uptime -p"])
+    assert result.exit_code == 0, result.stderr
+    assert {c.command for c in channels.values()} == {"uptime -p"}
+    assert set(channels) == {"q", "w1", "w2"}
+    assert "web1 | up 3 days" in result.stdout
+    assert "qa   | up 9 days" in result.stdout
+    assert "qa   | warning" in result.stderr
+    table = result.stdout[result.stdout.index("NAME"):]
+    assert [row.split()[0] for row in table.splitlines()[2:5]] == ["qa", "web1", "web2"]
+    assert "Succeeded on all 3 profile(s)" in result.stdout
+
+
+def test_failures_are_tabulated_and_exit_nonzero(runner, tmp_env_dir):
+    channels = {}
+    behaviour = {
+        "w1": {"out": [b"ok\n"]},
+        "w2": {"err": [b"boom\n"], "exit_status": 2},
+        "q": OSError("connection refused"),
+    }
+    with patch("pathlib.Path.cwd", return_value=tmp_env_dir), _patched(channels, behaviour):
+        result = runner.invoke(app, ["server", "exec", "-s", "web1,web2,qa", "-w", "2", "--", "false"])
+    assert result.exit_code == 1
+    rows = {line.split()[0]: line for line in result.stdout.splitlines() if line.startswith(("web", "qa "))}
+    assert rows["web1"].split()[2] == "0"
+    assert rows["web2"].split()[2] == "2" and rows["web2"].rstrip().endswith("failed")
+    assert "connection refused" in rows["qa"]
+    assert "2 of 3 profile(s) failed" in result.stdout
+
+
+def test_defaults_to_the_default_profile(runner, tmp_env_dir):
+    channels = {}
+    with patch("pathlib.Path.cwd", return_value=tmp_env_dir), _patched(channels, {"q": {"out": [b"hi\n"]}}):
+        result = runner.invoke(app, ["server", "exec", "--", "echo", "hi"])
+    assert result.exit_code == 0, result.stderr
+    assert channels["q"].command == "echo hi"
+
+
+def test_separate_arguments_keep_their_quoting(runner, tmp_env_dir):
+    channels = {}
+    with patch("pathlib.Path.cwd", return_value=tmp_env_dir), _patched(channels, {"q": {}}):
+        result = runner.invoke(app, ["server", "exec", "--", "grep", "-r", "two words", "/var/log/odoo"])
+    assert result.exit_code == 0, result.stderr
+    assert channels["q"].command == "grep -r 'two words' /var/log/odoo"
@@ -0,0 +1,98 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from typer.testing import CliRunner
+
+from odooflow.cli import app
+from tests.test_utils_ssh import FakeChannel
+
+
+@pytest.fixture
+def runner():
+    return CliRunner(mix_stderr=False)
+
+
+@pytest.fixture
+def tmp_env_dir(tmp_path):
+    (tmp_path / ".odooflow.env.json").write_text(json.dumps({
+        "remotes": {
+            "servers": {
+                "web1": {"host": "w1", "user": "odoo", "directory": "/srv", "tags": ["prod"],
+                         "log_path": "/var/log/odoo/web1.log"},
+                "web2": {"host": "w2", "user": "odoo", "directory": "/srv", "tags": ["prod"]},
+                "qa": {"host": "q", "user": "odoo", "directory": "/srv"},
+            },
+            "default_server": "qa",
+        }
+    }))
+    return tmp_path
+
+
+OUTPUT = {
+    "w1": [b"2024-05-01 10:00:03,000 1 ERROR db w1 late\n"],
+    "w2": [b"2024-05-01 10:00:01,000 1 ERROR db w2 early\n", b"  File \"x.py\"\n"],
+    "q": [b"2024-05-01 10:00:00,000 1 INFO db qa\n"],
+}
+
+
+def _fake_clients(channels):
+    def client_for_profile(self, profile, **kw):
+        channel = FakeChannel(out=OUTPUT[profile["host"]])
+        channels[profile["host"]] = channel
+        client = MagicMock()
+        client.get_transport.return_value.open_session.return_value = channel
+        return client
+
+    return client_for_profile
+
+
+def test_follows_default_profile_without_prefix(runner, tmp_env_dir):
+    channels = {}
+    with patch("pathlib.Path.cwd", return_value=tmp_env_dir), patch(
+        "odooflow.commands.logs.ConnectionManager.client_for_profile", _fake_clients(channels)
+    ):
+        result = runner.invoke(app, ["server", "logs", "-n", "5"])
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout == "2024-05-01 10:00:00,000 1 INFO db qa\n"
+    assert channels["q"].command == "tail -n 5 -F -- /var/log/odoo/odoo-server.log"
+
+
+def test_tagged_profiles_are_merged_in_time_order(runner, tmp_env_dir):
+    channels = {}
+    with patch("pathlib.Path.cwd", return_value=tmp_env_dir), patch(
+        "odooflow.commands.logs.ConnectionManager.client_for_profile", _fake_clients(channels)
+    ):
+        result = runner.invoke(
+            app, ["server", "logs", "--tag", "prod", "--grep", "ERROR", "--merge-window", "60"]
+        )
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout.splitlines() == [
+        "web2 | 2024-05-01 10:00:01,000 1 ERROR db w2 early",
+        'web2 |   File "x.py"',
+        "web1 | 2024-05-01 10:00:03,000 1 ERROR db w1 late",
+    ]
+    assert channels["w1"].command == (
+        "tail -n 20 -F -- /var/log/odoo/web1.log | grep --line-buffered -E -e ERROR"
+    )
+    assert set(channels) == {"w1", "w2"}
+
+
+def test_connection_failure_is_reported_per_host(runner, tmp_env_dir):
+    def client_for_profile(self, profile, **kw):
+        raise OSError("connection refused")
+
+    with patch("pathlib.Path.cwd", return_value=tmp_env_dir), patch(
+        "odooflow.commands.logs.ConnectionManager.client_for_profile", client_for_profile
+    ):
+        result = runner.invoke(app, ["server", "logs", "web1", "web2"])
+    assert result.exit_code == 1
+    assert "web1: connection refused" in result.stderr
+    assert "web2: connection refused" in result.stderr
+
+
+def test_unknown_profile_is_rejected(runner, tmp_env_dir):
+    with patch("pathlib.Path.cwd", return_value=tmp_env_dir):
+        result = runner.invoke(app, ["server", "logs", "nope"])
+    assert result.exit_code == 1
+    assert "'nope'" in result.stdout
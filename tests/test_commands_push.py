@@ -0,0 +1,165 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from typer.testing import CliRunner
+
+from odooflow.cli import app
+from odooflow.commands.push import _parse_server_names
+from odooflow.utils.gitpull import GitSource
+
+
+@pytest.fixture
+def runner():
+    return CliRunner(mix_stderr=False)
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """Module dir with three named key-auth profiles."""
+    key = tmp_path / "id_rsa"
+    key.write_text("x")
+    env = {
+        "name": "my_module",
+        "remotes": {
+            "servers": {
+                name: {"host": f"{name}.example", "user": "u", "directory": "/srv", "key_path": str(key)}
+                for name in ("staging", "qa", "prod")
+            },
+            "default_server": "staging",
+        },
+    }
+    (tmp_path / ".odooflow.env.json").write_text(json.dumps(env))
+    monkeypatch.setattr("odooflow.commands.push.config_manager.load_config", lambda *a, **kw: {"env_file": ".odooflow.env.json"})
+    return tmp_path
+
+
+def test_parse_server_names():
+    assert _parse_server_names(None) == []
+    assert _parse_server_names("a") == ["a"]
+    assert _parse_server_names(" a, b,,c ") == ["a", "b", "c"]
+
+
+class TestFanOutPush:
+    def test_all_servers_share_one_cache(self, runner, project):
+        calls = []
+
+        def fake_upload(**kw):
+            calls.append((kw["remote_host"], kw["archive_cache"]))
+            return {"sha": "abc"}
+
+        with patch("pathlib.Path.cwd", return_value=project), \
+                patch("odooflow.commands.push.upload_directory_via_ssh", side_effect=fake_upload):
+            result = runner.invoke(app, ["push", "--remote-only", "--all"])
+
+        assert result.exit_code == 0, result.stdout
+        assert sorted(h for h, _ in calls) == ["prod.example", "qa.example", "staging.example"]
+        assert len({id(c) for _, c in calls}) == 1
+        env = json.loads((project / ".odooflow.env.json").read_text())
+        assert all(s["last_deployed_sha"] == "abc" for s in env["remotes"]["servers"].values())
+
+    def test_partial_failure_does_not_abort_others(self, runner, project):
+        def fake_upload(**kw):
+            if kw["remote_host"] == "qa.example":
+                raise RuntimeError("Authentication failed")
+            return None
+
+        with patch("pathlib.Path.cwd", return_value=project), \
+                patch("odooflow.commands.push.upload_directory_via_ssh", side_effect=fake_upload) as up:
+            result = runner.invoke(app, ["push", "--remote-only", "-s", "staging,qa,prod", "-w", "2"])
+
+        assert result.exit_code == 1
+        assert up.call_count == 3
+        assert "Authentication failed" in result.stdout
+        assert "1 of 3 server(s) failed" in result.stdout
+
+    def test_unknown_profile_is_reported(self, runner, project):
+        with patch("pathlib.Path.cwd", return_value=project), \
+                patch("odooflow.commands.push.upload_directory_via_ssh", return_value=None) as up:
+            result = runner.invoke(app, ["push", "--remote-only", "-s", "staging,ghost"])
+
+        assert result.exit_code == 1
+        assert up.call_count == 1
+        assert "no such server profile" in result.stdout
+
+
+class TestMetricsJson:
+    def test_fan_out_writes_one_entry_per_server(self, runner, project):
+        def fake_upload(**kw):
+            kw["metrics"].count("bytes_uploaded", 42)
+            if kw["remote_host"] == "qa.example":
+                raise RuntimeError("Authentication failed")
+            return None
+
+        out = project / "metrics.json"
+        with patch("pathlib.Path.cwd", return_value=project), \
+                patch("odooflow.commands.push.upload_directory_via_ssh", side_effect=fake_upload):
+            result = runner.invoke(app, ["push", "--remote-only", "--all", "--metrics-json", str(out)])
+
+        assert result.exit_code == 1
+        report = json.loads(out.read_text())
+        assert report["git_push_seconds"] is None
+        by_server = {s["server"]: s for s in report["servers"]}
+        assert set(by_server) == {"staging", "qa", "prod"}
+        assert by_server["qa"]["ok"] is False
+        assert by_server["qa"]["error"] == "Authentication failed"
+        assert by_server["prod"]["counters"] == {"bytes_uploaded": 42}
+
+    def test_single_server(self, runner, project):
+        out = project / "metrics.json"
+        with patch("pathlib.Path.cwd", return_value=project), \
+                patch("odooflow.commands.push.upload_directory_via_ssh", return_value=None) as up:
+            result = runner.invoke(app, ["push", "--remote-only", "--metrics-json", str(out)])
+
+        assert result.exit_code == 0, result.stdout
+        assert up.call_args.kwargs["show_progress"] is True
+        report = json.loads(out.read_text())
+        assert [s["server"] for s in report["servers"]] == ["staging"]
+        assert report["servers"][0]["ok"] is True
+
+
+def test_watch_rejects_several_servers(runner, project):
+    with patch("pathlib.Path.cwd", return_value=project), \
+            patch("odooflow.commands.push.upload_directory_via_ssh") as up:
+        result = runner.invoke(app, ["push", "--remote-only", "--all", "--watch"])
+    assert result.exit_code == 1
+    up.assert_not_called()
+
+
+class TestDeployStrategy:
+    def _set_strategy(self, project, strategy):
+        path = project / ".odooflow.env.json"
+        env = json.loads(path.read_text())
+        env["remotes"]["servers"]["staging"]["deploy_strategy"] = strategy
+        path.write_text(json.dumps(env))
+
+    def test_git_strategy_hands_the_commit_to_the_upload(self, runner, project):
+        self._set_strategy(project, "git")
+        source = GitSource("git@gitlab.example:m.git", "a" * 40)
+        with patch("pathlib.Path.cwd", return_value=project), \
+                patch("odooflow.commands.push.gitpull.GitSource.for_checkout", return_value=source) as for_checkout, \
+                patch("odooflow.commands.push.upload_directory_via_ssh", return_value=None) as up:
+            result = runner.invoke(app, ["push", "--remote-only"])
+
+        assert result.exit_code == 0, result.stdout
+        assert for_checkout.call_args[0][0] == project
+        assert up.call_args.kwargs["git_source"] is source
+
+    def test_git_strategy_falls_back_without_a_commit(self, runner, project):
+        self._set_strategy(project, "git")
+        with patch("pathlib.Path.cwd", return_value=project), \
+                patch("odooflow.commands.push.upload_directory_via_ssh", return_value=None) as up:
+            result = runner.invoke(app, ["push", "--remote-only"])
+
+        assert result.exit_code == 0, result.stdout
+        assert up.call_args.kwargs["git_source"] is None
+        assert "not a git checkout" in result.stdout
+
+    def test_tar_strategy_is_the_default(self, runner, project):
+        with patch("pathlib.Path.cwd", return_value=project), \
+                patch("odooflow.commands.push.gitpull.GitSource.for_checkout") as for_checkout, \
+                patch("odooflow.commands.push.upload_directory_via_ssh", return_value=None) as up:
+            runner.invoke(app, ["push", "--remote-only"])
+
+        for_checkout.assert_not_called()
+        assert up.call_args.kwargs["git_source"] is None
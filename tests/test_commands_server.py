@@ -502,3 +502,167 @@ class TestServerTest:
             result = runner.invoke(app, ["server", "test"])
         assert result.exit_code != 0
         assert "[tcp]" in result.stdout
+
+    def test_reports_stage_latencies_and_records_them(self, runner, tmp_env_dir, monkeypatch):
+        from odooflow.utils import probe
+
+        env_path = tmp_env_dir / ".odooflow.env.json"
+        env_path.write_text(json.dumps({
+            "remotes": {
+                "servers": {"s": {"host": "h", "user": "u", "directory": "/srv", "password": "pw"}},
+                "default_server": "s",
+            }
+        }))
+        calls = []
+
+        def fake_probe(name, profile, probes, timeout):
+            calls.append((name, probes))
+            result = probe.ProbeResult(name, profile)
+            result.samples = {"tcp": [0.010, 0.020], "handshake": [0.050, 0.070], "auth": [0.100, 0.120]}
+            result.directory_exists = True
+            return result
+
+        monkeypatch.setattr("odooflow.commands.server.probe.probe_profile", fake_probe)
+        with patch("pathlib.Path.cwd", return_value=tmp_env_dir):
+            result = runner.invoke(app, ["server", "test", "--probes", "2"])
+        assert result.exit_code == 0, result.stdout
+        assert calls == [("s", 2)]
+        assert "[auth]  ok" in result.stdout and "p95  120.0 ms" in result.stdout
+        assert "/srv exists" in result.stdout
+        saved = json.loads(env_path.read_text())["remotes"]["servers"]["s"]
+        assert saved["last_test_ok"] is True
+        assert saved["last_test_latency"]["handshake_ms"] == {"p50": 50.0, "p95": 70.0}
+
+
+    def test_single_profile_is_probed_once_by_default(self, runner, tmp_env_dir, monkeypatch):
+        from odooflow.utils import probe
+
+        (tmp_env_dir / ".odooflow.env.json").write_text(json.dumps({
+            "remotes": {
+                "servers": {"s": {"host": "h", "user": "u", "directory": "/srv", "password": "pw"}},
+                "default_server": "s",
+            }
+        }))
+        calls = []
+
+        def fake_probe(name, profile, probes, timeout):
+            calls.append(probes)
+            result = probe.ProbeResult(name, profile)
+            result.samples = {"tcp": [0.01], "handshake": [0.02], "auth": [0.03]}
+            return result
+
+        monkeypatch.setattr("odooflow.commands.server.probe.probe_profile", fake_probe)
+        with patch("pathlib.Path.cwd", return_value=tmp_env_dir):
+            result = runner.invoke(app, ["server", "test"])
+            assert result.exit_code == 0, result.stdout
+            runner.invoke(app, ["server", "test", "--all"])
+        assert calls == [1, probe.DEFAULT_PROBES]
+        assert "(1 probe)" in result.stdout
+
+
+class TestServerTestMany:
+    @pytest.fixture
+    def fleet(self, tmp_env_dir):
+        env_path = tmp_env_dir / ".odooflow.env.json"
+        env_path.write_text(json.dumps({
+            "remotes": {
+                "servers": {
+                    "eu1": {"host": "a", "user": "u", "directory": "/", "password": "p", "tags": ["prod", "eu"]},
+                    "us1": {"host": "b", "user": "u", "directory": "/", "password": "p", "tags": ["prod"]},
+                    "qa": {"host": "c", "user": "u", "directory": "/", "password": "p"},
+                },
+            }
+        }))
+        return env_path
+
+    @pytest.fixture
+    def probed(self, monkeypatch):
+        from odooflow.utils import probe
+
+        seen = []
+
+        def fake_probe(name, profile, probes, timeout):
+            seen.append(name)
+            result = probe.ProbeResult(name, profile)
+            if profile["host"] == "b":
+                result.failed_stage, result.error = "auth", "Authentication failed."
+                result.samples["tcp"] = [0.01]
+                result.samples["handshake"] = [0.02]
+            else:
+                result.samples = {"tcp": [0.01], "handshake": [0.02], "auth": [0.03]}
+            return result
+
+        monkeypatch.setattr("odooflow.commands.server.probe.probe_profile", fake_probe)
+        return seen
+
+    def test_all_tests_every_profile_and_fails_if_any_fails(self, runner, tmp_env_dir, fleet, probed):
+        with patch("pathlib.Path.cwd", return_value=tmp_env_dir):
+            result = runner.invoke(app, ["server", "test", "--all"])
+        assert result.exit_code == 1
+        assert sorted(probed) == ["eu1", "qa", "us1"]
+        assert "auth failed: Authentication failed." in result.stdout
+        assert "1 of 3 profile(s) failed" in result.stdout
+        servers = json.loads(fleet.read_text())["remotes"]["servers"]
+        assert servers["us1"]["last_test_ok"] is False
+        assert "last_test_latency" not in servers["us1"]
+        assert servers["qa"]["last_test_latency"]["auth_ms"] == {"p50": 30.0, "p95": 30.0}
+
+    def test_tags_must_all_match(self, runner, tmp_env_dir, fleet, probed):
+        with patch("pathlib.Path.cwd", return_value=tmp_env_dir):
+            result = runner.invoke(app, ["server", "test", "--tag", "prod", "--tag", "eu"])
+        assert result.exit_code == 0, result.stdout
+        assert probed == ["eu1"]
+
+    def test_unknown_tag_exits(self, runner, tmp_env_dir, fleet, probed):
+        with patch("pathlib.Path.cwd", return_value=tmp_env_dir):
+            result = runner.invoke(app, ["server", "test", "--tag", "nope"])
+        assert result.exit_code == 1
+        assert probed == []
+
+
+class TestServerBench:
+    def _report(self):
+        from odooflow.utils import bench
+
+        report = bench.BenchReport()
+        for cipher, seconds in (("aes128-ctr", 0.5), ("aes128-gcm@openssh.com", 0.25)):
+            result = bench.BenchResult(cipher)
+            result.handshakes, result.transfers, result.size = [0.05], [seconds], 2**20
+            report.ciphers.append(result)
+        report.compressed = bench.BenchResult("aes128-gcm@openssh.com", compression=True)
+        report.compressed.handshakes, report.compressed.transfers = [0.05], [0.5]
+        report.compressed.size = 2**20
+        kex = bench.BenchResult("aes128-gcm@openssh.com", kex="curve25519-sha256@libssh.org")
+        kex.handshakes = [0.04]
+        report.kex.append(kex)
+        return report
+
+    def test_saves_winning_preferences(self, runner, tmp_env_dir):
+        env_path = tmp_env_dir / ".odooflow.env.json"
+        env_path.write_text(json.dumps({
+            "remotes": {"servers": {"prod": {"host": "p", "user": "u", "directory": "/", "password": "pw"}}}
+        }))
+        with patch("pathlib.Path.cwd", return_value=tmp_env_dir), patch(
+            "odooflow.commands.server._bench.run_bench", return_value=self._report()
+        ) as run:
+            result = runner.invoke(app, ["server", "bench", "prod", "--payload-mb", "1"])
+        assert result.exit_code == 0, result.stdout
+        assert len(run.call_args.args[1]) == 2**20
+        profile = json.loads(env_path.read_text())["remotes"]["servers"]["prod"]
+        assert profile["ssh_ciphers"] == ["aes128-gcm@openssh.com", "aes128-ctr"]
+        assert profile["ssh_kex"] == ["curve25519-sha256@libssh.org"]
+        assert profile["ssh_compression"] is False
+        assert "Fastest cipher:  aes128-gcm@openssh.com (4.0 MB/s)" in result.stdout
+
+    def test_no_save_leaves_profile_untouched(self, runner, tmp_env_dir):
+        env_path = tmp_env_dir / ".odooflow.env.json"
+        env_path.write_text(json.dumps({
+            "remotes": {"servers": {"prod": {"host": "p", "user": "u", "directory": "/", "password": "pw"}}}
+        }))
+        before = env_path.read_text()
+        with patch("pathlib.Path.cwd", return_value=tmp_env_dir), patch(
+            "odooflow.commands.server._bench.run_bench", return_value=self._report()
+        ):
+            result = runner.invoke(app, ["server", "bench", "--no-save"])
+        assert result.exit_code == 0
+        assert env_path.read_text() == before
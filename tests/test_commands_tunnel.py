@@ -0,0 +1,58 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from typer.testing import CliRunner
+
+from odooflow.cli import app
+
+
+@pytest.fixture
+def runner():
+    return CliRunner(mix_stderr=False)
+
+
+@pytest.fixture
+def tmp_env_dir(tmp_path):
+    (tmp_path / ".odooflow.env.json").write_text(json.dumps({
+        "remotes": {
+            "servers": {"qa": {"host": "q", "user": "odoo", "directory": "/srv"}},
+            "default_server": "qa",
+        }
+    }))
+    return tmp_path
+
+
+def test_rejects_a_bad_forward_spec(runner, tmp_env_dir):
+    with patch("pathlib.Path.cwd", return_value=tmp_env_dir):
+        result = runner.invoke(app, ["server", "tunnel", "-L", "8069:localhost"])
+    assert result.exit_code == 1
+    assert "port:host:hostport" in result.stderr
+
+
+def test_serves_on_the_default_profile_until_stopped(runner, tmp_env_dir):
+    served = []
+
+    def serve(self, transport):
+        served.append([str(f) for f in self.forwards])
+        return True
+
+    with patch("pathlib.Path.cwd", return_value=tmp_env_dir), \
+            patch("odooflow.commands.tunnel.TunnelServer.bind"), \
+            patch("odooflow.commands.tunnel.TunnelServer.serve", serve), \
+            patch("odooflow.commands.tunnel.ConnectionManager.client_for_profile") as client_for_profile:
+        result = runner.invoke(app, ["server", "tunnel", "-L", "8069:localhost:8069", "-L", "5433:db:5432"])
+    assert result.exit_code == 0, result.stderr
+    assert client_for_profile.call_args[0][0]["host"] == "q"
+    assert served == [["127.0.0.1:8069 → localhost:8069", "127.0.0.1:5433 → db:5432"]]
+    assert "Forwarding 127.0.0.1:5433 → db:5432 via qa" in result.stdout
+
+
+def test_first_connection_failure_exits(runner, tmp_env_dir):
+    with patch("pathlib.Path.cwd", return_value=tmp_env_dir), \
+            patch("odooflow.commands.tunnel.TunnelServer.bind"), \
+            patch("odooflow.commands.tunnel.ConnectionManager.client_for_profile",
+                  side_effect=OSError("no route to host")):
+        result = runner.invoke(app, ["server", "tunnel", "-L", "8069:localhost:8069"])
+    assert result.exit_code == 1
+    assert "no route to host" in result.stderr
@@ -337,3 +337,48 @@ class TestPersistence:
         # No servers remain; default_server is null.
         assert after["remotes"]["servers"] == {}
         assert after["remotes"]["default_server"] is None
+
+
+# --------------------------------------------------------------------------- #
+# Runtime metadata
+# --------------------------------------------------------------------------- #
+
+
+class TestRecordMetadata:
+    def test_merges_allowed_keys_only(self, tmp_path):
+        env_path = tmp_path / "env.json"
+        env = {"remotes": {"servers": {"qa": {"host": "h", "user": "u", "directory": "/"}}}}
+        env_path.write_text(json.dumps(env))
+        new_env = sp.record_metadata(
+            env_path, env, "qa", last_deployed_sha="abc", bogus="x"
+        )
+        on_disk = json.loads(env_path.read_text())
+        assert on_disk["remotes"]["servers"]["qa"]["last_deployed_sha"] == "abc"
+        assert "bogus" not in on_disk["remotes"]["servers"]["qa"]
+        assert new_env == on_disk
+        # Input dict is not mutated.
+        assert "last_deployed_sha" not in env["remotes"]["servers"]["qa"]
+
+    def test_legacy_profile_is_left_alone(self, tmp_path):
+        env_path = tmp_path / "env.json"
+        env = {"remotes": {"server": {"host": "h", "user": "u", "directory": "/"}}}
+        env_path.write_text(json.dumps(env))
+        sp.record_metadata(env_path, env, sp.DEFAULT_PROFILE_NAME, last_used="now")
+        assert json.loads(env_path.read_text()) == env
+
+
+class TestReleaseKeys:
+    def test_release_keys_validate(self):
+        base = {"host": "h", "user": "u", "directory": "/"}
+        assert sp.validate_profile({**base, "release_mode": True, "keep_releases": 3}) == []
+        assert sp.validate_profile({**base, "release_mode": "yes"})
+        assert sp.validate_profile({**base, "keep_releases": 0})
+
+    def test_deploy_strategy_validates(self):
+        base = {"host": "h", "user": "u", "directory": "/"}
+        assert sp.validate_profile({**base, "deploy_strategy": "git", "git_url": "git@h:m.git"}) == []
+        assert sp.validate_profile({**base, "deploy_strategy": "rsync"})
+        assert sp.validate_profile({**base, "git_url": ""})
+
+    def test_keep_releases_coerced(self):
+        assert sp.sanitise_profile({"keep_releases": "4"}) == {"keep_releases": 4}
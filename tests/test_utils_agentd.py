@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+from unittest.mock import MagicMock
+
+import paramiko
+import pytest
+
+from odooflow.utils import agentd
+
+
+class FakeServerChannel:
+    """The daemon-side paramiko.Channel: prints two chunks, one stderr line, exits 3."""
+
+    def __init__(self):
+        self.command = None
+        self.stdin = bytearray()
+        self.closed = False
+        self.eof_received = False
+        self._out, self._err, self._exit = [], [], None
+        self._r, w = os.pipe()
+        os.write(w, b"x")  # always select()-readable
+        os.close(w)
+
+    def fileno(self):
+        return self._r
+
+    def exec_command(self, command):
+        self.command = command
+        self._out, self._err, self._exit = [b"hello ", b"world\n"], [b"warn\n"], 3
+        self.eof_received = True
+
+    def invoke_subsystem(self, name):
+        raise paramiko.SSHException(f"subsystem {name} refused")
+
+    def recv_ready(self):
+        return bool(self._out)
+
+    def recv(self, n):
+        return self._out.pop(0)
+
+    def recv_stderr_ready(self):
+        return bool(self._err)
+
+    def recv_stderr(self, n):
+        return self._err.pop(0)
+
+    def exit_status_ready(self):
+        return self._exit is not None
+
+    def recv_exit_status(self):
+        return self._exit
+
+    def sendall(self, data):
+        self.stdin += data
+
+    def shutdown_write(self):
+        pass
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            os.close(self._r)
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    opened = []
+
+    def fake_open(user, host, port, key_path, password, strict, **kw):
+        client = MagicMock()
+        client.get_transport.return_value.is_active.return_value = True
+        client.get_transport.return_value.open_session.side_effect = lambda **kw: FakeServerChannel()
+        opened.append((user, host, port))
+        return client
+
+    monkeypatch.setattr("odooflow.utils.ssh.open_ssh_client", fake_open)
+    path = tmp_path / "agentd.sock"
+    server = agentd.AgentDaemon(path, log=lambda m: None)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if agentd.ping(path) is not None:
+            break
+        time.sleep(0.01)
+    yield path, opened
+    agentd.stop(path)
+    thread.join(timeout=5)
+
+
+def test_no_daemon_means_no_proxy(tmp_path):
+    assert agentd.ping(tmp_path / "missing.sock") is None
+    assert agentd.connect("u", "h", socket_path=tmp_path / "missing.sock") is None
+
+
+def test_exec_is_relayed_over_one_cached_transport(daemon):
+    path, opened = daemon
+    client = agentd.connect("u", "h", 22, socket_path=path)
+    stdin, stdout, stderr = client.exec_command("odoo -u all")
+    assert stdout.read() == b"hello world\n"
+    assert stderr.read() == b"warn\n"
+    assert stdout.channel.recv_exit_status() == 3
+
+    agentd.connect("u", "h", 22, socket_path=path).exec_command("true")
+    assert opened == [("u", "h", 22)]
+    status = agentd.ping(path)
+    assert [c["target"] for c in status["connections"]] == ["u@h:22"]
+
+
+def test_stream_command_works_through_the_proxy(daemon):
+    from odooflow.utils.ssh import stream_command
+
+    path, _ = daemon
+    out, err = [], []
+    status = stream_command(agentd.connect("u", "h", socket_path=path), "cmd", out.append, err.append)
+    assert (status, "".join(out), "".join(err)) == (3, "hello world\n", "warn\n")
+
+
+def test_request_failures_surface_as_ssh_exceptions(daemon):
+    path, _ = daemon
+    transport = agentd.connect("u", "h", socket_path=path).get_transport()
+    channel = transport.open_session()
+    with pytest.raises(paramiko.SSHException, match="refused"):
+        channel.invoke_subsystem("sftp")
+    channel.close()
+
+
+def test_concurrent_opens_share_one_connection(tmp_path, monkeypatch):
+    opened = []
+
+    def slow_open(user, host, port, key_path, password, strict, **kw):
+        time.sleep(0.1)
+        client = MagicMock()
+        client.get_transport.return_value.is_active.return_value = True
+        opened.append((client, kw.get("timeout")))
+        return client
+
+    monkeypatch.setattr("odooflow.utils.ssh.open_ssh_client", slow_open)
+    server = agentd.AgentDaemon(tmp_path / "agentd.sock", log=lambda m: None)
+    dead = MagicMock()
+    dead.get_transport.return_value.is_active.return_value = False
+    params = agentd._params("u", "h", 22, None, "pw", False)
+    server._clients[agentd._target_key(params)] = [dead, time.monotonic(), 0]
+
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(server._client(params))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert len(opened) == 1
+    assert opened[0][1] == agentd.CONNECT_TIMEOUT
+    assert all(c is opened[0][0] for c in clients)
+    dead.close.assert_called_once()
+
+
+def test_other_credentials_get_their_own_connection(daemon):
+    path, opened = daemon
+    agentd.connect("u", "h", 22, password="right", socket_path=path).exec_command("true")
+    agentd.connect("u", "h", 22, password="wrong", socket_path=path).exec_command("true")
+    agentd.connect("u", "h", 22, password="right", socket_path=path).exec_command("true")
+    assert opened == [("u", "h", 22)] * 2
+
+
+def test_shared_socket_directories_are_refused_and_left_alone(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o1777)
+    with pytest.raises(RuntimeError, match="writable by other users"):
+        agentd.AgentDaemon(shared / "agentd.sock", log=lambda m: None).serve_forever()
+    assert shared.stat().st_mode & 0o7777 == 0o1777
+    with pytest.raises(RuntimeError, match="does not exist"):
+        agentd.AgentDaemon(tmp_path / "missing" / "agentd.sock", log=lambda m: None).serve_forever()
+    assert not (tmp_path / "missing").exists()
+
+
+def test_default_socket_directory_is_created_private(tmp_path, monkeypatch):
+    monkeypatch.setattr(agentd.Path, "home", lambda: tmp_path)
+    agentd._prepare_socket_dir(agentd.default_socket_dir())
+    assert agentd.default_socket_dir().stat().st_mode & 0o777 == 0o700
+
+
+@pytest.fixture
+def encrypted_key_daemon(tmp_path, monkeypatch):
+    from cryptography.hazmat.primitives.asymmetric import ed25519
+
+    from odooflow.utils import keys
+    from tests.test_utils_keys import _openssh
+
+    keys.clear_cache()
+    monkeypatch.delenv(keys.PASSPHRASE_ENV, raising=False)
+    monkeypatch.setattr(keys, "_prefer_agent", lambda: False)
+    key_path = tmp_path / "id_ed25519"
+    key_path.write_bytes(_openssh(ed25519.Ed25519PrivateKey.generate(), b"s3cret"))
+    loaded = []
+
+    def open_with_key(user, host, port, key_path, password, strict, passphrase=None, interactive=True, **kw):
+        loaded.append(keys.load_private_key(key_path, passphrase, interactive=interactive))
+        client = MagicMock()
+        client.get_transport.return_value.is_active.return_value = True
+        return client
+
+    monkeypatch.setattr("odooflow.utils.ssh.open_ssh_client", open_with_key)
+    path = tmp_path / "agentd.sock"
+    server = agentd.AgentDaemon(path, log=lambda m: None)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if agentd.ping(path) is not None:
+            break
+        time.sleep(0.01)
+    yield path, str(key_path), loaded
+    agentd.stop(path)
+    thread.join(timeout=5)
+    keys.clear_cache()
+
+
+def test_encrypted_key_passphrase_is_asked_by_the_client(encrypted_key_daemon, monkeypatch):
+    from odooflow.utils import keys
+
+    path, key_path, loaded = encrypted_key_daemon
+    prompts = []
+    monkeypatch.setattr(keys.sys, "stdin", MagicMock(isatty=lambda: True))
+    monkeypatch.setattr(keys.getpass, "getpass", lambda prompt: prompts.append(prompt) or "s3cret")
+
+    assert agentd.connect("u", "h", key_path=key_path, socket_path=path) is not None
+    assert isinstance(loaded[0], paramiko.Ed25519Key)
+    assert len(prompts) == 1
+    # The daemon keeps the connection: no second prompt.
+    assert agentd.connect("u", "h", key_path=key_path, socket_path=path) is not None
+    assert len(prompts) == 1
+
+
+def test_encrypted_key_without_client_terminal_explains_the_options(encrypted_key_daemon, monkeypatch):
+    from odooflow.utils import keys
+
+    path, key_path, _ = encrypted_key_daemon
+    monkeypatch.setattr(keys.sys, "stdin", MagicMock(isatty=lambda: False))
+    with pytest.raises(keys.PassphraseRequired, match=keys.PASSPHRASE_ENV):
+        agentd.connect("u", "h", key_path=key_path, socket_path=path)
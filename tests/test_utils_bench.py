@@ -0,0 +1,80 @@
+from unittest.mock import MagicMock
+
+import paramiko
+import pytest
+
+from odooflow.utils import bench
+
+
+SPEED = {"aes128-ctr": 0.5, "aes128-gcm@openssh.com": 0.25, "aes256-ctr": 1.0}
+
+
+@pytest.fixture
+def fake_network(monkeypatch):
+    """Cipher -> transfer time; 'aes256-gcm' is refused like an old server would."""
+    calls = []
+
+    def connect(profile, cipher, kex, compression, timeout):
+        if cipher == "aes256-gcm@openssh.com":
+            raise paramiko.SSHException("Incompatible ssh server (no acceptable ciphers)")
+        calls.append((cipher, kex, compression))
+        transport = MagicMock(cipher=cipher, compression=compression)
+        handshake = 0.05 if kex == "ecdh-sha2-nistp256" else 0.08
+        return transport, handshake
+
+    def push(transport, payload, timeout):
+        seconds = SPEED[transport.cipher]
+        return seconds / 2 if transport.compression else seconds
+
+    monkeypatch.setattr(bench, "_connect", connect)
+    monkeypatch.setattr(bench, "_push_payload", push)
+    monkeypatch.setattr(bench.probe, "_authenticate", lambda *a: None)
+    return calls
+
+
+def test_ranks_ciphers_by_throughput_and_kex_by_handshake(fake_network):
+    shown = []
+    report = bench.run_bench(
+        {"host": "h", "user": "u", "password": "pw"},
+        b"x" * 2**20,
+        rounds=1,
+        ciphers=["aes128-ctr", "aes256-ctr", "aes128-gcm@openssh.com", "aes256-gcm@openssh.com"],
+        kex=["curve25519-sha256@libssh.org", "ecdh-sha2-nistp256"],
+        on_result=shown.append,
+    )
+    assert report.fastest_cipher().cipher == "aes128-gcm@openssh.com"
+    assert report.fastest_cipher().mb_per_second == pytest.approx(4.0)
+    refused = [r for r in report.ciphers if not r.ok]
+    assert [(r.cipher, r.error) for r in refused] == [("aes256-gcm@openssh.com", "not offered by the server")]
+
+    tuning = report.tuning()
+    assert tuning.ciphers == ["aes128-gcm@openssh.com", "aes128-ctr", "aes256-ctr"]
+    assert tuning.kex == ["ecdh-sha2-nistp256", "curve25519-sha256@libssh.org"]
+    assert tuning.compression is True  # twice as fast in this fake
+    assert len(shown) == 4 + 1 + 2
+    # Key exchange is timed on handshakes only, with the fastest cipher.
+    assert ("aes128-gcm@openssh.com", "ecdh-sha2-nistp256", False) in fake_network
+
+
+def test_rounds_keep_the_best_transfer(fake_network, monkeypatch):
+    times = iter([0.5, 0.25])
+    monkeypatch.setattr(bench, "_push_payload", lambda *a: next(times))
+    result = bench.measure({"host": "h"}, "aes128-ctr", payload=b"x" * 2**20, rounds=2)
+    assert result.ok and len(result.handshakes) == 2
+    assert result.mb_per_second == pytest.approx(4.0)
+
+
+def test_build_payload_uses_project_sources(tmp_path):
+    (tmp_path / "models").mkdir()
+    (tmp_path / "models" / "a.py").write_text("class A: pass\n")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "x.py").write_text("SECRET")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG")
+    payload = bench.build_payload(tmp_path, 100)
+    assert len(payload) == 100
+    assert payload.startswith(b"class A: pass\n")
+    assert b"SECRET" not in payload and b"PNG" not in payload
+
+
+def test_build_payload_without_sources(tmp_path):
+    assert len(bench.build_payload(tmp_path, 5000)) == 5000
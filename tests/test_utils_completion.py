@@ -0,0 +1,106 @@
+import stat
+import threading
+import time
+from unittest.mock import MagicMock
+
+import paramiko
+
+from odooflow.utils.completion import RemoteCompleter
+
+
+TREE = {
+    "/opt": [("odoo", True), ("odoo.conf", False), (".hidden", False), ("backup", True)],
+    "/": [("etc", True), ("opt", True)],
+    "/home/deploy": [("addons", True)],
+    "/usr/bin": [("python3", False), ("psql", False)],
+}
+
+
+def attr(name, is_dir):
+    a = paramiko.SFTPAttributes()
+    a.filename = name
+    a.st_mode = (stat.S_IFDIR if is_dir else stat.S_IFREG) | 0o755
+    return a
+
+
+def make_client():
+    client = MagicMock()
+    sftp = client.open_sftp.return_value
+    sftp.normalize.return_value = "/home/deploy"
+    sftp.listdir_attr.side_effect = lambda path: [attr(n, d) for n, d in TREE.get(path, [])]
+    stdout = MagicMock()
+    stdout.read.return_value = b"/usr/bin:/missing"
+    client.exec_command.return_value = (MagicMock(), stdout, MagicMock())
+    return client, sftp
+
+
+def test_paths_are_completed_from_one_cached_listing():
+    client, sftp = make_client()
+    completer = RemoteCompleter(client)
+    assert completer.complete("ls od", 5, "/opt") == (3, ["odoo/", "odoo.conf"])
+    assert completer.complete("cd od", 5, "/opt") == (3, ["odoo/"])
+    assert completer.complete("cat .h", 6, "/opt") == (4, [".hidden"])
+    assert sftp.listdir_attr.call_count == 1
+    client.open_sftp.assert_called_once()
+
+
+def test_absolute_home_and_relative_directories():
+    client, _ = make_client()
+    completer = RemoteCompleter(client)
+    assert completer.complete("ls /e", 5, "/opt") == (3, ["/etc/"])
+    assert completer.complete("ls ~/a", 6, "/opt") == (3, ["~/addons/"])
+    assert completer.complete("ls ../b", 7, "/opt/odoo") == (3, ["../backup/"])
+
+
+def test_home_and_relative_working_directories_are_expanded():
+    client, _ = make_client()
+    completer = RemoteCompleter(client)
+    assert completer.resolve("~/addons") == "/home/deploy/addons"
+    assert completer.resolve("addons") == "/home/deploy/addons"
+    assert completer.resolve("..", "~/addons") == "/home/deploy"
+    assert completer.complete("ls a", 4, "~") == (3, ["addons/"])
+
+
+def test_prefetch_resolves_home_paths_off_the_calling_thread():
+    client, sftp = make_client()
+    opened = threading.Event()
+    client.open_sftp.side_effect = lambda: opened.wait(5) and sftp
+    completer = RemoteCompleter(client)
+    started = time.monotonic()
+    completer.prefetch("~")
+    assert time.monotonic() - started < 1
+    opened.set()
+    for _ in range(100):
+        if not completer._inflight:
+            break
+        time.sleep(0.01)
+    assert completer.complete("ls a", 4, "~") == (3, ["addons/"])
+    assert sftp.listdir_attr.call_count == 1
+    client.open_sftp.assert_called_once()
+
+
+def test_expired_listing_is_fetched_again():
+    client, sftp = make_client()
+    completer = RemoteCompleter(client, ttl=0.0)
+    completer.complete("ls o", 4, "/opt")
+    completer.complete("ls o", 4, "/opt")
+    assert sftp.listdir_attr.call_count == 2
+
+
+def test_first_word_completes_commands_from_remote_path():
+    client, _ = make_client()
+    completer = RemoteCompleter(client)
+    assert completer.complete("p", 1, "/opt") == (0, ["printf", "psql", "pwd", "python3"])
+    completer.complete("ps", 2, "/opt")
+    client.exec_command.assert_called_once()
+
+
+def test_prefetch_warms_the_cache_in_the_background():
+    client, sftp = make_client()
+    completer = RemoteCompleter(client)
+    completer.prefetch("/opt")
+    deadline = time.monotonic() + 5
+    while "/opt" not in completer._cache and time.monotonic() < deadline:
+        time.sleep(0.01)
+    completer.complete("ls o", 4, "/opt")
+    assert sftp.listdir_attr.call_count == 1
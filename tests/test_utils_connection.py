@@ -0,0 +1,75 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from odooflow.utils import connection
+from odooflow.utils.connection import ConnectionManager
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Record every real connection attempt; each returns a live fake client."""
+    clients = []
+
+    def fake_open(user, host, port, key_path, password, strict, metrics=None, timeout=None, tuning=None, allow_agent=True):
+        client = MagicMock(name=f"{user}@{host}:{port}")
+        client.tuning = tuning
+        client.allow_agent = allow_agent
+        client.get_transport.return_value.is_active.return_value = True
+        clients.append(client)
+        return client
+
+    monkeypatch.setattr(connection, "open_ssh_client", fake_open)
+    return clients
+
+
+def test_reuses_one_client_per_host(opened):
+    manager = ConnectionManager(keepalive=15)
+    first = manager.client("u", "h", 22, key_path="/k")
+    assert manager.client("u", "h", 22, key_path="/k") is first
+    assert manager.client("u", "other", 22) is not first
+    assert len(opened) == 2
+    first.get_transport.return_value.set_keepalive.assert_called_once_with(15)
+
+
+def test_dead_transport_is_replaced(opened):
+    manager = ConnectionManager()
+    first = manager.client("u", "h")
+    first.get_transport.return_value.is_active.return_value = False
+    second = manager.client("u", "h")
+    assert second is not first
+    first.close.assert_called_once()
+
+
+def test_profile_lookup_and_close_all(opened):
+    with ConnectionManager() as manager:
+        client = manager.client_for_profile({"user": "u", "host": "h", "port": "2222", "password": "pw"})
+        assert manager.client("u", "h", 2222) is client
+    client.close.assert_called_once()
+
+
+def test_profile_algorithm_preferences_reach_the_handshake(opened):
+    manager = ConnectionManager()
+    client = manager.client_for_profile(
+        {"user": "u", "host": "h", "password": "pw", "ssh_ciphers": ["aes128-gcm@openssh.com"], "ssh_compression": True}
+    )
+    assert client.tuning.ciphers == ["aes128-gcm@openssh.com"]
+    assert client.tuning.compression is True
+
+
+def test_agent_and_default_keys_are_offered_unless_disabled(opened):
+    assert ConnectionManager().client("u", "h").allow_agent is True
+    assert ConnectionManager(allow_agent=False).client("u", "h").allow_agent is False
+
+
+def test_open_ssh_client_keeps_paramikos_agent_defaults(monkeypatch):
+    from odooflow.utils import ssh
+
+    client = MagicMock()
+    monkeypatch.setattr(ssh.paramiko, "SSHClient", lambda: client)
+    ssh.open_ssh_client("u", "h", password="pw")
+    kwargs = client.connect.call_args.kwargs
+    assert (kwargs["allow_agent"], kwargs["look_for_keys"]) == (True, True)
+    ssh.open_ssh_client("u", "h", password="pw", allow_agent=False)
+    kwargs = client.connect.call_args.kwargs
+    assert (kwargs["allow_agent"], kwargs["look_for_keys"]) == (False, False)
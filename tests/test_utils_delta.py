@@ -0,0 +1,154 @@
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from git import Actor, Repo
+
+from odooflow.utils import delta
+
+
+AUTHOR = Actor("odooflow", "odooflow@example.com")
+
+
+def _commit(repo: Repo, message: str) -> str:
+    repo.git.add(A=True)
+    return repo.index.commit(message, author=AUTHOR, committer=AUTHOR).hexsha
+
+
+@pytest.fixture
+def repo(tmp_path):
+    project = tmp_path / "my_module"
+    project.mkdir()
+    r = Repo.init(project)
+    (project / "__manifest__.py").write_text("{'name': 'my_module'}")
+    (project / "models.py").write_text("x = 1\n")
+    (project / "old.py").write_text("old\n")
+    _commit(r, "initial")
+    return r
+
+
+class TestComputeChanges:
+    def test_no_marker_means_full_upload(self, repo):
+        assert delta.compute_changes(repo.working_dir, None) is None
+
+    def test_unknown_sha_means_full_upload(self, repo):
+        assert delta.compute_changes(repo.working_dir, "0" * 40) is None
+
+    def test_not_a_repo_means_full_upload(self, tmp_path):
+        assert delta.compute_changes(tmp_path, "abc") is None
+
+    def test_committed_changes_and_deletions(self, repo):
+        root = Path(repo.working_dir)
+        base = repo.head.commit.hexsha
+        (root / "models.py").write_text("x = 2\n")
+        (root / "old.py").unlink()
+        (root / "views").mkdir()
+        (root / "views" / "a.xml").write_text("<odoo/>")
+        _commit(repo, "second")
+
+        changes = delta.compute_changes(root, base)
+        assert changes.upload == {"models.py", "views/a.xml"}
+        assert changes.delete == {"old.py"}
+
+    def test_includes_working_tree_and_untracked(self, repo):
+        root = Path(repo.working_dir)
+        base = repo.head.commit.hexsha
+        (root / "models.py").write_text("dirty\n")
+        (root / "new.py").write_text("untracked\n")
+
+        changes = delta.compute_changes(root, base)
+        assert changes.upload == {"models.py", "new.py"}
+        assert changes.delete == set()
+
+    def test_file_and_directory_swaps_are_type_changes(self, repo):
+        root = Path(repo.working_dir)
+        base = repo.head.commit.hexsha
+        (root / "old.py").unlink()
+        (root / "old.py").mkdir()
+        (root / "old.py" / "inner.py").write_text("")
+        (root / "views").mkdir()
+        (root / "views" / "a.xml").write_text("<odoo/>")
+        _commit(repo, "old.py becomes a package")
+        middle = repo.head.commit.hexsha
+
+        changes = delta.compute_changes(root, base)
+        assert (changes.upload, changes.delete) == ({"old.py/inner.py", "views/a.xml"}, {"old.py"})
+        assert delta.type_changes(changes) == {"old.py"}
+
+        repo.git.rm("-r", "views")
+        (root / "views").write_text("now a file\n")
+        _commit(repo, "views becomes a file")
+        changes = delta.compute_changes(root, middle)
+        assert delta.type_changes(changes) == {"views"}
+
+    def test_up_to_date_is_empty(self, repo):
+        changes = delta.compute_changes(repo.working_dir, repo.head.commit.hexsha)
+        assert changes is not None
+        assert not changes
+
+    def test_previously_dirty_paths_are_resent(self, repo):
+        root = Path(repo.working_dir)
+        changes = delta.compute_changes(
+            root, repo.head.commit.hexsha, previously_dirty=["models.py", "gone.py"]
+        )
+        assert changes.upload == {"models.py"}
+        assert changes.delete == {"gone.py"}
+
+    def test_excluded_dirs_are_skipped(self, repo):
+        root = Path(repo.working_dir)
+        (root / "node_modules").mkdir()
+        (root / "node_modules" / "x.js").write_text("")
+        changes = delta.compute_changes(
+            root, repo.head.commit.hexsha, exclude_dirs={"node_modules"}
+        )
+        assert not changes
+
+    def test_diverged_history_means_full_upload(self, repo):
+        root = Path(repo.working_dir)
+        (root / "models.py").write_text("branch\n")
+        deployed = _commit(repo, "on a branch that gets dropped")
+        repo.git.reset("--hard", "HEAD~1")
+        (root / "models.py").write_text("rewritten\n")
+        _commit(repo, "rewritten history")
+        assert delta.compute_changes(root, deployed) is None
+
+
+class TestMarker:
+    def _sftp(self, store):
+        sftp = MagicMock()
+
+        def _open(path, mode="r"):
+            fh = MagicMock()
+            fh.__enter__.return_value = fh
+            if "r" in mode:
+                if path not in store:
+                    raise IOError("missing")
+                fh.read.return_value = store[path].encode()
+            else:
+                fh.write.side_effect = lambda data: store.__setitem__(path, data)
+            return fh
+
+        sftp.open.side_effect = _open
+        return sftp
+
+    def test_round_trip(self, repo):
+        store = {}
+        sftp = self._sftp(store)
+        root = Path(repo.working_dir)
+        (root / "new.py").write_text("untracked\n")
+
+        written = delta.write_marker(sftp, "/srv/my_module", root)
+        assert written["sha"] == repo.head.commit.hexsha
+        assert written["dirty"] == ["new.py"]
+
+        marker = delta.read_marker(sftp, "/srv/my_module")
+        assert marker["sha"] == repo.head.commit.hexsha
+        assert "/srv/my_module/.odooflow-deploy.json" in store
+
+    def test_missing_marker_is_empty(self):
+        assert delta.read_marker(self._sftp({}), "/srv/x") == {}
+
+    def test_no_marker_outside_git(self, tmp_path):
+        store = {}
+        assert delta.write_marker(self._sftp(store), "/srv/x", tmp_path) is None
+        assert store == {}
@@ -0,0 +1,124 @@
+import subprocess
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from git import Actor, Repo
+
+from odooflow.utils import gitpull
+from odooflow.utils.gitpull import GitSource, PullUnavailable
+
+
+AUTHOR = Actor("odooflow", "odooflow@example.com")
+
+
+def _commit(repo: Repo, message: str) -> str:
+    repo.git.add(A=True)
+    return repo.index.commit(message, author=AUTHOR, committer=AUTHOR).hexsha
+
+
+@pytest.fixture
+def origin(tmp_path):
+    """A bare 'GitLab' repository and a clone with a module in a sub-directory, pushed to it."""
+    bare = Repo.init(tmp_path / "origin.git", bare=True)
+    clone = Repo.init(tmp_path / "work", initial_branch="main")
+    module = tmp_path / "work" / "my_module"
+    module.mkdir()
+    (module / "__manifest__.py").write_text("{'name': 'my_module'}")
+    (module / "models.py").write_text("x = 1\n")
+    (tmp_path / "work" / "README.md").write_text("repo root\n")
+    _commit(clone, "initial")
+    clone.create_remote("origin", bare.working_dir)
+    clone.remotes.origin.push("main:main")
+    return clone, module
+
+
+class LocalShell:
+    """Runs `exec_command` locally with sh, like a server reached over SSH."""
+
+    def __init__(self):
+        self.commands = []
+
+    def exec_command(self, command):
+        self.commands.append(command)
+        proc = subprocess.run(["sh", "-c", command], capture_output=True)
+        stdout, stderr = MagicMock(), MagicMock()
+        stdout.channel.recv_exit_status.return_value = proc.returncode
+        stdout.read.return_value = proc.stdout
+        stderr.read.return_value = proc.stderr
+        return None, stdout, stderr
+
+
+class TestGitSource:
+    def test_for_checkout_of_a_module_in_a_subdirectory(self, origin):
+        clone, module = origin
+        source = GitSource.for_checkout(module)
+        assert source.sha == clone.head.commit.hexsha
+        assert source.subdir == "my_module"
+        assert source.branch == "main"
+        assert source.url == clone.remotes.origin.url
+
+    def test_profile_url_overrides_origin(self, origin):
+        _, module = origin
+        assert GitSource.for_checkout(module, url="https://git.example/m.git").url == "https://git.example/m.git"
+
+    def test_uncommitted_changes_cannot_be_pulled(self, origin):
+        _, module = origin
+        (module / "models.py").write_text("x = 2\n")
+        with pytest.raises(PullUnavailable, match="uncommitted"):
+            GitSource.for_checkout(module)
+
+    def test_excluded_untracked_files_do_not_count(self, origin):
+        _, module = origin
+        (module / ".odooflow.env.json").write_text("{}")
+        assert GitSource.for_checkout(module, exclude_dirs={".odooflow.env.json"}).subdir == "my_module"
+
+    def test_not_a_checkout(self, tmp_path):
+        with pytest.raises(PullUnavailable, match="not a git checkout"):
+            GitSource.for_checkout(tmp_path)
+
+
+class TestPull:
+    def test_server_fetches_and_extracts_the_module(self, origin, tmp_path):
+        clone, module = origin
+        server = tmp_path / "server"
+        target = server / "my_module"
+        repo_dir = gitpull.git_dir(str(server), "my_module")
+        (module / "views.xml").write_text("<odoo/>")
+        (module / "node_modules").mkdir()
+        (module / "node_modules" / "x.js").write_text("")
+        _commit(clone, "second")
+        clone.remotes.origin.push("main:main")
+
+        gitpull.pull(LocalShell(), GitSource.for_checkout(module), repo_dir, str(target), {"node_modules"})
+
+        assert sorted(p.name for p in target.iterdir()) == ["__manifest__.py", "models.py", "views.xml"]
+        assert (target / "views.xml").read_text() == "<odoo/>"
+        assert Path(repo_dir, "HEAD").exists()
+
+    def test_known_commit_is_not_fetched_again(self, origin, tmp_path):
+        _, module = origin
+        source = GitSource.for_checkout(module)
+        repo_dir = gitpull.git_dir(str(tmp_path / "server"), "my_module")
+        gitpull.pull(LocalShell(), source, repo_dir, str(tmp_path / "a"))
+        # The clone persists: a second deploy works without reaching the origin.
+        source.url = str(tmp_path / "gone.git")
+        gitpull.pull(LocalShell(), source, repo_dir, str(tmp_path / "b"))
+        assert (tmp_path / "b" / "models.py").read_text() == "x = 1\n"
+
+    def test_unpushed_commit_is_unavailable(self, origin, tmp_path):
+        clone, module = origin
+        (module / "models.py").write_text("x = 3\n")
+        _commit(clone, "not pushed")
+        with pytest.raises(PullUnavailable):
+            gitpull.pull(
+                LocalShell(), GitSource.for_checkout(module),
+                gitpull.git_dir(str(tmp_path / "server"), "my_module"), str(tmp_path / "t"),
+            )
+        assert not (tmp_path / "t").exists()
+
+    def test_unreachable_origin_is_unavailable(self, origin, tmp_path):
+        _, module = origin
+        source = GitSource.for_checkout(module, url=str(tmp_path / "missing.git"))
+        with pytest.raises(PullUnavailable):
+            gitpull.pull(LocalShell(), source, gitpull.git_dir(str(tmp_path / "s"), "m"), str(tmp_path / "t"))
@@ -0,0 +1,92 @@
+import threading
+import time
+
+from odooflow.utils.heartbeat import PING_REQUEST, Heartbeat
+
+
+class FakeTransport:
+    def __init__(self, delay=0.0, answers=True):
+        self.delay = delay
+        self.answers = answers
+        self.active = True
+        self.requests = []
+        self._closed = threading.Event()
+
+    def is_active(self):
+        return self.active
+
+    def global_request(self, kind, data=None, wait=True):
+        self.requests.append((kind, wait))
+        if not self.answers:
+            self._closed.wait()  # like paramiko: returns only once the transport closes
+            return None
+        time.sleep(self.delay)
+        return None  # "request failed" is still a reply
+
+    def close(self):
+        self.active = False
+        self._closed.set()
+
+
+def _wait_for(predicate, seconds=3.0):
+    deadline = time.monotonic() + seconds
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_ping_measures_round_trip():
+    transport = FakeTransport(delay=0.02)
+    heartbeat = Heartbeat(transport, interval=10, timeout=1)
+    rtt = heartbeat.ping()
+    assert rtt is not None and rtt >= 20
+    assert heartbeat.rtt_ms == rtt
+    assert transport.requests == [(PING_REQUEST, True)]
+
+
+def test_rtt_is_smoothed():
+    heartbeat = Heartbeat(FakeTransport(), interval=10, timeout=1)
+    heartbeat.rtt_ms = 100.0
+    sample = heartbeat.ping()
+    assert heartbeat.last_rtt_ms == sample
+    assert sample < heartbeat.rtt_ms < 100.0
+
+
+def test_unanswered_pings_declare_the_link_dead():
+    transport = FakeTransport(answers=False)
+    reasons = []
+    heartbeat = Heartbeat(transport, interval=0.01, timeout=0.05, misses=2, on_dead=reasons.append).start()
+    assert _wait_for(lambda: heartbeat.dead)
+    assert "no reply to 2 keepalives" in heartbeat.dead_reason
+    assert reasons == [heartbeat.dead_reason]
+    assert not transport.active  # closed, so a blocked request is released
+    assert heartbeat.rtt_ms is None
+
+
+def test_inactive_transport_is_reported_immediately():
+    transport = FakeTransport()
+    transport.active = False
+    reasons = []
+    Heartbeat(transport, interval=30, on_dead=reasons.append).start()
+    assert _wait_for(lambda: reasons == ["the SSH transport closed"])
+
+
+def test_stop_suppresses_on_dead():
+    transport = FakeTransport()
+    reasons = []
+    heartbeat = Heartbeat(transport, interval=0.01, timeout=0.5, on_dead=reasons.append).start()
+    assert _wait_for(lambda: heartbeat.rtt_ms is not None)
+    heartbeat.stop()
+    transport.close()
+    time.sleep(0.05)
+    assert reasons == [] and not heartbeat.dead
+
+
+def test_proxy_transports_are_not_pinged():
+    class Proxy:
+        def is_active(self):
+            return True
+
+    heartbeat = Heartbeat(Proxy(), interval=0.01).start()
+    assert not heartbeat.supported
+    assert heartbeat.rtt_ms is None
@@ -0,0 +1,68 @@
+import os
+
+from odooflow.utils.history import CommandHistory, default_path
+
+
+def test_persists_and_loads_lazily(tmp_path):
+    path = tmp_path / "h" / "staging.history"
+    history = CommandHistory(path)
+    history.extend(["ls", "ls", "tail -f odoo.log", "multi\nline"])
+    assert oct(path.stat().st_mode & 0o777) == "0o600"
+    assert path.read_text() == "ls\ntail -f odoo.log\n"
+
+    reopened = CommandHistory(path)
+    assert reopened._loaded is False
+    reopened.append("tail -f odoo.log")  # same as the newest line on disk
+    reopened.append("df -h")
+    reopened.append("df -h")
+    assert reopened._loaded is False
+    assert list(reopened) == ["ls", "tail -f odoo.log", "df -h"]
+
+
+def test_duplicate_check_reads_a_long_last_line_from_the_end(tmp_path):
+    path = tmp_path / "staging.history"
+    long_command = "echo " + "x" * 10_000
+    path.write_text("ls\n" + long_command + "\n\n")
+    history = CommandHistory(path)
+    history.append(long_command)
+    assert history._loaded is False
+    assert list(history) == ["ls", long_command]
+
+
+def test_prefix_navigation():
+    history = CommandHistory()
+    history.extend(["git status", "ls", "git log", "grep x", "git diff"])
+    assert history.previous("git") == 4
+    assert history.previous("git", before=4) == 2
+    assert history.previous("git ", before=2) == 0
+    assert history.previous("git", before=0) is None
+    assert history.next("git", after=0) == 2
+    assert history.next("gr", after=0) == 3
+    assert history.next("git", after=4) is None
+    assert history.previous("", before=2) == 1
+
+
+def test_substring_search_uses_newest_match():
+    history = CommandHistory()
+    history.extend([f"echo {i}" for i in range(20000)] + ["tail -f /var/log/odoo.log", "ls"])
+    assert history[history.search("odoo.log")] == "tail -f /var/log/odoo.log"
+    assert history.search("echo 1999") == 19999
+    assert history.search("echo 1999", before=19999) == 19998
+    assert history.search("ls") == 20001
+    assert history.search("nothing here") is None
+    assert history.search("ec", before=1) == 0
+
+
+def test_oversized_file_is_compacted_on_load(tmp_path):
+    path = tmp_path / "big.history"
+    path.write_text("".join(f"cmd {i}\n" for i in range(100)))
+    history = CommandHistory(path, max_entries=10)
+    assert list(history) == [f"cmd {i}" for i in range(90, 100)]
+    assert path.read_text().count("\n") == 10
+
+
+def test_default_path_is_per_profile_and_safe(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    path = default_path("qa/1", "deploy", "10.0.0.5", 22)
+    assert path.parent == tmp_path / ".cache" / "odooflow" / "history"
+    assert os.sep not in path.name and path.name.startswith("qa_1__deploy@10.0.0.5_22")
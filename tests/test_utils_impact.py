@@ -0,0 +1,50 @@
+import os
+
+from odooflow.utils import impact
+
+
+def _module(root, name, depends=()):
+    path = root / name
+    path.mkdir(parents=True)
+    (path / "__manifest__.py").write_text(repr({"name": name, "depends": list(depends)}))
+    (path / "models.py").write_text("")
+    return path
+
+
+def test_single_module_project(tmp_path):
+    root = _module(tmp_path, "my_module")
+    assert impact.find_modules(root) == {"my_module": ""}
+    assert impact.affected_modules(root, ["models.py"]) == ["my_module"]
+    assert impact.affected_modules(root, []) == []
+
+
+def test_reverse_dependencies_are_followed(tmp_path):
+    _module(tmp_path, "base_ext", ["base"])
+    _module(tmp_path, "sale_ext", ["base_ext", "sale"])
+    _module(tmp_path, "report", ["sale_ext"])
+    _module(tmp_path, "unrelated", ["base"])
+    (tmp_path / "README.md").write_text("")
+
+    assert impact.affected_modules(tmp_path, ["base_ext/models.py"]) == ["base_ext", "report", "sale_ext"]
+    assert impact.affected_modules(tmp_path, ["report/models.py", "README.md"]) == ["report"]
+    assert impact.affected_modules(tmp_path, None) == ["base_ext", "report", "sale_ext", "unrelated"]
+
+
+def test_manifest_parse_is_cached_until_the_file_changes(tmp_path, monkeypatch):
+    manifest = _module(tmp_path, "a") / "__manifest__.py"
+    first = impact.read_manifest_cached(manifest)
+    assert impact.read_manifest_cached(manifest) is first
+
+    manifest.write_text(repr({"name": "a", "depends": ["sale", "stock"]}))
+    st = manifest.stat()
+    os.utime(manifest, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert impact.read_manifest_cached(manifest)["depends"] == ["sale", "stock"]
+
+
+def test_expand_command(tmp_path):
+    _module(tmp_path, "a")
+    _module(tmp_path, "b", ["a"])
+    cmd = "odoo -u {changed_modules} --stop-after-init && echo '{}'"
+    assert impact.expand_command(cmd, tmp_path, ["a/models.py"]) == "odoo -u a,b --stop-after-init && echo '{}'"
+    assert impact.expand_command(cmd, tmp_path, ["README.md"]) is None
+    assert impact.expand_command("systemctl restart odoo", tmp_path, []) == "systemctl restart odoo"
@@ -0,0 +1,88 @@
+import base64
+from unittest.mock import MagicMock
+
+import paramiko
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from odooflow.utils import keys
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    keys.clear_cache()
+    monkeypatch.delenv(keys.PASSPHRASE_ENV, raising=False)
+    monkeypatch.setattr(keys, "_prefer_agent", lambda: False)
+    yield
+    keys.clear_cache()
+
+
+def _openssh(private_key, passphrase=None):
+    encryption = (
+        serialization.BestAvailableEncryption(passphrase) if passphrase else serialization.NoEncryption()
+    )
+    return private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.OpenSSH, encryption
+    )
+
+
+@pytest.fixture
+def ed25519_key(tmp_path):
+    path = tmp_path / "id_ed25519"
+    path.write_bytes(_openssh(ed25519.Ed25519PrivateKey.generate(), b"s3cret"))
+    return str(path)
+
+
+def test_key_type_detection(tmp_path, ed25519_key):
+    rsa_pem = tmp_path / "id_rsa"
+    paramiko.RSAKey.generate(1024).write_private_key_file(str(rsa_pem))
+    ecdsa_pem = tmp_path / "id_ecdsa"
+    paramiko.ECDSAKey.generate().write_private_key_file(str(ecdsa_pem))
+    rsa_openssh = tmp_path / "id_rsa_new"
+    rsa_openssh.write_bytes(_openssh(rsa.generate_private_key(public_exponent=65537, key_size=1024)))
+    garbage = tmp_path / "garbage"
+    garbage.write_text("fake")
+
+    assert keys.key_type(ed25519_key) == "ssh-ed25519"
+    assert keys.key_type(str(rsa_pem)) == "ssh-rsa"
+    assert keys.key_type(str(ecdsa_pem)) == "ecdsa"
+    assert keys.key_type(str(rsa_openssh)) == "ssh-rsa"
+    assert keys.key_type(str(garbage)) is None
+    assert isinstance(keys.load_private_key(str(ecdsa_pem)), paramiko.ECDSAKey)
+
+
+def test_encrypted_key_is_decrypted_once(ed25519_key, monkeypatch):
+    monkeypatch.setenv(keys.PASSPHRASE_ENV, "s3cret")
+    loads = []
+    original = paramiko.Ed25519Key.from_private_key_file.__func__
+
+    def counting(cls, filename, password=None):
+        loads.append(password)
+        return original(cls, filename, password=password)
+
+    monkeypatch.setattr(paramiko.Ed25519Key, "from_private_key_file", classmethod(counting))
+    first = keys.load_private_key(ed25519_key)
+    assert isinstance(first, paramiko.Ed25519Key)
+    assert keys.load_private_key(ed25519_key) is first
+    # One attempt without a passphrase, one with it; none for the cached call.
+    assert loads == [None, "s3cret"]
+
+
+def test_encrypted_key_without_terminal_explains_the_options(ed25519_key, monkeypatch):
+    monkeypatch.setattr(keys.sys, "stdin", MagicMock(isatty=lambda: False))
+    with pytest.raises(paramiko.SSHException, match=keys.PASSPHRASE_ENV):
+        keys.load_private_key(ed25519_key)
+
+
+def test_agent_key_is_preferred_when_configured(ed25519_key, monkeypatch):
+    blob = b"\x00\x00\x00\x0bssh-ed25519" + b"\x00" * 36
+    with open(ed25519_key + ".pub", "w") as fh:
+        fh.write("ssh-ed25519 " + base64.b64encode(blob).decode() + " me@laptop\n")
+    other, held = MagicMock(), MagicMock()
+    other.asbytes.return_value = b"other"
+    held.asbytes.return_value = blob
+    monkeypatch.setattr(keys.paramiko, "Agent", lambda: MagicMock(get_keys=lambda: (other, held)))
+    monkeypatch.setattr(keys, "_prefer_agent", lambda: True)
+    monkeypatch.setattr(keys, "_load_from_file", MagicMock(side_effect=AssertionError("decrypted")))
+    assert keys.load_private_key(ed25519_key) is held
@@ -0,0 +1,86 @@
+import threading
+from unittest.mock import MagicMock
+
+from odooflow.utils.logtail import LogMerger, follow, parse_timestamp, tail_command
+from tests.test_utils_ssh import FakeChannel
+
+
+def test_tail_command_filters_on_the_server():
+    assert tail_command("/var/log/odoo.log", 50) == "tail -n 50 -F -- /var/log/odoo.log"
+    command = tail_command("/logs/my odoo.log", 0, "ERROR|WARN", ignore_case=True)
+    assert command == (
+        "tail -n 0 -F -- '/logs/my odoo.log' | grep --line-buffered -E -i -e 'ERROR|WARN'"
+    )
+
+
+def test_parse_timestamp_formats():
+    assert parse_timestamp("2024-05-01 10:00:01,123 42 INFO db x: y") == "2024-05-01 10:00:01.123000"
+    assert parse_timestamp("2024-05-01T10:00:01.5Z ok") == "2024-05-01 10:00:01.500000"
+    assert parse_timestamp("2024-05-01 10:00:01 no fraction") == "2024-05-01 10:00:01.000000"
+    assert parse_timestamp('  File "x.py", line 3') is None
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_merger_orders_hosts_by_timestamp_within_window():
+    clock, out = Clock(), []
+    merger = LogMerger(lambda host, line, err: out.append((host, line)), window=0.5, clock=clock)
+    merger.add("b", "2024-05-01 10:00:02,000 b second")
+    merger.add("a", "2024-05-01 10:00:01,000 a first")
+    merger.add("a", "Traceback (most recent call last):")
+    assert merger.flush() == 0  # still inside the window
+    clock.now = 0.6
+    merger.flush()
+    assert out == [
+        ("a", "2024-05-01 10:00:01,000 a first"),
+        ("a", "Traceback (most recent call last):"),
+        ("b", "2024-05-01 10:00:02,000 b second"),
+    ]
+
+
+def test_merger_force_flush_emits_everything():
+    out = []
+    merger = LogMerger(lambda host, line, err: out.append((host, line, err)), window=60)
+    merger.add("a", "oops", is_stderr=True)
+    assert merger.flush(force=True) == 1
+    assert out == [("a", "oops", True)]
+
+
+def _client(channel):
+    client = MagicMock()
+    client.get_transport.return_value.open_session.return_value = channel
+    return client
+
+
+def test_follow_splits_lines_across_chunks():
+    channel = FakeChannel(out=[b"one\ntw", b"o\nthree"], err=[b"tail: gone\n"], exit_status=0)
+    out, err = [], []
+    status = follow(_client(channel), "tail -F x", out.append, err.append, threading.Event())
+    assert status == 0
+    assert out == ["one", "two", "three"]
+    assert err == ["tail: gone"]
+    assert channel.command == "tail -F x"
+    assert channel.closed
+
+
+def test_follow_returns_none_when_stopped():
+    channel = FakeChannel(out=[b"line\n"], finishes=False)
+    signals = []
+    channel.send_signal = signals.append
+    stop = threading.Event()
+    out = []
+
+    def on_line(line):
+        out.append(line)
+        stop.set()
+
+    assert follow(_client(channel), "tail -F x", on_line, out.append, stop) is None
+    assert out == ["line"]
+    assert signals == ["TERM"]
+    assert channel.closed
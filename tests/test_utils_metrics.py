@@ -0,0 +1,38 @@
+from odooflow.utils.metrics import PushMetrics
+
+
+def test_phases_accumulate_in_display_order():
+    metrics = PushMetrics(server="staging")
+    with metrics.phase("upload"):
+        pass
+    with metrics.phase("connect"):
+        pass
+    with metrics.phase("upload"):
+        pass
+    with metrics.phase("custom"):
+        pass
+    assert list(metrics.ordered_phases()) == ["connect", "upload", "custom"]
+
+
+def test_phase_is_recorded_when_the_block_raises():
+    metrics = PushMetrics()
+    try:
+        with metrics.phase("extract"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert "extract" in metrics.phases
+
+
+def test_counters_and_dict():
+    metrics = PushMetrics(server="qa")
+    metrics.count("bytes_uploaded", 10)
+    metrics.count("bytes_uploaded", 5)
+    metrics.phases["upload"] = 1.0
+    metrics.finish()
+    data = metrics.to_dict()
+    assert data["server"] == "qa"
+    assert data["counters"] == {"bytes_uploaded": 15}
+    assert data["phases"] == {"upload": 1.0}
+    assert "upload 1.00s" in metrics.summary()
+    assert metrics.summary().endswith(f"total {metrics.total_seconds:.2f}s")
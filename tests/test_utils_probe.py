@@ -0,0 +1,100 @@
+from unittest.mock import MagicMock
+
+import paramiko
+import pytest
+
+from odooflow.utils import probe
+
+
+PROFILE = {"host": "h", "port": 2222, "user": "u", "directory": "/srv", "password": "pw"}
+
+
+def test_percentile_is_nearest_rank():
+    values = [5.0, 1.0, 3.0, 2.0, 4.0]
+    assert probe.percentile(values, 50) == 3.0
+    assert probe.percentile(values, 95) == 5.0
+    assert probe.percentile([7.0], 95) == 7.0
+
+
+@pytest.fixture
+def transports(monkeypatch):
+    made = []
+
+    def fake_transport(sock):
+        transport = MagicMock()
+        transport.is_authenticated.return_value = True
+        made.append(transport)
+        return transport
+
+    monkeypatch.setattr(probe.socket, "create_connection", MagicMock())
+    monkeypatch.setattr(probe.paramiko, "Transport", fake_transport)
+    monkeypatch.setattr(probe.paramiko.SFTPClient, "from_transport", MagicMock())
+    return made
+
+
+def test_probe_times_every_stage_and_reuses_last_transport(transports):
+    result = probe.probe_profile("s", PROFILE, probes=3)
+    assert result.ok and result.target == "u@h:2222"
+    assert [len(result.samples[s]) for s in probe.STAGES] == [3, 3, 3]
+    assert len(transports) == 3
+    assert all(t.close.called for t in transports)
+    transports[0].auth_password.assert_called_once_with("u", "pw")
+    sftp = probe.paramiko.SFTPClient.from_transport
+    sftp.assert_called_once_with(transports[-1])
+    sftp.return_value.stat.assert_called_once_with("/srv")
+    assert result.directory_exists is True
+    assert set(result.to_metadata()) == {"probes", "tcp_ms", "handshake_ms", "auth_ms"}
+
+
+def test_key_alias_and_home_directory(transports, monkeypatch):
+    key = object()
+    monkeypatch.setattr(probe.keys, "load_private_key", lambda path: key if path == "~/.ssh/k" else None)
+    sftp = probe.paramiko.SFTPClient.from_transport.return_value
+    sftp.normalize.return_value = "/home/u"
+    profile = {"host": "h", "user": "u", "directory": "~/odoo", "key": "~/.ssh/k"}
+    result = probe.probe_profile("s", profile, probes=1)
+    assert result.ok
+    transports[0].auth_publickey.assert_called_once_with("u", key)
+    sftp.stat.assert_called_once_with("/home/u/odoo")
+
+
+def test_profile_without_credentials_uses_the_agent_and_default_keys(transports, monkeypatch, tmp_path):
+    agent_key = object()
+    agent = MagicMock()
+    agent.get_keys.return_value = [agent_key]
+    monkeypatch.setattr(probe.paramiko, "Agent", lambda: agent)
+    monkeypatch.setattr(probe.Path, "home", lambda: tmp_path)
+    profile = {"host": "h", "user": "u", "directory": "/srv"}
+
+    result = probe.probe_profile("s", profile, probes=1)
+    assert result.ok
+    transports[0].auth_publickey.assert_called_once_with("u", agent_key)
+    agent.close.assert_called_once()
+
+    agent.get_keys.return_value = []
+    result = probe.probe_profile("s", profile, probes=1)
+    assert (result.failed_stage, result.error) == (
+        "auth", "no key or password in the profile, and no ssh-agent or ~/.ssh key was accepted"
+    )
+
+
+def test_failure_records_the_stage(transports, monkeypatch):
+    def refusing_transport(sock):
+        transport = MagicMock()
+        transport.auth_password.side_effect = paramiko.AuthenticationException("Authentication failed.")
+        transports.append(transport)
+        return transport
+
+    monkeypatch.setattr(probe.paramiko, "Transport", refusing_transport)
+    result = probe.probe_profile("s", PROFILE, probes=3)
+    assert not result.ok
+    assert (result.failed_stage, result.error) == ("auth", "Authentication failed.")
+    assert len(transports) == 1 and transports[0].close.called
+    assert result.latency("auth") is None and result.latency("tcp") is not None
+
+
+def test_tcp_failure(monkeypatch):
+    monkeypatch.setattr(probe.socket, "create_connection", MagicMock(side_effect=OSError("refused")))
+    result = probe.probe_profile("s", PROFILE)
+    assert (result.failed_stage, result.error) == ("tcp", "refused")
+    assert result.samples["tcp"] == []
@@ -0,0 +1,117 @@
+import os
+import re
+
+import pytest
+
+from odooflow.utils.remote_shell import RemoteShell
+
+
+class FakeShellChannel:
+    """A tiny PTY shell: echoes nothing, knows `echo`, `cd`, `false` and the sentinel printf."""
+
+    SENTINEL = re.compile(r"printf '\\n(__ODOOFLOW_\w+?_\d+__):%d:%s\\n'")
+
+    def __init__(self, chunk=None):
+        self.out = bytearray(b"Welcome to prod!\r\n")
+        self.cwd, self.status = "/home/u", 0
+        self.chunk = chunk  # bytes per recv, to split sentinels
+        self.sent = []
+        self.closed = False
+        self._r, w = os.pipe()
+        os.write(w, b"x")
+        os.close(w)
+
+    def fileno(self):
+        return self._r
+
+    def sendall(self, data):
+        self.sent.append(data)
+        for line in data.decode().splitlines():
+            for part in line.split("; "):
+                if not self.closed:
+                    self._run(part)
+
+    send = sendall
+
+    def _run(self, line):
+        sentinel = self.SENTINEL.search(line)
+        if sentinel:
+            self.out += f"\r\n{sentinel.group(1)}:{self.status}:{self.cwd}\r\n".encode()
+        elif line.startswith("echo "):
+            self.out += line[5:].encode() + b"\r\n"
+            self.status = 0
+        elif line.startswith("printf-n "):
+            self.out += line[9:].encode()
+            self.status = 0
+        elif line.startswith("cd "):
+            self.cwd, self.status = line[3:].strip("'"), 0
+        elif line == "false":
+            self.status = 1
+        elif line == "exit":
+            self.closed = True
+
+    def recv_ready(self):
+        return bool(self.out)
+
+    def recv(self, n):
+        n = min(n, self.chunk or n)
+        data, self.out[:] = bytes(self.out[:n]), self.out[n:]
+        return data
+
+    def exit_status_ready(self):
+        return self.closed
+
+    def resize_pty(self, width, height):
+        self.size = (width, height)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    def __init__(self, channel):
+        self.channel = channel
+
+    def invoke_shell(self, term, width, height):
+        return self.channel
+
+
+@pytest.mark.parametrize("chunk", [None, 3])
+def test_state_persists_and_output_streams(chunk):
+    channel = FakeShellChannel(chunk)
+    shell = RemoteShell(FakeClient(channel), "/opt/odoo")
+    shell.open()
+    assert b"cd /opt/odoo" in channel.sent[0]
+    assert shell.cwd == "/opt/odoo"
+
+    out = []
+    assert shell.run("echo hello", out.append) == 0
+    assert "".join(out) == "hello\n"
+
+    assert shell.run("cd /tmp", out.append) == 0
+    assert shell.cwd == "/tmp"
+    assert shell.run("false", out.append) == 1
+
+    out.clear()
+    assert shell.run("printf-n no newline", out.append) == 0
+    assert "".join(out) == "no newline"
+
+
+def test_stale_sentinel_after_interrupt_is_dropped():
+    channel = FakeShellChannel()
+    shell = RemoteShell(FakeClient(channel), None)
+    shell.open()
+    shell._send_with_sentinel("echo first")
+    shell.interrupt()  # the first sentinel still arrives here, plus a fresh one
+    out = []
+    assert shell._read_until_sentinel(out.append) == 0
+    assert "".join(out) == "first\n"
+    assert channel.sent[-2] == b"\x03"
+
+
+def test_closed_shell_raises_eof():
+    channel = FakeShellChannel()
+    shell = RemoteShell(FakeClient(channel), None)
+    shell.open()
+    with pytest.raises(EOFError):
+        shell.run("exit", lambda text: None)
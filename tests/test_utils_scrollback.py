@@ -0,0 +1,43 @@
+import gzip
+
+from odooflow.utils.scrollback import Scrollback
+
+
+def _fill(scrollback, n):
+    for i in range(n):
+        scrollback.append(("cmd", f"cmd {i}"))
+        scrollback.append(("out", f"line {i}\n" * 10))
+
+
+def test_old_entries_spill_to_a_compressed_file(tmp_path):
+    scrollback = Scrollback(memory_limit=1000, spill_dir=tmp_path)
+    _fill(scrollback, 50)
+    assert scrollback._size <= 1000
+    assert scrollback.spilled > 0
+    spill = next(tmp_path.iterdir())
+    assert oct(spill.stat().st_mode & 0o777) == "0o600"
+    with gzip.open(spill, "rt") as fh:
+        assert '"cmd 0"' in fh.readline()
+
+    entries = list(scrollback)
+    assert len(entries) == len(scrollback) == 100
+    assert entries[0] == ("cmd", "cmd 0") and entries[-2] == ("cmd", "cmd 49")
+    assert ("cmd", "cmd 3") in scrollback
+
+    scrollback.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_tail_returns_only_the_last_lines(tmp_path):
+    scrollback = Scrollback(memory_limit=200, spill_dir=tmp_path)
+    _fill(scrollback, 20)
+    tail = scrollback.tail(15)
+    assert tail[-1] == ("out", "line 19\n" * 10)
+    assert tail[-2] == ("cmd", "cmd 19")
+    # 10 + 1 lines from the newest pair, the remaining 4 cut from the one before.
+    assert tail[0] == ("out", "line 18\n" * 4)
+    assert sum(text.count("\n") or 1 for _, text in tail) == 15
+
+    # Reaching back into the spilled part works too.
+    assert scrollback.tail(1000)[0] == ("cmd", "cmd 0")
+    scrollback.close()
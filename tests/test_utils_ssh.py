@@ -1,3 +1,4 @@
+import os
 import pytest
 from pathlib import Path
 from unittest.mock import patch, MagicMock
@@ -21,3 +22,332 @@ class TestSSHUtils:
         sftp.normalize.return_value = "/home/user"
         result = resolve_remote_path(sftp, "~/odoo")
         assert result == "/home/user/odoo"
+
+    def test_compress_directory_only_given_paths(self, tmp_path):
+        import tarfile
+
+        src = tmp_path / "mod"
+        (src / "views").mkdir(parents=True)
+        (src / "a.py").write_text("a")
+        (src / "b.py").write_text("b")
+        (src / "views" / "v.xml").write_text("<odoo/>")
+
+        archive = compress_directory(src, paths=["a.py", "views/v.xml"])
+        try:
+            with tarfile.open(archive) as tar:
+                names = sorted(tar.getnames())
+        finally:
+            archive.unlink()
+        assert names == ["mod/a.py", "mod/views/v.xml"]
+
+    def test_archive_cache_builds_each_change_set_once(self, tmp_path):
+        from odooflow.utils.ssh import ArchiveCache
+
+        src = tmp_path / "mod"
+        src.mkdir()
+        (src / "a.py").write_text("a")
+        cache = ArchiveCache(src)
+        full_1 = cache.get(None, log=lambda m: None)
+        full_2 = cache.get(None, log=lambda m: None)
+        partial = cache.get(["a.py"], log=lambda m: None)
+        assert full_1 == full_2
+        assert partial != full_1
+        cache.cleanup(log=lambda m: None)
+        assert not full_1.exists() and not partial.exists()
+
+
+def _fake_ssh(commands, exit_status=0):
+    ssh = MagicMock()
+
+    def exec_command(cmd, *a, **kw):
+        commands.append(cmd)
+        stdout = MagicMock()
+        stdout.channel.recv_exit_status.return_value = exit_status
+        stdout.read.return_value = b""
+        stderr = MagicMock()
+        stderr.read.return_value = b"boom"
+        return MagicMock(), stdout, stderr
+
+    ssh.exec_command.side_effect = exec_command
+    return ssh
+
+
+class TestReleases:
+    def test_switch_is_symlink_plus_rename(self):
+        from odooflow.utils.ssh import switch_release
+
+        commands = []
+        switch_release(_fake_ssh(commands), "/srv/mod", "/srv/.odooflow-releases/mod/1", log=lambda m: None)
+        assert commands == [
+            "ln -sfn /srv/.odooflow-releases/mod/1 /srv/mod.odooflow-switch"
+            " && mv -Tf /srv/mod.odooflow-switch /srv/mod"
+        ]
+
+    def test_switch_adopts_legacy_directory(self):
+        from odooflow.utils.ssh import switch_release
+
+        commands = []
+        switch_release(
+            _fake_ssh(commands), "/srv/mod", "/r/2", legacy_path="/r/1-pre", log=lambda m: None
+        )
+        assert commands[0].startswith("if [ -d /srv/mod ] && [ ! -L /srv/mod ]; then mv /srv/mod /r/1-pre; fi")
+
+    def test_legacy_release_sorts_before_new_one(self):
+        from odooflow.utils.ssh import _legacy_release_name, _release_stamp
+
+        stamp = _release_stamp()
+        assert sorted([stamp, _legacy_release_name(stamp)]) == [_legacy_release_name(stamp), stamp]
+
+    def test_prune_keeps_newest_and_live(self):
+        from odooflow.utils.ssh import prune_releases
+
+        sftp = MagicMock()
+        sftp.listdir.return_value = ["3", "1", "2", "4"]
+        sftp.readlink.return_value = "/r/1"
+        commands = []
+        prune_releases(_fake_ssh(commands), sftp, "/r", "/srv/mod", keep=2, log=lambda m: None)
+        assert commands == ["cd /r && rm -rf -- 2"]
+
+    def test_rollback_switches_to_previous(self, monkeypatch):
+        from odooflow.utils import ssh as ssh_mod
+
+        commands = []
+        client = _fake_ssh(commands)
+        sftp = MagicMock()
+        sftp.normalize.return_value = "/home/u"
+        sftp.listdir.return_value = ["1", "2", "3"]
+        sftp.readlink.return_value = "/srv/.odooflow-releases/mod/3"
+        client.open_sftp.return_value = sftp
+        monkeypatch.setattr(ssh_mod, "open_ssh_client", lambda *a, **kw: client)
+
+        live = ssh_mod.rollback_release("mod", "u", "h", "/srv", log=lambda m: None)
+        assert live == "2"
+        assert "ln -sfn /srv/.odooflow-releases/mod/2 " in commands[0]
+        client.close.assert_called_once()
+
+    def test_rollback_without_previous_release_fails(self, monkeypatch):
+        from odooflow.utils import ssh as ssh_mod
+
+        client = _fake_ssh([])
+        sftp = MagicMock()
+        sftp.listdir.return_value = ["1"]
+        sftp.readlink.return_value = "/srv/.odooflow-releases/mod/1"
+        client.open_sftp.return_value = sftp
+        monkeypatch.setattr(ssh_mod, "open_ssh_client", lambda *a, **kw: client)
+
+        with pytest.raises(RuntimeError):
+            ssh_mod.rollback_release("mod", "u", "h", "/srv", log=lambda m: None)
+
+
+class FakeChannel:
+    """Just enough of paramiko.Channel for stream_command; always select()-readable."""
+
+    def __init__(self, out=(), err=(), exit_status=0, finishes=True):
+        self.out = list(out)
+        self.err = list(err)
+        self.exit_status = exit_status
+        self.finishes = finishes
+        self.command = None
+        self.closed = False
+        self._r, w = os.pipe()
+        os.write(w, b"x")
+        os.close(w)
+
+    def fileno(self):
+        return self._r
+
+    def get_pty(self):
+        pass
+
+    def exec_command(self, command):
+        self.command = command
+
+    def recv_ready(self):
+        return bool(self.out)
+
+    def recv(self, n):
+        return self.out.pop(0)
+
+    def recv_stderr_ready(self):
+        return bool(self.err)
+
+    def recv_stderr(self, n):
+        return self.err.pop(0)
+
+    def exit_status_ready(self):
+        return self.finishes and not self.out and not self.err
+
+    def recv_exit_status(self):
+        return self.exit_status
+
+    def close(self):
+        self.closed = True
+        os.close(self._r)
+
+
+def _ssh_with_channel(channel):
+    client = MagicMock()
+    client.get_transport.return_value.open_session.return_value = channel
+    return client
+
+
+class TestStreamCommand:
+    def test_streams_both_outputs_and_returns_status(self):
+        from odooflow.utils.ssh import stream_command
+
+        # A multi-byte character split across two chunks must survive.
+        channel = FakeChannel(out=[b"upgrading \xc3", b"\xa9\n", b"done\n"], err=[b"warn\n"], exit_status=3)
+        out, err = [], []
+        status = stream_command(_ssh_with_channel(channel), "odoo -u all", out.append, err.append)
+        assert status == 3
+        assert "".join(out) == "upgrading é\ndone\n"
+        assert err == ["warn\n"]
+        assert channel.command == "odoo -u all" and channel.closed
+
+    def test_timeout_terminates_remote_process(self, monkeypatch):
+        from odooflow.utils import ssh as ssh_mod
+
+        signals = []
+        monkeypatch.setattr(ssh_mod, "send_signal", lambda ch, name="INT": signals.append(name))
+        monkeypatch.setattr(ssh_mod, "SIGNAL_GRACE_SECONDS", 0)
+        channel = FakeChannel(finishes=False)
+        with pytest.raises(ssh_mod.CommandTimeout):
+            ssh_mod.stream_command(_ssh_with_channel(channel), "sleep 100", timeout=0.05)
+        assert signals == ["TERM"]
+        assert channel.closed
+
+    def test_post_exec_buffers_only_for_callback(self):
+        from odooflow.utils.ssh import _run_post_exec
+
+        logged, reported = [], []
+        channel = FakeChannel(out=[b"line 1\nli", b"ne 2"], err=[b"oops\n"], exit_status=1)
+        _run_post_exec(
+            _ssh_with_channel(channel), "cmd", lambda *a: reported.append(a), logged.append
+        )
+        assert "line 1" in logged and "line 2" in logged and "oops" in logged
+        assert reported == [("line 1\nline 2", "oops\n", 1)]
+
+    def test_post_exec_failure_without_callback_raises(self):
+        from odooflow.utils.ssh import _run_post_exec
+
+        with pytest.raises(RuntimeError):
+            _run_post_exec(_ssh_with_channel(FakeChannel(exit_status=2)), "false", None, lambda m: None)
+
+
+class TestTreeHashSkip:
+    def _upload(
+        self, monkeypatch, tmp_path, marker,
+        incremental=True, post_exec_cmd="echo done", log=None, post_exec_status=0, git_source=None,
+    ):
+        from odooflow.utils import delta, ssh as ssh_mod, transfer, treehash
+
+        src = tmp_path / "mod"
+        src.mkdir(exist_ok=True)
+        (src / "a.py").write_text("a")
+        commands = []
+        client = _fake_ssh(commands)
+        client.open_sftp.return_value = MagicMock()
+        monkeypatch.setattr(ssh_mod, "open_ssh_client", lambda *a, **kw: client)
+        monkeypatch.setattr(delta, "read_marker", lambda sftp, root: marker(treehash.tree_hash(src)))
+        written = {}
+        monkeypatch.setattr(
+            delta, "write_marker", lambda sftp, root, path, **extra: written.update(extra) or {"sha": "b" * 40}
+        )
+        put_file = MagicMock()
+        put_file.return_value.size = 1
+        monkeypatch.setattr(transfer, "put_file", put_file)
+        monkeypatch.setattr(
+            ssh_mod, "_run_post_exec", lambda ssh, command, *a, **kw: commands.append(command) or post_exec_status
+        )
+
+        ssh_mod.upload_directory_via_ssh(
+            src, "u", "h", "/srv", incremental=incremental, post_exec_cmd=post_exec_cmd,
+            show_progress=False, log=log or (lambda m: None), git_source=git_source,
+        )
+        return commands, put_file, written, treehash.tree_hash(src)
+
+    def test_matching_hash_skips_compression_and_upload(self, monkeypatch, tmp_path):
+        compress = MagicMock()
+        monkeypatch.setattr("odooflow.utils.ssh.compress_directory", compress)
+        commands, put_file, written, local_hash = self._upload(
+            monkeypatch, tmp_path, lambda h: {"sha": "a" * 40, "tree_hash": h}
+        )
+        compress.assert_not_called()
+        put_file.assert_not_called()
+        assert commands == ["echo done"]
+        assert written == {"tree_hash": local_hash}
+
+    def test_different_hash_uploads(self, monkeypatch, tmp_path):
+        commands, put_file, written, local_hash = self._upload(
+            monkeypatch, tmp_path, lambda h: {"sha": "a" * 40, "tree_hash": "0" * 64}
+        )
+        put_file.assert_called_once()
+        assert any(c.startswith("mkdir -p /srv && tar -xzf") for c in commands)
+        assert written == {"tree_hash": local_hash}
+
+    def test_full_upload_ignores_the_hash(self, monkeypatch, tmp_path):
+        commands, put_file, written, _ = self._upload(
+            monkeypatch, tmp_path, lambda h: {"tree_hash": h}, incremental=False
+        )
+        put_file.assert_called_once()
+
+    def test_failed_post_exec_keeps_the_previous_marker(self, monkeypatch, tmp_path):
+        logged = []
+        commands, _, written, _ = self._upload(
+            monkeypatch, tmp_path, lambda h: {"sha": "a" * 40, "tree_hash": "0" * 64},
+            post_exec_status=1, log=logged.append,
+        )
+        assert commands[-1] == "echo done"
+        assert written == {}
+        assert any("retry the post-upload command" in m for m in logged)
+
+    def test_git_deploy_records_no_tree_hash(self, monkeypatch, tmp_path):
+        from odooflow.utils import gitpull
+
+        monkeypatch.setattr(gitpull, "pull", MagicMock())
+        _, put_file, written, _ = self._upload(
+            monkeypatch, tmp_path, lambda h: {"sha": "a" * 40, "tree_hash": "0" * 64},
+            git_source=gitpull.GitSource("https://git.example/m.git", "c" * 40),
+        )
+        gitpull.pull.assert_called_once()
+        put_file.assert_not_called()
+        assert written == {}
+
+    def test_type_changed_paths_are_removed_recursively_before_extraction(self, monkeypatch, tmp_path):
+        from odooflow.utils import delta
+
+        monkeypatch.setattr(
+            delta, "compute_changes",
+            lambda *a: delta.ChangeSet(upload={"a/x.py", "b"}, delete={"a", "b/y.py"}),
+        )
+        (tmp_path / "mod" / "a").mkdir(parents=True)
+        (tmp_path / "mod" / "a" / "x.py").write_text("")
+        (tmp_path / "mod" / "b").write_text("")
+        commands, _, _, _ = self._upload(monkeypatch, tmp_path, lambda h: {"sha": "a" * 40})
+        removals = ["cd /srv/mod && rm -f -- b/y.py", "cd /srv/mod && rm -rf -- a b"]
+        assert commands[:2] == removals
+        assert commands[2].startswith("mkdir -p /srv && tar -xzf")
+
+    def test_full_upload_does_not_hash_the_tree(self, monkeypatch, tmp_path):
+        hashed = MagicMock()
+        monkeypatch.setattr("odooflow.utils.ssh.ArchiveCache.tree_hash", hashed)
+        _, _, written, _ = self._upload(monkeypatch, tmp_path, lambda h: {}, incremental=False)
+        hashed.assert_not_called()
+        assert written == {}
+
+    def test_matching_hash_says_why_changed_modules_command_is_skipped(self, monkeypatch, tmp_path):
+        logged = []
+        commands, _, _, _ = self._upload(
+            monkeypatch, tmp_path, lambda h: {"sha": "a" * 40, "tree_hash": h},
+            post_exec_cmd="odoo -u {changed_modules}", log=logged.append,
+        )
+        assert not any(c.startswith("odoo") for c in commands)
+        assert any("Remote tree unchanged" in m for m in logged)
+
+
+def test_quote_remote_path_keeps_home_expandable():
+    from odooflow.utils.ssh import quote_remote_path
+
+    assert quote_remote_path("~") == "~"
+    assert quote_remote_path("~/my addons") == "~/'my addons'"
+    assert quote_remote_path("/srv/o doo") == "'/srv/o doo'"
@@ -0,0 +1,132 @@
+import io
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from odooflow.utils import transfer
+
+
+class FakeRemoteFile(io.BytesIO):
+    """In-memory remote file that writes through to the shared store on close."""
+
+    def __init__(self, store, path, mode, lock):
+        self._store, self._path, self._lock = store, path, lock
+        initial = b"" if "w" in mode else store.get(path, b"")
+        super().__init__(initial)
+
+    def set_pipelined(self, pipelined=True):
+        pass
+
+    def truncate(self, size=None):
+        super().truncate(size)
+        if size is not None and size > len(self.getvalue()):
+            self.seek(0, io.SEEK_END)
+            self.write(b"\0" * (size - len(self.getvalue())))
+
+    def close(self):
+        with self._lock:
+            current = bytearray(self._store.get(self._path, b""))
+            data = self.getvalue()
+            if len(current) < len(data):
+                current.extend(b"\0" * (len(data) - len(current)))
+            # Only bytes this handle wrote differ from the initial snapshot;
+            # merge non-zero bytes so concurrent ranges do not clobber each other.
+            for i, b in enumerate(data):
+                if b:
+                    current[i] = b
+            self._store[self._path] = bytes(current)
+        super().close()
+
+
+class FakeSFTP:
+    def __init__(self, store, lock, opened):
+        self._store, self._lock = store, lock
+        opened.append(self)
+
+    def open(self, path, mode="r"):
+        return FakeRemoteFile(self._store, path, mode, self._lock)
+
+    def putfo(self, fl, remotepath, file_size=0, callback=None, confirm=True):
+        data = fl.read()
+        self._store[remotepath] = data
+        if callback:
+            callback(len(data), file_size)
+
+    def stat(self, path):
+        return MagicMock(st_size=len(self._store.get(path, b"")))
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_sftp(monkeypatch):
+    store, lock, opened, kwargs = {}, threading.Lock(), [], []
+
+    def from_transport(t, window_size=None, max_packet_size=None):
+        kwargs.append((window_size, max_packet_size))
+        return FakeSFTP(store, lock, opened)
+
+    monkeypatch.setattr(transfer.paramiko.SFTPClient, "from_transport", from_transport)
+    monkeypatch.setattr(transfer, "MIN_RANGE_SIZE", 1024)
+    return store, opened, kwargs
+
+
+class TestPutFile:
+    def test_single_channel_uses_tuned_window(self, tmp_path, fake_sftp):
+        store, opened, kwargs = fake_sftp
+        src = tmp_path / "a.tar.gz"
+        src.write_bytes(b"x" * 100)
+        stats = transfer.put_file(MagicMock(), src, "/srv/a.tar.gz",
+                                  transfer.TransferSettings(window_size=2**24, packet_size=2**14))
+        assert store["/srv/a.tar.gz"] == b"x" * 100
+        assert kwargs == [(2**24, 2**14)]
+        assert stats.size == 100 and stats.channels == 1
+
+    def test_concurrent_ranges_reassemble(self, tmp_path, fake_sftp):
+        store, opened, _ = fake_sftp
+        payload = bytes((i % 251) + 1 for i in range(10_000))
+        src = tmp_path / "big.tar.gz"
+        src.write_bytes(payload)
+        progress = []
+        stats = transfer.put_file(
+            MagicMock(), src, "/srv/big.tar.gz",
+            transfer.TransferSettings(channels=4),
+            callback=lambda done, total: progress.append((done, total)),
+        )
+        assert store["/srv/big.tar.gz"] == payload
+        assert stats.channels == 4
+        # One control channel plus one per range.
+        assert len(opened) == 5
+        assert progress[-1] == (10_000, 10_000)
+
+    def test_small_files_are_not_split(self, tmp_path, fake_sftp):
+        _, opened, _ = fake_sftp
+        src = tmp_path / "small"
+        src.write_bytes(b"y" * 10)
+        stats = transfer.put_file(MagicMock(), src, "/srv/small", transfer.TransferSettings(channels=8))
+        assert stats.channels == 1
+        assert len(opened) == 1
+
+    def test_size_mismatch_raises(self, tmp_path, fake_sftp, monkeypatch):
+        src = tmp_path / "a"
+        src.write_bytes(b"abc")
+        monkeypatch.setattr(FakeSFTP, "stat", lambda self, p: MagicMock(st_size=1))
+        with pytest.raises(IOError):
+            transfer.put_file(MagicMock(), src, "/srv/a")
+
+
+class TestSettings:
+    def test_from_profile_defaults(self):
+        settings = transfer.TransferSettings.from_profile({})
+        assert settings.channels == transfer.DEFAULT_CHANNELS
+        assert settings.window_size == transfer.DEFAULT_WINDOW_SIZE
+
+    def test_from_profile_overrides(self):
+        settings = transfer.TransferSettings.from_profile({"sftp_channels": 3, "sftp_window_size": 1024})
+        assert settings.channels == 3
+        assert settings.window_size == 1024
+
+    def test_stats_reports_throughput(self):
+        assert "2.0 MB/s" in str(transfer.TransferStats(2 * 2**20, 1.0, 1))
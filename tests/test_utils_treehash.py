@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from odooflow.utils import treehash
+
+
+@pytest.fixture
+def tree(tmp_path):
+    src = tmp_path / "mod"
+    (src / "views").mkdir(parents=True)
+    (src / "node_modules" / "pkg").mkdir(parents=True)
+    (src / "__manifest__.py").write_text("{'name': 'mod'}")
+    (src / "views" / "v.xml").write_text("<odoo/>")
+    (src / "node_modules" / "pkg" / "x.js").write_text("x")
+    return src
+
+
+def test_upload_files_prunes_excluded_dirs(tree):
+    assert sorted(treehash.upload_files(tree, {"node_modules"})) == ["__manifest__.py", "views/v.xml"]
+
+
+def test_same_content_same_hash(tree, tmp_path):
+    first = treehash.tree_hash(tree, {"node_modules"})
+    os.utime(tree / "views" / "v.xml", (0, 0))
+    assert treehash.tree_hash(tree, {"node_modules"}) == first
+
+    copy = tmp_path / "copy"
+    (copy / "views").mkdir(parents=True)
+    (copy / "__manifest__.py").write_text("{'name': 'mod'}")
+    (copy / "views" / "v.xml").write_text("<odoo/>")
+    assert treehash.tree_hash(copy) == first
+
+
+def test_excluded_dirs_do_not_count(tree):
+    before = treehash.tree_hash(tree, {"node_modules"})
+    (tree / "node_modules" / "pkg" / "x.js").write_text("y")
+    assert treehash.tree_hash(tree, {"node_modules"}) == before
+    assert treehash.tree_hash(tree) != before
+
+
+@pytest.mark.parametrize("change", ["edit", "rename", "add", "chmod"])
+def test_any_change_changes_the_hash(tree, change):
+    before = treehash.tree_hash(tree, {"node_modules"})
+    if change == "edit":
+        (tree / "views" / "v.xml").write_text("<odoo></odoo>")
+    elif change == "rename":
+        (tree / "views" / "v.xml").rename(tree / "views" / "w.xml")
+    elif change == "add":
+        (tree / "views" / "empty.xml").write_text("")
+    else:
+        (tree / "__manifest__.py").chmod(0o755)
+    assert treehash.tree_hash(tree, {"node_modules"}) != before
@@ -0,0 +1,60 @@
+import socket
+from unittest.mock import patch
+
+import paramiko
+
+from odooflow.utils.tuning import SSHTuning, supported_ciphers
+
+
+def _transport():
+    left, right = socket.socketpair()
+    return paramiko.Transport(left), (left, right)
+
+
+def test_preferred_algorithms_move_to_the_front():
+    transport, socks = _transport()
+    try:
+        SSHTuning(
+            ciphers=["aes256-gcm@openssh.com", "no-such-cipher", "aes128-ctr"],
+            kex=["diffie-hellman-group14-sha256"],
+        ).apply(transport)
+        options = transport.get_security_options()
+        assert options.ciphers[:2] == ("aes256-gcm@openssh.com", "aes128-ctr")
+        assert set(options.ciphers) == set(supported_ciphers())  # the rest stay as fallbacks
+        assert options.kex[0] == "diffie-hellman-group14-sha256"
+        assert options.compression == ("none",)
+    finally:
+        transport.close()
+        for sock in socks:
+            sock.close()
+
+
+def test_compression_and_profile_round_trip():
+    profile = {"ssh_ciphers": ["aes128-ctr"], "ssh_compression": True}
+    tuning = SSHTuning.from_profile(profile)
+    assert tuning.to_profile() == profile
+    transport, socks = _transport()
+    try:
+        tuning.apply(transport)
+        assert transport.get_security_options().compression[0] == "zlib@openssh.com"
+    finally:
+        transport.close()
+        for sock in socks:
+            sock.close()
+    assert SSHTuning.from_profile({}).is_default
+    assert not tuning.is_default
+
+
+def test_open_ssh_client_uses_the_tuned_transport():
+    from odooflow.utils.ssh import open_ssh_client
+
+    tuning = SSHTuning(ciphers=["aes128-ctr"], compression=True)
+    with patch("odooflow.utils.ssh.paramiko.SSHClient.connect") as connect:
+        open_ssh_client("u", "h", 22, password="pw", tuning=tuning)
+    kwargs = connect.call_args.kwargs
+    assert kwargs["transport_factory"] == tuning.transport_factory
+    assert kwargs["compress"] is True
+
+    with patch("odooflow.utils.ssh.paramiko.SSHClient.connect") as connect:
+        open_ssh_client("u", "h", 22, password="pw", tuning=SSHTuning())
+    assert "transport_factory" not in connect.call_args.kwargs
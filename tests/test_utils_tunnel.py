@@ -0,0 +1,250 @@
+import select
+import socket
+import threading
+import time
+
+import pytest
+
+from odooflow.utils import tunnel
+from odooflow.utils.tunnel import TunnelServer, parse_forward
+
+
+# --------------------------------------------------------------------------- #
+# parse_forward
+# --------------------------------------------------------------------------- #
+
+
+def test_parse_forward_defaults_to_loopback():
+    forward = parse_forward("8069:localhost:8069")
+    assert (forward.bind_host, forward.bind_port, forward.dest_host, forward.dest_port) == (
+        "127.0.0.1", 8069, "localhost", 8069,
+    )
+
+
+def test_parse_forward_with_bind_address_and_ipv6():
+    forward = parse_forward("0.0.0.0:15432:db.internal:5432")
+    assert (forward.bind_host, forward.bind_port, forward.dest_host, forward.dest_port) == (
+        "0.0.0.0", 15432, "db.internal", 5432,
+    )
+    forward = parse_forward("[::1]:8069:[fd00::2]:8069")
+    assert forward.bind_host == "::1"
+    assert forward.dest_host == "fd00::2"
+
+
+@pytest.mark.parametrize("spec", ["8069", "8069:localhost", "x:localhost:8069", "70000:localhost:80", "0:h:80"])
+def test_parse_forward_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        parse_forward(spec)
+
+
+# --------------------------------------------------------------------------- #
+# TunnelServer
+# --------------------------------------------------------------------------- #
+
+
+class EchoChannel:
+    """A socketpair end posing as a paramiko Channel; the far end echoes in upper case."""
+
+    def __init__(self):
+        self._sock, far = socket.socketpair()
+
+        def echo():
+            while True:
+                data = far.recv(4096)
+                if not data:
+                    break
+                far.sendall(data.upper())
+            far.close()
+
+        threading.Thread(target=echo, daemon=True).start()
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def setblocking(self, flag):
+        self._sock.setblocking(flag)
+
+    def recv(self, n):
+        return self._sock.recv(n)
+
+    def send_ready(self):
+        return bool(select.select([], [self._sock], [], 0)[1])
+
+    def send(self, data):
+        return self._sock.send(data)
+
+    def shutdown_write(self):
+        self._sock.shutdown(socket.SHUT_WR)
+
+    def close(self):
+        self._sock.close()
+
+
+class FakeTransport:
+    def __init__(self, fail=False):
+        self.opened = []
+        self.active = True
+        self.fail = fail
+
+    def is_active(self):
+        return self.active
+
+    def open_channel(self, kind, dest, src, timeout=None):
+        if self.fail:
+            raise ConnectionRefusedError("connect failed")
+        self.opened.append((kind, dest))
+        return EchoChannel()
+
+
+@pytest.fixture
+def server():
+    server = TunnelServer([tunnel.Forward("127.0.0.1", 0, "localhost", 8069)], log=lambda msg: None)
+    server.bind()
+    yield server
+    server.close()
+
+
+def _serve(server, transport):
+    outcome = {}
+    thread = threading.Thread(target=lambda: outcome.setdefault("ok", server.serve(transport)), daemon=True)
+    thread.start()
+    return thread, outcome
+
+
+def _roundtrip(port, payload):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as client:
+        client.sendall(payload)
+        client.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            data = client.recv(65536)
+            if not data:
+                return b"".join(chunks)
+            chunks.append(data)
+
+
+def test_relays_many_concurrent_connections(server):
+    transport = FakeTransport()
+    thread, outcome = _serve(server, transport)
+    port = server.forwards[0].bind_port
+    results = {}
+
+    def client(i):
+        results[i] = _roundtrip(port, f"hello {i} ".encode() * 5000)
+
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(8)]
+    for c in clients:
+        c.start()
+    for c in clients:
+        c.join(10)
+
+    assert results == {i: f"HELLO {i} ".encode() * 5000 for i in range(8)}
+    assert transport.opened == [("direct-tcpip", ("localhost", 8069))] * 8
+    server.stop()
+    thread.join(5)
+    assert outcome["ok"] is True
+    assert server.total == 8
+    assert server.bytes_up == server.bytes_down == sum(len(v) for v in results.values())
+
+
+def test_failed_open_closes_the_local_connection(server):
+    messages = []
+    server.log = messages.append
+    thread, _ = _serve(server, FakeTransport(fail=True))
+    assert _roundtrip(server.forwards[0].bind_port, b"") == b""
+    server.stop()
+    thread.join(5)
+    assert messages and "connect failed" in messages[0]
+
+
+def test_serve_returns_false_when_transport_dies(server):
+    transport = FakeTransport()
+    transport.active = False
+    assert server.serve(transport) is False
+
+
+class StalledChannel:
+    """A channel whose SSH window never opens and which never sends anything."""
+
+    def __init__(self):
+        self._sock, self._far = socket.socketpair()
+        self.closed = False
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def setblocking(self, flag):
+        pass
+
+    def recv(self, n):
+        raise socket.timeout()
+
+    def send_ready(self):
+        return False
+
+    def send(self, data):
+        raise socket.timeout()
+
+    def shutdown_write(self):
+        pass
+
+    def close(self):
+        self.closed = True
+        self._sock.close()
+        self._far.close()
+
+
+def test_a_stalled_connection_does_not_block_the_others(server):
+    transport = FakeTransport()
+    stalled = StalledChannel()
+    channels = iter([stalled])
+    transport.open_channel = lambda *a, **kw: next(channels, None) or EchoChannel()
+    thread, _ = _serve(server, transport)
+    port = server.forwards[0].bind_port
+
+    hog = socket.create_connection(("127.0.0.1", port), timeout=5)
+
+    def flood():
+        # Far more than the relay buffers: the rest stays in the kernel, and the sender blocks.
+        try:
+            hog.sendall(b"x" * (8 * 2**20))
+        except OSError:
+            pass  # reset once the tunnel stops
+
+    threading.Thread(target=flood, daemon=True).start()
+    for _ in range(100):
+        if server.active:
+            break
+        time.sleep(0.01)
+
+    assert _roundtrip(port, b"still fast") == b"STILL FAST"
+    server.stop()
+    thread.join(5)
+    hog.close()
+    assert stalled.closed
+
+
+def test_opens_finishing_after_serve_returns_are_closed(server):
+    release = threading.Event()
+    late = []
+
+    class SlowTransport(FakeTransport):
+        def open_channel(self, *a, **kw):
+            release.wait(5)
+            channel = EchoChannel()
+            late.append(channel)
+            return channel
+
+    thread, _ = _serve(server, SlowTransport())
+    client = socket.create_connection(("127.0.0.1", server.forwards[0].bind_port), timeout=5)
+    time.sleep(0.1)
+    server.stop()
+    thread.join(5)
+    assert client.recv(1) == b""  # the pending local connection was closed
+    release.set()
+    for _ in range(100):
+        if late and late[0]._sock.fileno() == -1:
+            break
+        time.sleep(0.01)
+    assert late[0]._sock.fileno() == -1
+    client.close()
@@ -0,0 +1,127 @@
+import os
+import sys
+from unittest.mock import MagicMock
+
+import paramiko
+import pytest
+
+from odooflow.utils import watch
+
+
+def _fake_ssh(commands):
+    client = MagicMock()
+
+    def exec_command(cmd, **kw):
+        commands.append(cmd)
+        stdout = MagicMock()
+        stdout.channel.recv_exit_status.return_value = 0
+        stdout.read.return_value = b""
+        return MagicMock(), stdout, MagicMock()
+
+    client.exec_command.side_effect = exec_command
+    sftp = MagicMock()
+    sftp.normalize.return_value = "/home/u"
+    client.open_sftp.return_value = sftp
+    return client
+
+
+@pytest.fixture
+def module(tmp_path):
+    root = tmp_path / "mod"
+    (root / "models").mkdir(parents=True)
+    (root / "models" / "a.py").write_text("a")
+    return root
+
+
+class TestWatchers:
+    def test_polling_reports_changes_and_deletions(self, module):
+        watcher = watch.PollingWatcher(module, {"__pycache__"}, interval=0.01)
+        (module / "models" / "b.py").write_text("b")
+        (module / "models" / "a.py").unlink()
+        (module / "models" / "b.py.swp").write_text("x")
+        assert watcher.poll(timeout=1) == {"models/a.py", "models/b.py"}
+        assert watcher.poll(timeout=0.05) == set()
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+    def test_inotify_sees_files_in_new_directories(self, module):
+        watcher = watch.InotifyWatcher(module, {"__pycache__"})
+        try:
+            (module / "views").mkdir()
+            (module / "views" / "v.xml").write_text("<odoo/>")
+            (module / "__pycache__").mkdir()
+            (module / "__pycache__" / "a.pyc").write_text("x")
+            seen = watch.debounced(watcher, debounce=0.05, timeout=1)
+            assert "views/v.xml" in seen
+            assert not any(p.startswith("__pycache__") for p in seen)
+        finally:
+            watcher.close()
+
+    def test_debounced_merges_a_burst(self):
+        source = MagicMock()
+        source.poll.side_effect = [{"a.py"}, {"b.py"}, set()]
+        assert watch.debounced(source, debounce=0.01) == {"a.py", "b.py"}
+
+
+class TestWatchSession:
+    def test_small_batch_is_written_over_sftp(self, module):
+        commands = []
+        client = _fake_ssh(commands)
+        (module / "models" / "a.py").write_text("changed")
+        with watch.WatchSession(module, "~/addons", lambda: client, log=lambda m: None) as session:
+            changes = session.sync({"models/a.py", "models/gone.py", "models/a.py~"})
+
+        assert changes.upload == {"models/a.py"}
+        assert changes.delete == {"models/gone.py"}
+        sftp = client.open_sftp.return_value
+        assert sftp.putfo.call_args.args[1] == "/home/u/addons/mod/models/a.py"
+        assert commands == [
+            "mkdir -p -- /home/u/addons/mod/models",
+            "cd /home/u/addons/mod && rm -f -- models/gone.py",
+        ]
+
+    def test_removed_directory_is_deleted_recursively(self, module):
+        commands = []
+        client = _fake_ssh(commands)
+        with watch.WatchSession(module, "/srv", lambda: client, log=lambda m: None) as session:
+            session.sync({"views/"})
+        assert commands == ["cd /srv/mod && rm -rf -- views"]
+
+    def test_reconnects_once_when_the_connection_drops(self, module):
+        broken = _fake_ssh([])
+        broken.open_sftp.return_value.putfo.side_effect = paramiko.SSHException("gone")
+        healthy = _fake_ssh([])
+        clients = iter([broken, healthy])
+        with watch.WatchSession(module, "/srv", lambda: next(clients), log=lambda m: None) as session:
+            session.sync({"models/a.py"})
+        broken.close.assert_called_once()
+        healthy.open_sftp.return_value.putfo.assert_called_once()
+
+    def test_file_deleted_during_sync_is_removed_remotely(self, module, monkeypatch):
+        commands = []
+        client = _fake_ssh(commands)
+        connects = []
+        monkeypatch.setattr(
+            watch.WatchSession, "_classify", lambda self, paths: watch.delta.ChangeSet(upload={"models/ghost.py"})
+        )
+        with watch.WatchSession(module, "/srv", lambda: connects.append(1) or client, log=lambda m: None) as session:
+            changes = session.sync({"models/ghost.py"})
+        assert (changes.upload, changes.delete) == (set(), {"models/ghost.py"})
+        assert "cd /srv/mod && rm -f -- models/ghost.py" in commands
+        assert connects == [1]
+
+    def test_remote_file_errors_do_not_reconnect(self, module):
+        client = _fake_ssh([])
+        client.open_sftp.return_value.putfo.side_effect = PermissionError(13, "Permission denied")
+        connects = []
+        with watch.WatchSession(module, "/srv", lambda: connects.append(1) or client, log=lambda m: None) as session:
+            with pytest.raises(PermissionError):
+                session.sync({"models/a.py"})
+        assert connects == [1]
+
+    def test_borrowed_client_is_released_not_closed(self, module):
+        client = _fake_ssh([])
+        released = []
+        with watch.WatchSession(module, "/srv", lambda: client, log=lambda m: None, release=released.append):
+            pass
+        assert released == [client]
+        client.close.assert_not_called()